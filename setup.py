@@ -34,9 +34,18 @@ setup(
     install_requires=[
         "requests>=2.25.0",
         "pandas>=1.3.0",
+        "numpy>=1.20.0",
         "beautifulsoup4>=4.9.0",
         "lxml>=4.6.0"
     ],
+    extras_require={
+        "parquet": ["pyarrow>=7.0.0"],
+    },
+    entry_points={
+        "console_scripts": [
+            "sharesansar=sharesansar.cli:main",
+        ],
+    },
     keywords="nepal, stocks, sharesansar, finance, trading, nepal-stock-exchange, nepse",
     project_urls={
         "Bug Reports": "https://github.com/Paul-hembrom/sharesansar-api/issues",
@@ -3,14 +3,29 @@
 __version__ = "0.1.0"
 __author__ = "Paul Hembrom"
 
-from .api import (
-    Ticker,
-    download,
-    history,
-    get_stock_info,
-    get_market_data,
-    get_available_symbols
-)
+import importlib
+from typing import TYPE_CHECKING
+
+# Public names are resolved on first attribute access so that
+# ``import sharesansar`` does not pull in pandas, requests or BeautifulSoup.
+_LAZY_ATTRS = {
+    "Ticker": ".api",
+    "download": ".api",
+    "history": ".api",
+    "get_stock_info": ".api",
+    "get_market_data": ".api",
+    "get_market_panel": ".api",
+    "get_top_movers": ".api",
+    "get_available_symbols": ".api",
+    "search_symbols": ".search",
+    "profile": ".instrumentation",
+    "set_store": ".store",
+}
+
+_SUBMODULES = {"alerts", "anomaly", "api", "backfill", "backtest", "cli", "cube", "gaps",
+               "indicators", "instrumentation", "live", "metrics", "models", "panel", "portfolio",
+               "rankings", "registry", "resample", "risk", "rolling", "scraper", "screener",
+               "search", "sectors", "store", "trading_calendar", "utils"}
 
 __all__ = [
     "Ticker",
@@ -18,5 +33,40 @@ __all__ = [
     "history",
     "get_stock_info",
     "get_market_data",
-    "get_available_symbols"
-]
\ No newline at end of file
+    "get_market_panel",
+    "get_top_movers",
+    "get_available_symbols",
+    "search_symbols",
+    "profile",
+    "set_store"
+]
+
+if TYPE_CHECKING:
+    from .api import (
+        Ticker,
+        download,
+        history,
+        get_stock_info,
+        get_market_data,
+        get_market_panel,
+        get_top_movers,
+        get_available_symbols
+    )
+    from .instrumentation import profile
+    from .search import search_symbols
+    from .store import set_store
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is not None:
+        value = getattr(importlib.import_module(module_name, __name__), name)
+        globals()[name] = value
+        return value
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS) | _SUBMODULES)
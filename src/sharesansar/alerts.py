@@ -0,0 +1,276 @@
+"""Alert rules evaluated incrementally on live-poll deltas.
+
+A rule compares one field of one symbol with a level: LTP above 520,
+ChangePercent below -5, or Vol above 3 x a per-symbol baseline such
+as ``RollingStats`` ``avg_volume_20``.  Rules fire once per crossing:
+a rule fires when its condition becomes true and stays quiet until the
+condition has been false again.
+
+Rules are kept sorted by (symbol, field) in NumPy arrays with a
+per-symbol offset table, like ``PortfolioBook``'s holdings, so a delta
+only visits the rules of the symbols that changed and evaluates them
+in one vectorized comparison.  Rules, baselines and crossing state can
+be persisted to a JSON file so a restart neither loses rules nor fires
+every active alert again.  Crossings seen while polling are appended to
+a small ``<path>.state`` log rather than rewriting the file, and folded
+back into it on the next full save.
+"""
+
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import live
+from .utils import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+OPS = ('above', 'below')
+
+ALERT_COLUMNS = ('Rule', 'Symbol', 'Field', 'Op', 'Threshold', 'Value')
+
+# State-log lines appended before the next evaluate does a full save instead
+STATE_LOG_LIMIT = 1000
+
+
+@dataclass
+class Rule:
+    """
+    One alert condition.
+
+    Args:
+        symbol: Stock symbol
+        field: Snapshot column (LTP, ChangePercent, Vol, ...)
+        op: 'above' (value > threshold) or 'below' (value < threshold)
+        level: The threshold, or a multiple of the baseline when one is named
+        baseline: Name of a per-symbol baseline set with set_baseline()
+        id: Unique id (assigned by the engine when omitted)
+    """
+    symbol: str
+    field: str
+    op: str
+    level: float
+    baseline: Optional[str] = None
+    id: Optional[str] = None
+
+
+class AlertEngine:
+    """
+    Rules indexed by symbol and field, with crossing state.
+
+    Args:
+        rules: Initial rules
+        path: JSON file holding rules, baselines and state; loaded if it
+            exists and rewritten whenever rules or baselines change
+    """
+
+    def __init__(self, rules: Iterable[Rule] = (), path: Optional[str] = None):
+        self.path = path
+        self._rules: Dict[str, Rule] = {}
+        self._state: Dict[str, bool] = {}
+        self._baselines: Dict[str, Dict[str, float]] = {}
+        self._next_id = 1
+        self._built = False
+        self._log_lines = 0
+        if path and os.path.exists(path):
+            self._load()
+        rules = list(rules)
+        if rules:
+            self.add(rules)
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def add(self, rules: Iterable[Rule]) -> List[str]:
+        """Add rules (replacing any with the same id) and return their ids."""
+        self._sync_state()
+        ids = []
+        for rule in rules:
+            if rule.op not in OPS:
+                raise ValueError(f"op must be one of {OPS}, got {rule.op!r}")
+            if rule.baseline is not None and rule.baseline not in self._baselines:
+                logger.warning("Rule on %s uses baseline %r, which is not set yet",
+                               rule.symbol, rule.baseline)
+            if rule.id is None:
+                rule.id = f"r{self._next_id}"
+                self._next_id += 1
+            rule.symbol = rule.symbol.upper()
+            self._rules[rule.id] = rule
+            self._state.pop(rule.id, None)
+            ids.append(rule.id)
+        self._changed()
+        return ids
+
+    def remove(self, rule_ids: Iterable[str]) -> None:
+        """Drop rules by id; unknown ids are ignored."""
+        self._sync_state()
+        for rule_id in rule_ids:
+            self._rules.pop(rule_id, None)
+            self._state.pop(rule_id, None)
+        self._changed()
+
+    def set_baseline(self, name: str, values: Mapping[str, float]) -> None:
+        """
+        Set a per-symbol baseline that rules can be multiples of.
+
+        Args:
+            name: Baseline name used by Rule.baseline
+            values: Symbol -> value, e.g. RollingStats().current()['avg_volume_20']
+        """
+        self._sync_state()
+        self._baselines[name] = {str(s).upper(): float(v) for s, v in dict(values).items()
+                                 if pd.notna(v)}
+        self._changed()
+
+    def rules(self) -> pd.DataFrame:
+        """Every rule with its current state (Active is True after firing until it resets)."""
+        self._sync_state()
+        df = pd.DataFrame([asdict(r) for r in self._rules.values()],
+                          columns=['id', 'symbol', 'field', 'op', 'level', 'baseline'])
+        df['active'] = [self._state.get(r, False) for r in df['id']]
+        return df.set_index('id')
+
+    def _changed(self) -> None:
+        self._built = False
+        self.save()
+
+    def _sync_state(self) -> None:
+        """Copy crossing state from the arrays back to the per-id dict."""
+        if self._built:
+            self._state = dict(zip(self._ids, self._active.tolist()))
+
+    def _build(self) -> None:
+        rules = sorted(self._rules.values(), key=lambda r: (r.symbol, r.field))
+        self._ids = np.array([r.id for r in rules], dtype=object)
+        self._fields = sorted({r.field for r in rules})
+        self._symbols = pd.Index(sorted({r.symbol for r in rules}))
+        cols = self._symbols.get_indexer([r.symbol for r in rules])
+        self._field_codes = np.array([self._fields.index(r.field) for r in rules], dtype=np.intp)
+        self._sign = np.array([1.0 if r.op == 'above' else -1.0 for r in rules])
+        self._threshold = np.array([
+            r.level * self._baselines.get(r.baseline, {}).get(r.symbol, np.nan)
+            if r.baseline is not None else r.level
+            for r in rules], dtype=np.float64)
+        self._indptr = np.searchsorted(cols, np.arange(len(self._symbols) + 1))
+        self._active = np.array([self._state.get(r.id, False) for r in rules], dtype=bool)
+        self._built = True
+
+    def evaluate(self, delta: pd.DataFrame) -> pd.DataFrame:
+        """
+        Evaluate the rules of the symbols in a delta and return those that fired.
+
+        Args:
+            delta: Changed snapshot rows, e.g. from live.snapshot_delta
+
+        Returns:
+            pandas.DataFrame: One row per fired rule
+        """
+        if not self._built:
+            self._build()
+        snap = delta.drop_duplicates('Symbol')
+        pos = self._symbols.get_indexer(snap['Symbol'].astype(str))
+        rows = np.nonzero(pos >= 0)[0]
+        pos = pos[rows]
+        starts, ends = self._indptr[pos], self._indptr[pos + 1]
+        counts = ends - starts
+        if not counts.sum():
+            return pd.DataFrame(columns=list(ALERT_COLUMNS))
+
+        entries = np.repeat(ends - counts.cumsum(), counts) + np.arange(counts.sum())
+        values = snap.reindex(columns=self._fields).to_numpy(dtype=np.float64, na_value=np.nan)
+        value = values[np.repeat(rows, counts), self._field_codes[entries]]
+        threshold = self._threshold[entries]
+        known = ~np.isnan(value) & ~np.isnan(threshold)
+        with np.errstate(invalid='ignore'):
+            holds = known & (self._sign[entries] * (value - threshold) > 0)
+
+        fired = holds & ~self._active[entries]
+        # Unknown values (no trade, no baseline) leave the state as it was
+        flips = known & (holds != self._active[entries])
+        self._active[entries[known]] = holds[known]
+        if flips.any():
+            self._log_flips(self._ids[entries[flips & holds]], self._ids[entries[flips & ~holds]])
+
+        hit = entries[fired]
+        rules = [self._rules[i] for i in self._ids[hit]]
+        return pd.DataFrame({
+            'Rule': self._ids[hit],
+            'Symbol': [r.symbol for r in rules],
+            'Field': [r.field for r in rules],
+            'Op': [r.op for r in rules],
+            'Threshold': threshold[fired],
+            'Value': value[fired],
+        }, columns=list(ALERT_COLUMNS))
+
+    @property
+    def _state_path(self) -> str:
+        return f"{self.path}.state"
+
+    def _log_flips(self, on: np.ndarray, off: np.ndarray) -> None:
+        """Append one evaluate's state changes to the state log."""
+        if not self.path:
+            return
+        if self._log_lines >= STATE_LOG_LIMIT:
+            self.save()
+            return
+        with open(self._state_path, 'a') as f:
+            f.write(json.dumps({'on': on.tolist(), 'off': off.tolist()}) + '\n')
+        self._log_lines += 1
+
+    def save(self) -> None:
+        """Write rules, baselines and state to the engine's path (no-op without one)."""
+        if not self.path:
+            return
+        self._sync_state()
+        atomic_write_json(self.path, {
+            'next_id': self._next_id,
+            'rules': [asdict(r) for r in self._rules.values()],
+            'baselines': self._baselines,
+            'active': sorted(i for i, on in self._state.items() if on and i in self._rules),
+        })
+        # The file now holds every logged change; replaying a leftover log is harmless
+        if os.path.exists(self._state_path):
+            os.remove(self._state_path)
+        self._log_lines = 0
+
+    def _load(self) -> None:
+        with open(self.path) as f:
+            data = json.load(f)
+        self._next_id = data.get('next_id', 1)
+        self._rules = {r['id']: Rule(**r) for r in data.get('rules', [])}
+        self._baselines = data.get('baselines', {})
+        self._state = {i: True for i in data.get('active', [])}
+        if not os.path.exists(self._state_path):
+            return
+        with open(self._state_path) as f:
+            for line in f:
+                try:
+                    change = json.loads(line)
+                except ValueError:
+                    break                       # torn final line from a crash
+                self._state.update(dict.fromkeys(change['on'], True))
+                self._state.update(dict.fromkeys(change['off'], False))
+                self._log_lines += 1
+
+    def __repr__(self) -> str:
+        return f"AlertEngine(rules={len(self._rules)}, path={self.path!r})"
+
+
+def watch(engine: AlertEngine, **poll_kwargs) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Poll the market and evaluate the engine on every delta.
+
+    Args:
+        engine: Rules to evaluate
+        **poll_kwargs: Passed to live.poll (interval, date, scraper, max_polls, ...)
+
+    Yields:
+        (snapshot, alerts fired by this poll)
+    """
+    for snapshot, delta in live.poll(**poll_kwargs):
+        yield snapshot, engine.evaluate(delta)
@@ -0,0 +1,216 @@
+"""Volume, turnover and price anomalies from running per-symbol z-scores.
+
+``AnomalyDetector`` keeps a running count, mean and sum of squared
+deviations (Welford's algorithm) per symbol and field in NumPy arrays.
+Scoring a snapshot is one vectorized pass over the market: each value is
+compared with the symbol's history *before* that session, then folded
+into it.  ``fit()`` replays a stored Date x Symbol panel the same way,
+one vectorized step per session, so retrospective flags match what the
+live detector would have raised on each day.
+
+Volume-like fields are heavy-tailed, so they are scored on ``log1p``
+and flagged only when they jump above normal; other fields (e.g.
+ChangePercent) are scored as they are and flagged in either direction.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .panel import market_panel
+from .scraper import DEFAULT_RATE
+
+DEFAULT_FIELDS = ('Vol', 'Turnover', 'ChangePercent')
+
+# Scored on log1p and flagged on the upside only
+LOG_FIELDS = frozenset({'Vol', 'Turnover', 'Transactions'})
+
+FLAG_COLUMNS = ('Symbol', 'Field', 'Value', 'Typical', 'ZScore')
+
+
+class AnomalyDetector:
+    """
+    Running per-symbol mean and variance with z-score flags.
+
+    Args:
+        fields: Snapshot columns to watch
+        threshold: |z| at or above which a value is flagged
+        min_periods: Sessions of history a symbol needs before it is scored
+    """
+
+    def __init__(self, fields: Sequence[str] = DEFAULT_FIELDS, threshold: float = 3.0,
+                 min_periods: int = 20):
+        if min_periods < 2:
+            raise ValueError("min_periods must be at least 2")
+        self.fields = list(fields)
+        self.threshold = threshold
+        self.min_periods = min_periods
+        self._log = np.array([f in LOG_FIELDS for f in self.fields])
+        self._reset()
+
+    def _reset(self) -> None:
+        self.symbols = pd.Index([], dtype=object, name='Symbol')
+        shape = (0, len(self.fields))
+        self._count = np.zeros(shape)
+        self._mean = np.zeros(shape)
+        self._m2 = np.zeros(shape)
+
+    def _positions(self, symbols: Iterable[str]) -> np.ndarray:
+        """Row positions of the symbols, adding rows for new ones."""
+        symbols = pd.Index(symbols)
+        pos = self.symbols.get_indexer(symbols)
+        if (pos < 0).any():
+            new = pd.unique(symbols[pos < 0])
+            pad = np.zeros((len(new), len(self.fields)))
+            self.symbols = self.symbols.append(pd.Index(new, name='Symbol'))
+            self._count = np.vstack([self._count, pad])
+            self._mean = np.vstack([self._mean, pad])
+            self._m2 = np.vstack([self._m2, pad])
+            pos = self.symbols.get_indexer(symbols)
+        return pos
+
+    def _transform(self, values: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid='ignore'):
+            logged = np.log1p(np.where(values >= 0, values, np.nan))
+        return np.where(self._log, logged, values)
+
+    def _z(self, pos: np.ndarray, x: np.ndarray) -> np.ndarray:
+        count = self._count[pos]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std = np.sqrt(self._m2[pos] / (count - 1))
+            z = (x - self._mean[pos]) / std
+        z[(count < self.min_periods) | ~(std > 0)] = np.nan
+        return z
+
+    def _push(self, pos: np.ndarray, x: np.ndarray) -> None:
+        """One Welford step for every (symbol, field) with a value."""
+        valid = ~np.isnan(x)
+        count = self._count[pos] + valid
+        mean = self._mean[pos]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = np.where(valid, x - mean, 0.0)
+            new_mean = mean + np.where(valid, delta / count, 0.0)
+        self._m2[pos] += np.where(valid, delta * (x - new_mean), 0.0)
+        self._mean[pos] = new_mean
+        self._count[pos] = count
+
+    def _flagged(self, z: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid='ignore'):
+            return np.where(self._log, z, np.abs(z)) >= self.threshold
+
+    def _rows(self, snapshot: pd.DataFrame):
+        snap = snapshot.drop_duplicates('Symbol')
+        raw = snap.reindex(columns=self.fields).to_numpy(dtype=np.float64, na_value=np.nan)
+        return snap['Symbol'].astype(str), raw
+
+    def score(self, snapshot: pd.DataFrame) -> pd.DataFrame:
+        """
+        z-scores of a snapshot against each symbol's history, without updating it.
+
+        Returns:
+            pandas.DataFrame: Symbol x field z-scores, NaN where a symbol is
+            new, has too little history or no variation
+        """
+        symbols, raw = self._rows(snapshot)
+        pos = self.symbols.get_indexer(pd.Index(symbols))
+        known = pos >= 0
+        z = np.full(raw.shape, np.nan)
+        z[known] = self._z(pos[known], self._transform(raw[known]))
+        return pd.DataFrame(z, columns=self.fields, index=pd.Index(symbols, name='Symbol'))
+
+    def update(self, snapshot: pd.DataFrame) -> pd.DataFrame:
+        """
+        Score a new session, then add it to the history.
+
+        Returns:
+            pandas.DataFrame: Flagged (Symbol, Field) pairs with the raw
+            Value, the Typical level before it and the ZScore, strongest first
+        """
+        symbols, raw = self._rows(snapshot)
+        pos = self._positions(symbols)
+        x = self._transform(raw)
+        typical = self._typical(pos)
+        z = self._z(pos, x)
+        self._push(pos, x)
+        rows, cols = np.nonzero(self._flagged(z))
+        return self._flag_frame(np.asarray(symbols)[rows], cols, raw[rows, cols],
+                                typical[rows, cols], z[rows, cols])
+
+    def _typical(self, pos: np.ndarray) -> np.ndarray:
+        mean = np.where(self._count[pos] > 0, self._mean[pos], np.nan)
+        return np.where(self._log, np.expm1(mean), mean)
+
+    def _flag_frame(self, symbols, cols, values, typical, z,
+                    dates: Optional[np.ndarray] = None) -> pd.DataFrame:
+        df = pd.DataFrame({
+            'Symbol': symbols,
+            'Field': np.asarray(self.fields, dtype=object)[cols],
+            'Value': values,
+            'Typical': typical,
+            'ZScore': z,
+        }, columns=list(FLAG_COLUMNS))
+        if dates is not None:
+            df.insert(0, 'Date', dates)
+        order = np.argsort(-np.abs(df['ZScore'].to_numpy()), kind='stable')
+        return df.iloc[order].reset_index(drop=True)
+
+    def fit(self, panel: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Score a whole history in one pass and leave the detector primed at its end.
+
+        Each session is scored against the sessions before it, exactly as
+        update() would have done live.
+
+        Args:
+            panel: Field name -> Date x Symbol frame, as get_market_panel() returns
+
+        Returns:
+            pandas.DataFrame: Flags with a Date column, strongest first
+        """
+        self._reset()
+        index = panel[self.fields[0]].sort_index().index
+        symbols = pd.Index(sorted(set().union(*(panel[f].columns for f in self.fields))))
+        raw = np.stack([panel[f].reindex(index=index, columns=symbols)
+                        .to_numpy(dtype=np.float64, na_value=np.nan)
+                        for f in self.fields], axis=-1)
+        pos = self._positions(symbols)
+
+        found: List[tuple] = []
+        for i in range(len(index)):
+            x = self._transform(raw[i])
+            typical = self._typical(pos)
+            z = self._z(pos, x)
+            self._push(pos, x)
+            rows, cols = np.nonzero(self._flagged(z))
+            if len(rows):
+                found.append((np.full(len(rows), i), rows, cols, typical[rows, cols], z[rows, cols]))
+
+        if not found:
+            return self._flag_frame([], np.array([], dtype=np.intp), [], [], [],
+                                    dates=np.array([], dtype=object))
+        days, rows, cols, typical, z = (np.concatenate(parts) for parts in zip(*found))
+        dates = np.asarray(index.strftime('%Y-%m-%d'))[days]
+        return self._flag_frame(np.asarray(symbols)[rows], cols, raw[days, rows, cols],
+                                typical, z, dates=dates)
+
+    def backfill(self, start: str, end: str, workers: int = 1,
+                 rate: Optional[float] = DEFAULT_RATE) -> pd.DataFrame:
+        """fit() over every session in [start, end], read from the store or fetched once each."""
+        return self.fit(market_panel(start, end, self.fields, workers=workers, rate=rate))
+
+    def stats(self) -> pd.DataFrame:
+        """Sessions seen, Typical level and standard deviation (transformed scale) per symbol."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std = np.sqrt(self._m2 / (self._count - 1))
+        frames = {
+            'Count': pd.DataFrame(self._count, index=self.symbols, columns=self.fields),
+            'Typical': pd.DataFrame(self._typical(np.arange(len(self.symbols))),
+                                    index=self.symbols, columns=self.fields),
+            'Std': pd.DataFrame(std, index=self.symbols, columns=self.fields),
+        }
+        return pd.concat(frames, axis=1)
+
+    def __repr__(self) -> str:
+        return (f"AnomalyDetector(fields={self.fields}, threshold={self.threshold}, "
+                f"symbols={len(self.symbols)})")
@@ -1,15 +1,27 @@
 import pandas as pd
 from typing import Optional, Dict, List, Union
 import datetime
+import logging
 from .scraper import ShareSansarScraper
-from .models import StockInfo, MarketSummary
+from .models import StockInfo, MarketSummary, HistoryResult
+from .instrumentation import span
+from .store import get_store, scan_if_covered
+from .panel import PANEL_FIELDS, market_panel, wide_download
+from .resample import history_bars
+from .rankings import RANKING_DEPTH, RANKINGS, compute_rankings, rankings_frame
+from .sectors import resolve_sector
+from .registry import symbol_registry
+
+logger = logging.getLogger(__name__)
 
 
 class Ticker:
     """Main Ticker class similar to yfinance for individual stocks."""
 
-    def __init__(self, symbol: str):
+    def __init__(self, symbol: str, validate: bool = False):
         self.symbol = symbol.upper()
+        if validate and self.symbol not in symbol_registry():
+            raise ValueError(f"Unknown symbol {self.symbol!r}")
         self.scraper = ShareSansarScraper()
         self._info = None
         self._history = None
@@ -20,9 +32,20 @@ class Ticker:
             self._info = self._fetch_info()
         return self._info
 
-    def history(self, period: str = "1d", start: str = None, end: str = None) -> pd.DataFrame:
-        """Get historical data for the stock."""
-        return self._fetch_history(period, start, end)
+    def history(self, period: str = "1d", start: str = None, end: str = None,
+                interval: str = "1d", sector: str = None) -> pd.DataFrame:
+        """Get historical data for the stock.
+
+        ``interval`` may be '1d', '1wk' (NEPSE Sunday-Thursday weeks), '1mo'
+        or '3mo'; longer bars cover whole periods around the range.
+        ``sector`` (a sector name, or 'auto' to look it up) narrows each
+        day's fetch to that sector's table.
+        """
+        sector = resolve_sector(sector, [self.symbol])
+        if interval != "1d":
+            start, end = self._resolve_range(period, start, end)
+            return history_bars(self.symbol, start, end, interval, self.scraper, sector=sector)
+        return self._fetch_history(period, start, end, sector=sector)
 
     def _fetch_info(self) -> Dict[str, any]:
         """Fetch current stock information."""
@@ -37,24 +60,54 @@ class Ticker:
             row = symbol_data.iloc[0]
             return {
                 'symbol': self.symbol,
-                'company': '',  # You might need to map symbols to company names
+                'company': self._company(),
                 'ltp': row.get('LTP', 0),
                 'change': row.get('Diff', 0),
-                'change_percent': row.get('Diff %', 0),
+                'change_percent': row.get('ChangePercent', 0),
                 'open': row.get('Open', 0),
                 'high': row.get('High', 0),
                 'low': row.get('Low', 0),
-                'volume': row.get('Volume', 0),
-                'previous_close': row.get('Prev. Close', 0),
+                'volume': row.get('Vol', 0),
+                'previous_close': row.get('PrevClose', 0),
                 'vwap': row.get('VWAP', 0),
                 'turnover': row.get('Turnover', 0)
             }
         except Exception as e:
-            print(f"Error fetching info for {self.symbol}: {e}")
+            logger.warning("Error fetching info for %s: %s", self.symbol, e)
             return {}
 
-    def _fetch_history(self, period: str = "1d", start: str = None, end: str = None) -> pd.DataFrame:
-        """Fetch historical data."""
+    def _company(self) -> str:
+        """Company name from the symbol registry ('' if unknown or unavailable)."""
+        try:
+            entry = symbol_registry().get(self.symbol)
+        except Exception as e:
+            logger.warning("Symbol registry unavailable: %s", e)
+            return ''
+        return entry.company if entry is not None else ''
+
+    def fetch_history(self, period: str = "1d", start: str = None, end: str = None,
+                      dates: List[str] = None) -> HistoryResult:
+        """Get historical data with fetched, skipped and failed dates.
+
+        Pass ``dates=result.failed_dates`` to retry only the failures.
+        """
+        if dates is not None:
+            return self.scraper.fetch_history(self.symbol, dates=list(dates))
+        start, end = self._resolve_range(period, start, end)
+        return self.scraper.fetch_history(self.symbol, start, end)
+
+    def _fetch_history(self, period: str = "1d", start: str = None, end: str = None,
+                       sector: str = None) -> pd.DataFrame:
+        """Fetch historical data, from the local store when it covers the range."""
+        start, end = self._resolve_range(period, start, end)
+        stored = scan_if_covered([self.symbol], start, end)
+        if stored is not None:
+            return stored
+        return self.scraper.get_historical_data(self.symbol, start, end, sector=sector)
+
+    @staticmethod
+    def _resolve_range(period: str = "1d", start: str = None, end: str = None):
+        """Convert a period or partial range into (start, end) date strings."""
         # Handle period parameter
         if period != "1d" and start is None:
             # Convert period to date range
@@ -81,34 +134,63 @@ class Ticker:
             start = yesterday
             end = yesterday
 
-        return self.scraper.get_historical_data(self.symbol, start, end)
+        return start, end
 
 
 def download(
         symbols: Union[str, List[str]],
         start: str = None,
         end: str = None,
-        period: str = "1d"
+        period: str = "1d",
+        group_by: str = None,
+        layout: str = "long",
+        fields: List[str] = None,
+        sector: str = None
 ) -> pd.DataFrame:
-    """Download stock data for multiple symbols."""
+    """Download stock data for multiple symbols.
+
+    By default rows are one per (symbol, date). With ``layout='wide'`` or
+    a ``group_by`` of 'column' (field, symbol) or 'ticker' (symbol, field),
+    the result is indexed by date with MultiIndex columns, as in yfinance.
+    ``fields`` picks the wide columns (default: panel.PANEL_FIELDS).
+    ``sector`` fetches only that sector's tables; 'auto' uses each
+    symbol's own sector (the wide layout narrows only when all share one).
+    """
 
     if isinstance(symbols, str):
         symbols = [symbols]
+    symbols = [s.upper() for s in symbols]
+
+    if layout not in ("long", "wide"):
+        raise ValueError(f"layout must be 'long' or 'wide', got {layout!r}")
+    range_start, range_end = Ticker._resolve_range(period, start, end)
+    if layout == "wide" or group_by is not None:
+        return wide_download(symbols, range_start, range_end, fields=fields or PANEL_FIELDS,
+                             group_by=group_by or "column",
+                             sector=resolve_sector(sector, symbols))
+
+    stored = scan_if_covered(symbols, range_start, range_end)
+    if stored is not None:
+        if stored.empty:
+            return stored
+        return stored.sort_values(['Symbol', 'Date'], kind='mergesort').reset_index(drop=True)
 
     all_data = []
-    scraper = ShareSansarScraper()
 
     for symbol in symbols:
         try:
             ticker = Ticker(symbol)
-            data = ticker.history(period=period, start=start, end=end)
+            data = ticker.history(period=period, start=start, end=end, sector=sector)
             if not data.empty:
                 all_data.append(data)
         except Exception as e:
-            print(f"Error downloading data for {symbol}: {e}")
+            logger.warning("Error downloading data for %s: %s", symbol, e)
 
     if all_data:
-        return pd.concat(all_data, ignore_index=True)
+        with span('concat', symbols=len(all_data)) as stage:
+            result = pd.concat(all_data, ignore_index=True)
+            stage.rows = len(result)
+        return result
     return pd.DataFrame()
 
 
@@ -116,11 +198,16 @@ def history(
         symbol: str,
         start: str = None,
         end: str = None,
-        period: str = "1d"
+        period: str = "1d",
+        interval: str = "1d",
+        sector: str = None
 ) -> pd.DataFrame:
-    """Get historical data for a single symbol."""
+    """Get historical data for a single symbol, daily or as '1wk'/'1mo'/'3mo' bars.
+
+    ``sector`` (a name, or 'auto' for the symbol's own) narrows each day's fetch.
+    """
     ticker = Ticker(symbol)
-    return ticker.history(period=period, start=start, end=end)
+    return ticker.history(period=period, start=start, end=end, interval=interval, sector=sector)
 
 
 def get_stock_info(symbol: str) -> Optional[StockInfo]:
@@ -144,13 +231,69 @@ def get_stock_info(symbol: str) -> Optional[StockInfo]:
     return None
 
 
-def get_market_data(date: str = None) -> pd.DataFrame:
-    """Get complete market data for a specific date."""
+def get_market_data(date: str = None, sector: str = None) -> pd.DataFrame:
+    """Get complete market data for a specific date, or one sector's rows by sector name."""
     scraper = ShareSansarScraper()
-    return scraper.get_today_data(date)
+    return scraper.get_today_data(date, sector=sector)
+
+
+def get_top_movers(date: str = None, by: str = "gainers", k: int = 10) -> pd.DataFrame:
+    """Get the top k symbols of a session by 'gainers', 'losers', 'turnover' or 'volume'.
+
+    Stored sessions answer from the rankings saved when they were written,
+    without reading the session; other dates are fetched and ranked.
+    """
+    if by not in RANKINGS:
+        raise ValueError(f"by must be one of {tuple(RANKINGS)}, got {by!r}")
+    if date is None:
+        date = (datetime.datetime.now() - datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+    store = get_store()
+    if store is not None and store.has(date):
+        rankings = store.rankings(date)
+        top = rankings_frame(rankings, by, k) if rankings is not None else None
+        if top is not None:
+            return top
+        snapshot = store.read(date)
+    else:
+        snapshot = ShareSansarScraper().get_today_data(date)
+
+    rankings = compute_rankings(snapshot, max(k, RANKING_DEPTH))
+    if store is not None and store.has(date) and store.rankings(date) is None:
+        # Written before rankings were recorded
+        store.save_rankings(date, rankings)
+    return rankings_frame(rankings, by, k)
+
+
+def get_market_panel(
+        start: str,
+        end: str = None,
+        fields: Union[str, List[str]] = "LTP",
+        symbols: List[str] = None,
+        workers: int = 1
+) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """Get a Date x Symbol frame of one field, or a dict of frames for a list of fields.
+
+    Each session is fetched once (or read from the store) for all symbols;
+    symbols that list or delist inside the range are NaN outside their trading dates.
+    """
+    end = end or start
+    if isinstance(fields, str):
+        return market_panel(start, end, [fields], symbols, workers)[fields]
+    return market_panel(start, end, fields, symbols, workers)
 
 
 def get_available_symbols(date: str = None) -> List[str]:
-    """Get list of available stock symbols."""
+    """Get list of available stock symbols.
+
+    Without a date this is the symbol registry's active symbols (no
+    network once the registry is cached), falling back to the symbols
+    that traded yesterday when no registry can be built; with one, the
+    symbols that traded that day.
+    """
     scraper = ShareSansarScraper()
+    if date is None:
+        try:
+            return symbol_registry().symbols()
+        except Exception as e:
+            logger.warning("Symbol registry unavailable, listing one session: %s", e)
     return scraper.get_available_symbols(date)
\ No newline at end of file
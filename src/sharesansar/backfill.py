@@ -0,0 +1,165 @@
+"""Resumable, checkpointed bulk backfill into a snapshot store.
+
+The engine walks candidate trading sessions in a date range, fetches each
+full-market snapshot once and writes it straight to the store.  Progress
+lives in the store itself: a session is done once its file exists, and
+"No Record Found" days are recorded as non-trading.  Re-running the same
+range therefore resumes exactly where an earlier run stopped, whether it
+crashed or was interrupted with Ctrl-C.
+
+Only sessions that have closed are stored: a range reaching today stops
+at yesterday until 15:00 Nepal time, and today is never recorded as
+non-trading, since its data may simply not be published yet.
+"""
+
+import logging
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from .scraper import DEFAULT_RATE, NoTradingDataError, ShareSansarScraper
+from .store import SnapshotStore, open_store
+from .trading_calendar import last_closed_day, nepal_now, trading_days
+from .utils import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT = '_backfill.json'
+
+
+@dataclass
+class BackfillProgress:
+    """Running totals for a backfill, also written to the checkpoint file."""
+    start: str
+    end: str
+    total: int = 0
+    done: int = 0
+    stored: int = 0
+    non_trading: int = 0
+    failed_dates: Dict[str, str] = field(default_factory=dict)
+    bytes: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def sessions_per_min(self) -> float:
+        return self.done / self.elapsed * 60 if self.elapsed else 0.0
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.done
+
+    def summary(self) -> str:
+        return (f"{self.done}/{self.total} sessions "
+                f"({self.stored} stored, {self.non_trading} non-trading, "
+                f"{len(self.failed_dates)} failed), "
+                f"{self.sessions_per_min:.1f} sessions/min, "
+                f"{self.bytes_per_sec / 1024:.1f} KiB/s")
+
+
+class Backfill:
+    """
+    Fill a snapshot store with every session in a date range.
+
+    Args:
+        store: Destination store
+        scraper: Scraper to fetch with (a new one by default)
+        workers: Concurrent requests
+        rate: Maximum requests per second (None for no limit)
+        progress: Called with a BackfillProgress after every session
+        checkpoint_every: Sessions between checkpoint writes
+    """
+
+    def __init__(self, store: SnapshotStore, scraper: Optional[ShareSansarScraper] = None,
+                 workers: int = 1, rate: Optional[float] = DEFAULT_RATE,
+                 progress: Optional[Callable[[BackfillProgress], None]] = None,
+                 checkpoint_every: int = 10):
+        self.store = store
+        self.scraper = scraper or ShareSansarScraper()
+        self.workers = workers
+        self.rate = rate
+        self.progress = progress
+        self.checkpoint_every = checkpoint_every
+
+    @property
+    def checkpoint_path(self) -> str:
+        return self.store.sidecar_path(CHECKPOINT)
+
+    def pending(self, start: str, end: str) -> List[str]:
+        """Candidate sessions in the range, up to the last closed one, not yet stored or known closed."""
+        last = last_closed_day(nepal_now()).isoformat()
+        return [d for d in trading_days(start, end)
+                if d <= last and not self.store.is_known(d)]
+
+    def run(self, start: str, end: str) -> BackfillProgress:
+        """Backfill [start, end], resuming from whatever the store already holds."""
+        return self.run_dates(self.pending(start, end), start, end)
+
+    def run_dates(self, dates: List[str], start: Optional[str] = None,
+                  end: Optional[str] = None) -> BackfillProgress:
+        """Fetch and store the given dates, skipping sessions that have not closed yet."""
+        now = nepal_now()
+        today = now.date().isoformat()
+        last = last_closed_day(now).isoformat()
+        dates = sorted(dates)
+        if dates and dates[-1] > last:
+            logger.info("Backfill: skipping sessions after %s that have not closed", last)
+            dates = [d for d in dates if d <= last]
+        progress = BackfillProgress(start=start or (dates[0] if dates else ''),
+                                    end=end or (dates[-1] if dates else ''),
+                                    total=len(dates))
+        logger.info("Backfill %s..%s: %d sessions to fetch", progress.start, progress.end, len(dates))
+
+        bytes_at_start = self.scraper.bytes_received
+        started = time.monotonic()
+        try:
+            for date, df, error in self.scraper.iter_market_data(dates, self.workers, self.rate):
+                if isinstance(error, NoTradingDataError):
+                    # Today's data can appear late: only earlier days are known closed
+                    if date < today:
+                        self.store.mark_non_trading([date])
+                    progress.non_trading += 1
+                elif error is not None:
+                    logger.warning("Backfill %s failed: %s", date, error)
+                    progress.failed_dates[date] = type(error).__name__
+                else:
+                    self.store.write(date, df)
+                    progress.stored += 1
+
+                progress.done += 1
+                progress.bytes = self.scraper.bytes_received - bytes_at_start
+                progress.elapsed = time.monotonic() - started
+
+                if self.progress is not None:
+                    self.progress(progress)
+                if progress.done % self.checkpoint_every == 0:
+                    logger.info("Backfill %s", progress.summary())
+                    self._checkpoint(progress, 'running')
+        except BaseException:
+            # Ctrl-C or crash: everything written so far is kept
+            self._checkpoint(progress, 'interrupted')
+            raise
+
+        self.store.compact()
+        self._checkpoint(progress, 'complete')
+        logger.info("Backfill finished: %s", progress.summary())
+        return progress
+
+    def _checkpoint(self, progress: BackfillProgress, status: str) -> None:
+        state = asdict(progress)
+        state.update(status=status, updated=datetime.now().isoformat(timespec='seconds'),
+                     sessions_per_min=progress.sessions_per_min,
+                     bytes_per_sec=progress.bytes_per_sec)
+        atomic_write_json(self.checkpoint_path, state)
+
+
+def backfill(store_path: str, start: str, end: str, workers: int = 1,
+             rate: Optional[float] = DEFAULT_RATE,
+             progress: Optional[Callable[[BackfillProgress], None]] = None) -> BackfillProgress:
+    """Backfill every session in [start, end] into the store at store_path."""
+    return Backfill(open_store(store_path), workers=workers, rate=rate,
+                    progress=progress).run(start, end)
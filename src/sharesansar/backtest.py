@@ -0,0 +1,282 @@
+"""Backtesting on Date x Symbol panels with NEPSE trading costs.
+
+Signals are whole Date x Symbol matrices (booleans to hold, or target
+weights), typically built in one vectorized expression from
+``sharesansar.indicators`` over a ``get_market_panel()`` or
+``PriceCube.to_frame()`` panel.  The simulator walks sessions once and
+handles every symbol in a session with array operations: sizing, lot
+rounding, tiered broker commission, SEBON fee and DP charge.  A signal
+seen at one session's close is traded at the next session's close.
+
+``sweep`` runs a strategy over a parameter grid in a process pool; the
+price panel is sent to each worker once, not once per parameter set.
+"""
+
+import itertools
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# NEPSE equity commission: one rate applies to the whole transaction amount
+# according to the tier it falls in (upper bound inclusive).
+COMMISSION_TIERS = (
+    (50_000, 0.0036),
+    (500_000, 0.0033),
+    (2_000_000, 0.0031),
+    (10_000_000, 0.0027),
+    (math.inf, 0.0024),
+)
+MIN_COMMISSION = 10.0
+SEBON_FEE_RATE = 0.00015
+DP_CHARGE = 25.0
+
+SESSIONS_PER_YEAR = 240
+
+
+@dataclass(frozen=True)
+class NepseCosts:
+    """
+    Transaction costs for NEPSE equities.
+
+    Args:
+        tiers: (upper bound, commission rate) pairs, ascending
+        min_commission: Minimum broker commission per transaction
+        sebon_rate: SEBON fee as a fraction of the amount
+        dp_charge: Depository charge per scrip sold
+    """
+    tiers: Tuple[Tuple[float, float], ...] = COMMISSION_TIERS
+    min_commission: float = MIN_COMMISSION
+    sebon_rate: float = SEBON_FEE_RATE
+    dp_charge: float = DP_CHARGE
+
+    def commission(self, amount: np.ndarray) -> np.ndarray:
+        """Broker commission for each transaction amount."""
+        amount = np.asarray(amount, dtype=float)
+        bounds = np.array([b for b, _ in self.tiers])
+        rates = np.array([r for _, r in self.tiers])
+        tier = np.minimum(np.searchsorted(bounds, amount, side='left'), len(rates) - 1)
+        fee = np.maximum(amount * rates[tier], self.min_commission)
+        return np.where(amount > 0, fee, 0.0)
+
+    def cost(self, amount: np.ndarray, sell: bool) -> np.ndarray:
+        """Total charges for each transaction amount."""
+        amount = np.asarray(amount, dtype=float)
+        total = self.commission(amount) + amount * self.sebon_rate
+        if sell:
+            total = total + np.where(amount > 0, self.dp_charge, 0.0)
+        return total
+
+
+@dataclass
+class BacktestResult:
+    """Equity curve, positions and cost totals of one backtest."""
+    equity: pd.Series
+    positions: pd.DataFrame
+    trades: int = 0
+    costs: float = 0.0
+    turnover: float = 0.0
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def returns(self) -> pd.Series:
+        return self.equity.pct_change().fillna(0.0)
+
+    @property
+    def drawdown(self) -> pd.Series:
+        return self.equity / self.equity.cummax() - 1
+
+    def summary(self) -> Dict[str, float]:
+        """Headline statistics."""
+        equity = self.equity
+        if equity.empty:
+            return {}
+        total = equity.iloc[-1] / equity.iloc[0] - 1
+        years = len(equity) / SESSIONS_PER_YEAR
+        returns = self.returns
+        std = returns.std()
+        return {
+            'total_return': float(total),
+            'cagr': float((1 + total) ** (1 / years) - 1) if years and total > -1 else float('nan'),
+            'volatility': float(std * math.sqrt(SESSIONS_PER_YEAR)),
+            'sharpe': float(returns.mean() / std * math.sqrt(SESSIONS_PER_YEAR)) if std else 0.0,
+            'max_drawdown': float(self.drawdown.min()),
+            'trades': self.trades,
+            'costs': self.costs,
+            'turnover': self.turnover,
+        }
+
+
+def target_weights(signals: pd.DataFrame, max_positions: Optional[int] = None,
+                   max_weight: float = 1.0) -> pd.DataFrame:
+    """
+    Turn a signal matrix into per-session target weights.
+
+    Boolean signals are held in equal weight. Numeric signals are treated
+    as scores: the top ``max_positions`` positive scores are held in equal
+    weight. Weights are capped at ``max_weight``; the rest stays in cash.
+    """
+    values = signals.to_numpy()
+    if values.dtype == bool:
+        score = np.where(values, 1.0, np.nan)
+    else:
+        score = values.astype(float)
+        score = np.where(score > 0, score, np.nan)
+
+    held = ~np.isnan(score)
+    if max_positions is not None:
+        # Rank descending per session; NaN scores sort last
+        order = np.argsort(-np.nan_to_num(score, nan=-np.inf), axis=1, kind='stable')
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(score.shape[1])[None, :], axis=1)
+        held &= ranks < max_positions
+
+    counts = held.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weights = np.where(held, np.minimum(1.0 / counts, max_weight), 0.0)
+    return pd.DataFrame(weights, index=signals.index, columns=signals.columns)
+
+
+def run(signals: pd.DataFrame, prices: pd.DataFrame, capital: float = 1_000_000.0,
+        costs: NepseCosts = NepseCosts(), max_positions: Optional[int] = None,
+        max_weight: float = 1.0, lot_size: int = 10, rebalance: bool = False,
+        weights: Optional[pd.DataFrame] = None) -> BacktestResult:
+    """
+    Simulate a portfolio following a signal matrix.
+
+    Args:
+        signals: Date x Symbol booleans (hold) or scores, as of each session's close
+        prices: Date x Symbol traded prices (e.g. Close); NaN where a symbol did not trade
+        capital: Starting cash
+        costs: Transaction cost model
+        max_positions: Hold at most this many symbols at once
+        max_weight: Largest fraction of equity in one symbol
+        lot_size: Shares are bought and sold in multiples of this
+        rebalance: Resize held positions to their target every session
+            (otherwise positions are only opened and closed)
+        weights: Explicit target weights instead of sizing from signals
+
+    Returns:
+        BacktestResult: Equity curve, share positions and cost totals
+    """
+    prices = prices.sort_index()
+    if weights is None:
+        weights = target_weights(signals.reindex(index=prices.index, columns=prices.columns,
+                                                 fill_value=False),
+                                 max_positions, max_weight)
+    # Act on yesterday's signal at today's price
+    target = weights.reindex(index=prices.index, columns=prices.columns).shift(1) \
+        .fillna(0.0).to_numpy(dtype=float)
+
+    px = prices.to_numpy(dtype=float)
+    mark = prices.ffill().to_numpy(dtype=float)
+    tradable = ~np.isnan(px)
+
+    n_sessions, n_symbols = px.shape
+    cash = float(capital)
+    shares = np.zeros(n_symbols)
+    equity = np.empty(n_sessions)
+    positions = np.empty((n_sessions, n_symbols))
+    trades, paid, traded = 0, 0.0, 0.0
+
+    for t in range(n_sessions):
+        value = np.where(shares > 0, shares * np.nan_to_num(mark[t]), 0.0)
+        total = cash + value.sum()
+        w = target[t]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sized = np.floor(w * total / px[t] / lot_size) * lot_size
+        sized = np.where(w > 0, np.nan_to_num(sized), 0.0)
+        if not rebalance:
+            sized = np.where((w > 0) & (shares > 0), shares, sized)
+        desired = np.where(tradable[t], sized, shares)
+        delta = desired - shares
+
+        sells = np.where(delta < 0, -delta * np.nan_to_num(px[t]), 0.0)
+        if sells.any():
+            fees = costs.cost(sells, sell=True)
+            cash += sells.sum() - fees.sum()
+            paid += fees.sum()
+            traded += sells.sum()
+            trades += int((sells > 0).sum())
+            shares = np.where(delta < 0, desired, shares)
+
+        buy_shares = np.where(delta > 0, delta, 0.0)
+        if buy_shares.any():
+            for _ in range(20):
+                buys = buy_shares * np.nan_to_num(px[t])
+                fees = costs.cost(buys, sell=False)
+                needed = buys.sum() + fees.sum()
+                if needed <= cash:
+                    break
+                # Scale all buys down to fit the cash left after sells
+                scale = cash / needed * 0.999
+                buy_shares = np.floor(buy_shares * scale / lot_size) * lot_size
+            else:
+                buy_shares = np.zeros(n_symbols)
+                buys = fees = np.zeros(n_symbols)
+                needed = 0.0
+            cash -= needed
+            paid += fees.sum()
+            traded += buys.sum()
+            trades += int((buys > 0).sum())
+            shares = shares + buy_shares
+
+        positions[t] = shares
+        equity[t] = cash + np.where(shares > 0, shares * np.nan_to_num(mark[t]), 0.0).sum()
+
+    return BacktestResult(
+        equity=pd.Series(equity, index=prices.index, name='Equity'),
+        positions=pd.DataFrame(positions, index=prices.index, columns=prices.columns),
+        trades=trades, costs=paid, turnover=traded,
+    )
+
+
+# Per-process state for sweep(), set once by the pool initializer
+_SWEEP: Dict[str, Any] = {}
+
+
+def _init_sweep(strategy: Callable, prices: pd.DataFrame, run_kwargs: dict) -> None:
+    _SWEEP.update(strategy=strategy, prices=prices, run_kwargs=run_kwargs)
+
+
+def _sweep_one(params: Dict[str, Any]) -> Dict[str, Any]:
+    signals = _SWEEP['strategy'](_SWEEP['prices'], **params)
+    result = run(signals, _SWEEP['prices'], **_SWEEP['run_kwargs'])
+    return dict(params, **result.summary())
+
+
+def sweep(strategy: Callable[..., pd.DataFrame], grid: Dict[str, Sequence],
+          prices: pd.DataFrame, processes: Optional[int] = None, **run_kwargs) -> pd.DataFrame:
+    """
+    Backtest a strategy over every combination of parameters.
+
+    Args:
+        strategy: Module-level function (prices, **params) -> signal matrix
+        grid: Parameter name -> values to try
+        prices: Date x Symbol price panel
+        processes: Worker processes (default: CPU count; 1 runs in-process)
+        **run_kwargs: Passed to run()
+
+    Returns:
+        pandas.DataFrame: One row per parameter set with its summary statistics
+    """
+    names = list(grid)
+    combos: List[Dict[str, Any]] = [dict(zip(names, values))
+                                    for values in itertools.product(*grid.values())]
+    logger.info("Sweeping %d parameter sets", len(combos))
+
+    if processes == 1:
+        _init_sweep(strategy, prices, run_kwargs)
+        rows = [_sweep_one(params) for params in combos]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_sweep,
+                                 initargs=(strategy, prices, run_kwargs)) as pool:
+            rows = list(pool.map(_sweep_one, combos))
+    return pd.DataFrame(rows)
@@ -0,0 +1,315 @@
+"""Command-line interface for batch jobs.
+
+Usage:
+    sharesansar quote NABIL SCB
+    sharesansar snapshot --date 2024-12-20 -o market.parquet
+    sharesansar download NABIL SCB --start 2024-01-01 --end 2024-06-30 --workers 4
+    sharesansar backfill --start 2020-01-01 --end 2020-12-31 --store snapshots/
+
+pandas, requests and the scraper are imported inside the command handlers,
+so ``--help`` and argument errors return without loading them.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+_EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.json': 'jsonl', '.parquet': 'parquet', '.pq': 'parquet'}
+
+
+class _Writer:
+    """Streams DataFrame chunks to a file or stdout in one format."""
+
+    def __init__(self, fmt: str, path: str = None):
+        self.fmt = fmt
+        self.path = path
+        self._fh = None
+        self._parquet = None
+        self._schema = None
+        self._wrote_header = False
+
+    def write(self, df) -> None:
+        if df is None or df.empty:
+            return
+        if self.fmt == 'parquet':
+            self._write_parquet(df)
+            return
+        if self._fh is None:
+            self._fh = open(self.path, 'w', newline='') if self.path else sys.stdout
+        if self.fmt == 'csv':
+            df.to_csv(self._fh, header=not self._wrote_header, index=False)
+            self._wrote_header = True
+        else:
+            text = df.to_json(orient='records', lines=True)
+            self._fh.write(text if text.endswith('\n') else text + '\n')
+        self._fh.flush()
+
+    def _write_parquet(self, df) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Every chunk is written as a row group with one schema fixed up front
+        if self._parquet is None:
+            self._schema = _nullable_schema(df)
+            self._parquet = pq.ParquetWriter(self.path, self._schema)
+        table = pa.Table.from_pandas(df.reindex(columns=self._schema.names), schema=self._schema,
+                                     preserve_index=False)
+        self._parquet.write_table(table)
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._fh is not None and self._fh is not sys.stdout:
+            self._fh.close()
+
+
+def _nullable_schema(df):
+    """Schema for every chunk: snapshot numbers as float64, other columns by first-chunk dtype."""
+    import pyarrow as pa
+
+    from .store import arrow_types
+
+    return pa.schema([pa.field(name, pa.type_for_alias(kind), nullable=True)
+                      for name, kind in arrow_types(df).items()])
+
+
+def _output_format(args) -> str:
+    if args.format:
+        return args.format
+    if args.output:
+        ext = os.path.splitext(args.output)[1].lower()
+        if ext in _EXTENSIONS:
+            return _EXTENSIONS[ext]
+    return 'csv'
+
+
+def _session_path() -> str:
+    from .utils import default_cache_dir
+    return os.path.join(default_cache_dir(), 'session.json')
+
+
+def _make_scraper(args):
+    from .scraper import ShareSansarScraper
+
+    scraper = ShareSansarScraper()
+    if not args.no_session_cache:
+        if scraper.load_session(_session_path()):
+            logger.debug("Reusing cached session token")
+    return scraper
+
+
+def _save_scraper(args, scraper) -> None:
+    if not args.no_session_cache:
+        try:
+            scraper.save_session(_session_path())
+        except OSError as e:
+            logger.debug("Could not save session: %s", e)
+
+
+def _resolve_range(args):
+    from .api import Ticker
+
+    start, end = Ticker._resolve_range(args.period, args.start, args.end)
+    if end is None:
+        # --start alone runs through the last full session, not just one day
+        end = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    return start, end
+
+
+def _resolve_dates(args):
+    from .scraper import ShareSansarScraper
+
+    return ShareSansarScraper._date_range(*_resolve_range(args))
+
+
+def _stream_dates(args, scraper, writer, dates, symbols=None) -> int:
+    """Fetch snapshots for dates, writing (optionally filtered) rows as they arrive."""
+    from .scraper import NoTradingDataError
+
+    failed = 0
+    wanted = {s.upper() for s in symbols} if symbols else None
+    for date, df, error in scraper.iter_market_data(dates, workers=args.workers, rate=args.rate):
+        if isinstance(error, NoTradingDataError):
+            logger.info("%s: no trading data", date)
+            continue
+        if error is not None:
+            logger.warning("%s: %s", date, error)
+            failed += 1
+            continue
+        if wanted is not None:
+            df = df[df['Symbol'].isin(wanted)]
+        writer.write(df)
+    return failed
+
+
+def cmd_quote(args, scraper, writer) -> int:
+    df = scraper.get_today_data(args.date)
+    writer.write(df[df['Symbol'].isin({s.upper() for s in args.symbols})])
+    return 0
+
+
+def cmd_snapshot(args, scraper, writer) -> int:
+    writer.write(scraper.get_today_data(args.date))
+    return 0
+
+
+def cmd_symbols(args, scraper, writer) -> int:
+    writer.write(scraper.get_today_data(args.date)[['Symbol']])
+    return 0
+
+
+def cmd_history(args, scraper, writer) -> int:
+    return 1 if _stream_dates(args, scraper, writer, _resolve_dates(args), [args.symbol]) else 0
+
+
+def cmd_download(args, scraper, writer) -> int:
+    return 1 if _stream_dates(args, scraper, writer, _resolve_dates(args), args.symbols) else 0
+
+
+def cmd_backfill(args, scraper, writer) -> int:
+    from .backfill import Backfill
+    from .store import open_store
+
+    start, end = _resolve_range(args)
+    engine = Backfill(open_store(args.store), scraper=scraper,
+                      workers=args.workers, rate=args.rate)
+    progress = engine.run(start, end)
+    print(progress.summary(), file=sys.stderr)
+    return 1 if progress.failed_dates else 0
+
+
+def _scan_gaps(args):
+    from .gaps import scan_gaps
+    from .store import open_store
+
+    store = open_store(args.store)
+    return store, scan_gaps(store, args.start, args.end, window=args.window,
+                            min_ratio=args.min_ratio)
+
+
+def cmd_gaps(args, scraper, writer) -> int:
+    import pandas as pd
+
+    _, report = _scan_gaps(args)
+    writer.write(pd.DataFrame(report.rows(), columns=['date', 'kind', 'detail']))
+    print(report.summary(), file=sys.stderr)
+    return 0 if report.ok else 1
+
+
+def cmd_repair(args, scraper, writer) -> int:
+    from .gaps import repair
+
+    store, report = _scan_gaps(args)
+    print(report.summary(), file=sys.stderr)
+    if report.ok:
+        return 0
+    progress = repair(store, report, scraper=scraper, workers=args.workers, rate=args.rate)
+    print(progress.summary(), file=sys.stderr)
+    return 1 if progress.failed_dates else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-o', '--output', help="Output file (default: stdout)")
+    common.add_argument('-f', '--format', choices=FORMATS,
+                        help="Output format (default: from --output extension, else csv)")
+    common.add_argument('--workers', type=int, default=1, help="Concurrent requests (default: 1)")
+    common.add_argument('--rate', type=float, default=5.0,
+                        help="Maximum requests per second (default: 5, 0 for no limit)")
+    common.add_argument('--no-session-cache', action='store_true',
+                        help="Do not load or save the token/cookie cache")
+    common.add_argument('-v', '--verbose', action='count', default=0,
+                        help="Log progress to stderr (-vv for debug)")
+
+    date_opt = argparse.ArgumentParser(add_help=False)
+    date_opt.add_argument('--date', help="Trading date YYYY-MM-DD (default: yesterday)")
+
+    range_opt = argparse.ArgumentParser(add_help=False)
+    range_opt.add_argument('--start', help="Start date YYYY-MM-DD")
+    range_opt.add_argument('--end', help="End date YYYY-MM-DD (default: yesterday)")
+    range_opt.add_argument('--period', default='1d', help="1d, 1w, 1m, 3m, 6m or 1y (default: 1d)")
+
+    parser = argparse.ArgumentParser(prog='sharesansar', description="NEPSE data from ShareSansar.")
+    sub = parser.add_subparsers(dest='command', metavar='command')
+    sub.required = True
+
+    p = sub.add_parser('quote', parents=[common, date_opt], help="Current rows for symbols")
+    p.add_argument('symbols', nargs='+')
+    p.set_defaults(handler=cmd_quote)
+
+    p = sub.add_parser('snapshot', parents=[common, date_opt], help="Full market table for a date")
+    p.set_defaults(handler=cmd_snapshot)
+
+    p = sub.add_parser('symbols', parents=[common, date_opt], help="List traded symbols")
+    p.set_defaults(handler=cmd_symbols)
+
+    p = sub.add_parser('history', parents=[common, range_opt], help="Daily history for one symbol")
+    p.add_argument('symbol')
+    p.set_defaults(handler=cmd_history)
+
+    p = sub.add_parser('download', parents=[common, range_opt], help="Daily history for several symbols")
+    p.add_argument('symbols', nargs='+')
+    p.set_defaults(handler=cmd_download)
+
+    p = sub.add_parser('backfill', parents=[common, range_opt],
+                       help="Resumable full-market backfill into a snapshot store")
+    p.add_argument('--store', '--out-dir', dest='store', required=True,
+                   help="Snapshot store directory (re-run to resume)")
+    p.set_defaults(handler=cmd_backfill)
+
+    gap_opt = argparse.ArgumentParser(add_help=False)
+    gap_opt.add_argument('--store', required=True, help="Snapshot store directory")
+    gap_opt.add_argument('--start', help="First date (default: first stored session)")
+    gap_opt.add_argument('--end', help="Last date (default: last stored session)")
+    gap_opt.add_argument('--window', type=int, default=10,
+                         help="Neighbouring sessions for the row-count median (default: 10)")
+    gap_opt.add_argument('--min-ratio', type=float, default=0.5,
+                         help="Flag sessions below this fraction of the median rows (default: 0.5)")
+
+    p = sub.add_parser('gaps', parents=[common, gap_opt],
+                       help="List missing, partial or thin sessions in a store")
+    p.set_defaults(handler=cmd_gaps)
+
+    p = sub.add_parser('repair', parents=[common, gap_opt],
+                       help="Refetch only the sessions flagged by gaps")
+    p.set_defaults(handler=cmd_repair)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if _output_format(args) == 'parquet' and not args.output:
+        parser.error("parquet output needs --output FILE")
+    if args.rate is not None and args.rate <= 0:
+        args.rate = None
+
+    level = logging.WARNING if not args.verbose else logging.INFO if args.verbose == 1 else logging.DEBUG
+    logging.basicConfig(level=level, format='%(levelname)s %(name)s: %(message)s', stream=sys.stderr)
+
+    scraper = _make_scraper(args)
+    writer = _Writer(_output_format(args), args.output)
+    try:
+        return args.handler(args, scraper, writer)
+    except BrokenPipeError:
+        # Downstream closed early (e.g. `| head`); silence the flush on exit
+        sys.stdout = open(os.devnull, 'w')
+        return 0
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        logger.error("%s", e)
+        return 1
+    finally:
+        writer.close()
+        _save_scraper(args, scraper)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""Memory-mapped price cube: float64[session, symbol, field].
+
+A cube directory holds::
+
+    <root>/cube.f64     raw C-order array, sessions on the leading axis
+    <root>/meta.json    fields and allocated capacity
+    <root>/symbols.txt  symbol order, one per line, append-only
+    <root>/dates.txt    session order, one per line, append-only
+
+Sessions lead the layout, so appending one grows the file at the end
+without moving existing data and writes just one [symbol, field] plane,
+plus a line for the date and for each new symbol.  Symbol capacity is
+reserved up front; running out doubles it (a rare full rewrite).  Time
+series and cross-sections are strided views of the memory map, so
+slicing copies nothing, and any number of processes can open the same
+cube read-only and share it through the OS page cache.
+
+There must be only one writer at a time.  Readers call ``refresh()`` to
+see sessions appended since they opened the cube.
+"""
+
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .utils import atomic_write_json
+
+FIELDS = ('LTP', 'Open', 'High', 'Low', 'Close', 'Vol', 'Turnover')
+
+DATA_FILE = 'cube.f64'
+META_FILE = 'meta.json'
+SYMBOLS_FILE = 'symbols.txt'
+DATES_FILE = 'dates.txt'
+
+
+class PriceCube:
+    """
+    Dense [session, symbol, field] array backed by a memory-mapped file.
+
+    Args:
+        root: Cube directory (created if missing)
+        fields: Fields for a new cube (ignored when opening an existing one)
+        readonly: Map the file read-only, for reader processes
+        symbol_capacity: Symbols reserved for a new cube
+        session_capacity: Sessions reserved for a new cube
+    """
+
+    def __init__(self, root: str, fields: Sequence[str] = FIELDS, readonly: bool = False,
+                 symbol_capacity: int = 1024, session_capacity: int = 256):
+        self.root = os.path.expanduser(root)
+        self.readonly = readonly
+        self.symbols: List[str] = []
+        self.dates: List[str] = []
+        self.symbol_index: Dict[str, int] = {}
+        self.date_index: Dict[str, int] = {}
+        self._offsets = {SYMBOLS_FILE: 0, DATES_FILE: 0}
+        meta_path = os.path.join(self.root, META_FILE)
+
+        if os.path.exists(meta_path):
+            self._load_meta()
+        else:
+            if readonly:
+                raise FileNotFoundError(meta_path)
+            os.makedirs(self.root, exist_ok=True)
+            self.fields = list(fields)
+            self._symbol_capacity = symbol_capacity
+            self._session_capacity = 0
+            for name in (SYMBOLS_FILE, DATES_FILE):
+                open(os.path.join(self.root, name), 'w').close()
+            self._grow_sessions(session_capacity)
+            self._save_meta()
+
+        self._map()
+
+    # -- layout --------------------------------------------------------
+
+    @property
+    def _data_path(self) -> str:
+        return os.path.join(self.root, DATA_FILE)
+
+    @property
+    def _plane_size(self) -> int:
+        return self._symbol_capacity * len(self.fields)
+
+    def _load_meta(self) -> None:
+        with open(os.path.join(self.root, META_FILE)) as f:
+            meta = json.load(f)
+        self.fields = meta['fields']
+        self._symbol_capacity = meta['symbol_capacity']
+        self._session_capacity = meta['session_capacity']
+        for symbol in self._read_new(SYMBOLS_FILE):
+            self.symbol_index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        for date in self._read_new(DATES_FILE):
+            self.date_index[date] = len(self.dates)
+            self.dates.append(date)
+
+    def _read_new(self, name: str) -> List[str]:
+        """Complete lines appended to a sidecar since the last read."""
+        with open(os.path.join(self.root, name), 'rb') as f:
+            f.seek(self._offsets[name])
+            chunk = f.read()
+        end = chunk.rfind(b'\n') + 1          # a line still being written waits
+        self._offsets[name] += end
+        return chunk[:end].decode().splitlines()
+
+    def _append_lines(self, name: str, lines: Sequence[str]) -> None:
+        data = ''.join(f"{line}\n" for line in lines).encode()
+        with open(os.path.join(self.root, name), 'ab') as f:
+            f.write(data)
+        self._offsets[name] += len(data)
+
+    def _save_meta(self) -> None:
+        atomic_write_json(os.path.join(self.root, META_FILE), {
+            'fields': self.fields,
+            'symbol_capacity': self._symbol_capacity,
+            'session_capacity': self._session_capacity,
+        })
+
+    def _map(self) -> None:
+        shape = (self._session_capacity, self._symbol_capacity, len(self.fields))
+        self._data = np.memmap(self._data_path, dtype=np.float64,
+                               mode='r' if self.readonly else 'r+', shape=shape)
+
+    def _grow_sessions(self, extra: int) -> None:
+        # Appending NaN planes to the file keeps every existing offset valid
+        with open(self._data_path, 'ab') as f:
+            np.full(extra * self._plane_size, np.nan).tofile(f)
+        self._session_capacity += extra
+
+    def _grow_symbols(self, needed: int) -> None:
+        capacity = self._symbol_capacity
+        while capacity < needed:
+            capacity *= 2
+        old = self._data[:len(self.dates)]
+        tmp_path = self._data_path + '.tmp'
+        new = np.memmap(tmp_path, dtype=np.float64, mode='w+',
+                        shape=(self._session_capacity, capacity, len(self.fields)))
+        new[:] = np.nan
+        new[:len(self.dates), :self._symbol_capacity] = old
+        new.flush()
+        del new, old
+        self._data = None
+        os.replace(tmp_path, self._data_path)
+        self._symbol_capacity = capacity
+        self._save_meta()
+        self._map()
+
+    def refresh(self) -> None:
+        """Pick up sessions and symbols appended by the writer."""
+        self._load_meta()
+        self._map()
+
+    def flush(self) -> None:
+        if not self.readonly:
+            self._data.flush()
+
+    # -- writing -------------------------------------------------------
+
+    def _add_symbols(self, symbols: Iterable[str]) -> None:
+        new = [s for s in dict.fromkeys(symbols) if s not in self.symbol_index]
+        if not new:
+            return
+        if len(self.symbols) + len(new) > self._symbol_capacity:
+            self._grow_symbols(len(self.symbols) + len(new))
+        for symbol in new:
+            self.symbol_index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        self._append_lines(SYMBOLS_FILE, new)
+
+    def append(self, date: str, df: pd.DataFrame) -> None:
+        """
+        Add one session from a snapshot frame (Symbol plus field columns).
+
+        Costs O(symbols): one plane of data plus sidecar lines for the
+        date and any new symbols. Dates must arrive in ascending order;
+        appending a date that is already present overwrites it in place.
+        """
+        if self.readonly:
+            raise ValueError("Cube opened read-only")
+        if self.dates and date < self.dates[-1] and date not in self.date_index:
+            raise ValueError(f"Sessions must be appended in date order ({date} < {self.dates[-1]})")
+
+        symbols = df['Symbol'].astype(str).tolist()
+        self._add_symbols(symbols)
+
+        if date in self.date_index:
+            row = self.date_index[date]
+        else:
+            row = len(self.dates)
+            if row >= self._session_capacity:
+                self._data.flush()
+                self._grow_sessions(max(self._session_capacity, 1))
+                self._save_meta()
+                self._map()
+
+        values = df.reindex(columns=self.fields).to_numpy(dtype=np.float64, na_value=np.nan)
+        plane = self._data[row]
+        plane[:] = np.nan
+        plane[[self.symbol_index[s] for s in symbols]] = values
+        self._data.flush()
+
+        # Written after the data so readers never see a date without its plane
+        if date not in self.date_index:
+            self.date_index[date] = row
+            self.dates.append(date)
+            self._append_lines(DATES_FILE, [date])
+
+    @classmethod
+    def build(cls, root: str, store, start: Optional[str] = None, end: Optional[str] = None,
+              fields: Sequence[str] = FIELDS) -> 'PriceCube':
+        """
+        Build a cube from a snapshot store with one scan and one vectorized scatter.
+
+        Args:
+            root: Cube directory (must not already hold a cube)
+            store: Snapshot store to read from
+            start: First date (default: first stored session)
+            end: Last date (default: last stored session)
+            fields: Fields to include
+
+        Returns:
+            PriceCube: The new cube, open for appends
+        """
+        df = store.scan(start=start, end=end, columns=list(fields))
+        dates = sorted(df['Date'].unique()) if not df.empty else []
+        symbols = sorted(df['Symbol'].unique()) if not df.empty else []
+
+        capacity = 1024
+        while capacity < len(symbols):
+            capacity *= 2
+        cube = cls(root, fields=fields, symbol_capacity=capacity,
+                   session_capacity=max(256, len(dates)))
+        if df.empty:
+            return cube
+
+        date_codes = pd.Index(dates).get_indexer(df['Date'])
+        symbol_codes = pd.Index(symbols).get_indexer(df['Symbol'])
+        cube._data[date_codes, symbol_codes] = df[list(fields)].to_numpy(dtype=np.float64,
+                                                                          na_value=np.nan)
+        cube._data.flush()
+        cube._add_symbols(symbols)
+        cube._append_lines(DATES_FILE, dates)
+        cube.dates = list(dates)
+        cube.date_index = {d: i for i, d in enumerate(dates)}
+        return cube
+
+    # -- zero-copy views -----------------------------------------------
+
+    def _field(self, field: str) -> int:
+        try:
+            return self.fields.index(field)
+        except ValueError:
+            raise KeyError(f"Unknown field {field!r}; cube has {self.fields}")
+
+    @property
+    def values(self) -> np.ndarray:
+        """View of all stored data, shape [session, symbol, field]."""
+        return self._data[:len(self.dates), :len(self.symbols)]
+
+    def field(self, field: str) -> np.ndarray:
+        """View of one field, shape [session, symbol]."""
+        return self._data[:len(self.dates), :len(self.symbols), self._field(field)]
+
+    def series(self, symbol: str, field: str = 'LTP') -> np.ndarray:
+        """View of one symbol's time series for a field, shape [session]."""
+        return self._data[:len(self.dates), self.symbol_index[symbol], self._field(field)]
+
+    def cross_section(self, date: str, field: Optional[str] = None) -> np.ndarray:
+        """View of one session: shape [symbol, field], or [symbol] for one field."""
+        row = self._data[self.date_index[date], :len(self.symbols)]
+        return row if field is None else row[:, self._field(field)]
+
+    def to_frame(self, field: str = 'LTP') -> pd.DataFrame:
+        """Date x Symbol DataFrame for one field."""
+        return pd.DataFrame(self.field(field), index=pd.to_datetime(pd.Index(self.dates, name='Date')),
+                            columns=pd.Index(self.symbols, name='Symbol'), copy=False)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __repr__(self) -> str:
+        return (f"PriceCube({self.root!r}, sessions={len(self.dates)}, "
+                f"symbols={len(self.symbols)}, fields={self.fields})")
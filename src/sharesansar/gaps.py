@@ -0,0 +1,115 @@
+"""Gap detection and repair for a local snapshot store.
+
+``scan_gaps`` compares the stored sessions against the trading calendar
+using only the store's per-session index, so once a store is indexed,
+checking years of history does not open a single snapshot file.
+``repair`` refetches just the flagged dates through the normal backfill
+path.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from statistics import median
+from typing import Dict, List, Optional
+
+from .backfill import Backfill, BackfillProgress
+from .scraper import DEFAULT_RATE, ShareSansarScraper
+from .store import SnapshotStore
+from .trading_calendar import trading_days
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GapReport:
+    """Sessions in a range that are missing, partially parsed or suspiciously thin."""
+    start: str
+    end: str
+    expected: int = 0
+    missing: List[str] = field(default_factory=list)
+    partial: Dict[str, str] = field(default_factory=dict)
+    thin: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def dates_to_repair(self) -> List[str]:
+        return sorted(set(self.missing) | set(self.partial) | set(self.thin))
+
+    @property
+    def ok(self) -> bool:
+        return not self.dates_to_repair
+
+    def rows(self) -> List[Dict[str, str]]:
+        """One record per flagged date, for tabular output."""
+        out = [{'date': d, 'kind': 'missing', 'detail': ''} for d in self.missing]
+        out += [{'date': d, 'kind': 'partial', 'detail': reason} for d, reason in self.partial.items()]
+        out += [{'date': d, 'kind': 'thin', 'detail': f'{rows} rows'} for d, rows in self.thin.items()]
+        return sorted(out, key=lambda r: r['date'])
+
+    def summary(self) -> str:
+        return (f"{self.start}..{self.end}: {self.expected} expected sessions, "
+                f"{len(self.missing)} missing, {len(self.partial)} partial, {len(self.thin)} thin")
+
+
+def scan_gaps(store: SnapshotStore, start: Optional[str] = None, end: Optional[str] = None,
+              window: int = 10, min_ratio: float = 0.5,
+              max_null_ratio: float = 0.2) -> GapReport:
+    """
+    Find sessions that need refetching.
+
+    Args:
+        store: Snapshot store to check
+        start: First date (default: first stored session)
+        end: Last date (default: last stored session)
+        window: Stored sessions on each side used for the row-count median
+        min_ratio: Flag sessions with fewer rows than this fraction of the median
+        max_null_ratio: Flag sessions where more than this fraction of rows lack prices
+
+    Returns:
+        GapReport: Missing, partial and thin sessions
+    """
+    stored = store.dates()
+    start = start or (stored[0] if stored else None)
+    end = end or (stored[-1] if stored else None)
+    if start is None or end is None:
+        return GapReport(start='', end='')
+
+    report = GapReport(start=start, end=end)
+    closed = store.non_trading_dates()
+    expected = [d for d in trading_days(start, end) if d not in closed]
+    report.expected = len(expected)
+    report.missing = [d for d in expected if not store.has(d)]
+
+    stats = store.stats()
+    in_range = [d for d in stored if start <= d <= end]
+    for d in in_range:
+        entry = stats[d]
+        if entry.get('error'):
+            report.partial[d] = f"unreadable ({entry['error']})"
+        elif entry['missing_columns']:
+            report.partial[d] = 'missing columns: ' + ', '.join(entry['missing_columns'])
+        elif entry['rows'] and entry['null_prices'] / entry['rows'] > max_null_ratio:
+            report.partial[d] = f"{entry['null_prices']}/{entry['rows']} rows without prices"
+
+    # Neighbourhood median over all stored sessions, so range edges still
+    # have context on both sides
+    counts = [stats[d]['rows'] for d in stored]
+    index = {d: i for i, d in enumerate(stored)}
+    for d in in_range:
+        i = index[d]
+        neighbours = counts[max(0, i - window):i] + counts[i + 1:i + 1 + window]
+        if not neighbours:
+            continue
+        typical = median(neighbours)
+        if counts[i] < min_ratio * typical:
+            report.thin[d] = counts[i]
+
+    logger.info("Gap scan %s", report.summary())
+    return report
+
+
+def repair(store: SnapshotStore, report: GapReport,
+           scraper: Optional[ShareSansarScraper] = None, workers: int = 1,
+           rate: Optional[float] = DEFAULT_RATE) -> BackfillProgress:
+    """Refetch only the sessions flagged in a GapReport."""
+    engine = Backfill(store, scraper=scraper, workers=workers, rate=rate)
+    return engine.run_dates(report.dates_to_repair, report.start, report.end)
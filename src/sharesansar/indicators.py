@@ -0,0 +1,285 @@
+"""Vectorized technical indicators for single series and Date x Symbol panels.
+
+Every function takes a Series (one symbol), a Date x Symbol DataFrame such
+as ``get_market_panel()`` returns, or a 1-D/2-D NumPy array, and returns
+the same kind.  Rows are sessions; panels are computed for all symbols at
+once through pandas' compiled rolling/ewm kernels, never row by row.
+
+Missing values are treated as "did not trade": exponential indicators
+skip them and carry the last value forward, and price changes are taken
+against the last traded close.
+
+For daily refreshes, the ``EMA``, ``RSI``, ``MACD`` and ``ATR`` classes fit
+once over history and then ``update()`` with one new session, carrying
+their state forward in O(symbols).  Results match a full recompute.
+"""
+
+from typing import NamedTuple, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+ArrayLike = Union[pd.Series, pd.DataFrame, np.ndarray]
+
+
+class MACDResult(NamedTuple):
+    macd: ArrayLike
+    signal: ArrayLike
+    hist: ArrayLike
+
+
+class Bands(NamedTuple):
+    middle: ArrayLike
+    upper: ArrayLike
+    lower: ArrayLike
+
+
+def _frame(x: ArrayLike):
+    """(DataFrame, function turning a result frame back into x's type)."""
+    if isinstance(x, pd.DataFrame):
+        return x.astype(float), lambda df: df
+    if isinstance(x, pd.Series):
+        return x.astype(float).to_frame(), lambda df: df.iloc[:, 0].rename(x.name)
+    arr = np.asarray(x, dtype=float)
+    if arr.ndim == 1:
+        return pd.DataFrame(arr[:, None]), lambda df: df.to_numpy()[:, 0]
+    return pd.DataFrame(arr), lambda df: df.to_numpy()
+
+
+def _ewm(df: pd.DataFrame, alpha: float, min_periods: int = 0) -> pd.DataFrame:
+    return df.ewm(alpha=alpha, adjust=False, ignore_na=True, min_periods=min_periods).mean()
+
+
+def _changes(close: pd.DataFrame) -> pd.DataFrame:
+    """Close minus the previous traded close."""
+    return close - close.ffill().shift(1)
+
+
+def _rsi_from(avg_gain, avg_loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+    return np.where(np.isnan(avg_gain) | np.isnan(avg_loss), np.nan, rsi)
+
+
+def _true_range(high: pd.DataFrame, low: pd.DataFrame, close: pd.DataFrame) -> pd.DataFrame:
+    prev = close.ffill().shift(1)
+    tr = np.fmax(high - low, np.fmax((high - prev).abs(), (low - prev).abs()))
+    return tr.where(high.notna() & low.notna())
+
+
+def sma(x: ArrayLike, n: int) -> ArrayLike:
+    """Simple moving average over the last n sessions."""
+    df, wrap = _frame(x)
+    return wrap(df.rolling(n, min_periods=n).mean())
+
+
+def ema(x: ArrayLike, span: int) -> ArrayLike:
+    """Exponential moving average, alpha = 2 / (span + 1), seeded with the first value."""
+    df, wrap = _frame(x)
+    return wrap(_ewm(df, 2.0 / (span + 1)))
+
+
+def _rsi_parts(close: pd.DataFrame, n: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    delta = _changes(close)
+    gain = delta.clip(lower=0)
+    loss = (-delta).clip(lower=0)
+    return _ewm(gain, 1.0 / n), _ewm(loss, 1.0 / n)
+
+
+def rsi(close: ArrayLike, n: int = 14) -> ArrayLike:
+    """Wilder's relative strength index (0-100)."""
+    df, wrap = _frame(close)
+    avg_gain, avg_loss = _rsi_parts(df, n)
+    out = pd.DataFrame(_rsi_from(avg_gain.to_numpy(), avg_loss.to_numpy()),
+                       index=df.index, columns=df.columns)
+    counts = _changes(df).notna().cumsum()
+    return wrap(out.where(counts >= n))
+
+
+def macd(close: ArrayLike, fast: int = 12, slow: int = 26, signal: int = 9) -> MACDResult:
+    """MACD line, signal line and histogram."""
+    df, wrap = _frame(close)
+    line = _ewm(df, 2.0 / (fast + 1)) - _ewm(df, 2.0 / (slow + 1))
+    sig = _ewm(line, 2.0 / (signal + 1))
+    return MACDResult(wrap(line), wrap(sig), wrap(line - sig))
+
+
+def bollinger(close: ArrayLike, n: int = 20, k: float = 2.0) -> Bands:
+    """Bollinger bands: n-session SMA plus/minus k population standard deviations."""
+    df, wrap = _frame(close)
+    rolling = df.rolling(n, min_periods=n)
+    middle = rolling.mean()
+    width = k * rolling.std(ddof=0)
+    return Bands(wrap(middle), wrap(middle + width), wrap(middle - width))
+
+
+def atr(high: ArrayLike, low: ArrayLike, close: ArrayLike, n: int = 14) -> ArrayLike:
+    """Wilder's average true range."""
+    h, wrap = _frame(high)
+    l, _ = _frame(low)
+    c, _ = _frame(close)
+    return wrap(_ewm(_true_range(h, l, c), 1.0 / n, min_periods=n))
+
+
+class _Incremental:
+    """Per-symbol state arrays that can grow when new symbols appear."""
+
+    # state attribute -> fill value for a symbol with no history
+    _state = {}
+
+    def __init__(self):
+        self.symbols = None
+        self._scalar = False
+
+    def _init_state(self, x: ArrayLike) -> None:
+        self._scalar = isinstance(x, pd.Series) or np.ndim(x) == 1
+        if isinstance(x, pd.DataFrame):
+            self.symbols = x.columns
+        elif isinstance(x, pd.Series):
+            self.symbols = pd.Index([x.name])
+        else:
+            self.symbols = pd.RangeIndex(1 if np.ndim(x) == 1 else np.shape(x)[1])
+
+    def _last(self, df: pd.DataFrame) -> np.ndarray:
+        return df.ffill().iloc[-1].to_numpy(dtype=float) if len(df) else \
+            np.full(df.shape[1], np.nan)
+
+    def _align(self, row) -> np.ndarray:
+        """One session as an array in symbol order, adding unseen symbols."""
+        if self.symbols is None:
+            raise ValueError(f"{type(self).__name__} must be fit() before update()")
+        if isinstance(row, pd.Series):
+            new = [s for s in row.index if s not in self.symbols]
+            if new:
+                self.symbols = self.symbols.append(pd.Index(new))
+                for name, fill in self._state.items():
+                    setattr(self, name, np.concatenate([getattr(self, name),
+                                                        np.full(len(new), fill, dtype=float)]))
+            return row.reindex(self.symbols).to_numpy(dtype=float)
+        return np.atleast_1d(np.asarray(row, dtype=float))
+
+    def _wrap(self, values: np.ndarray, like):
+        if isinstance(like, pd.Series):
+            return pd.Series(values, index=self.symbols)
+        if self._scalar and np.ndim(like) == 0:
+            return float(values[0])
+        return values
+
+
+def _ema_step(value: np.ndarray, x: np.ndarray, alpha: float) -> np.ndarray:
+    stepped = np.where(np.isnan(value), x, value + alpha * (x - value))
+    return np.where(np.isnan(x), value, stepped)
+
+
+class EMA(_Incremental):
+    """Exponential moving average with carried-forward state."""
+
+    _state = {'value': np.nan}
+
+    def __init__(self, span: int):
+        super().__init__()
+        self.span = span
+        self.alpha = 2.0 / (span + 1)
+
+    def fit(self, x: ArrayLike) -> ArrayLike:
+        """Compute over the full history and keep the final state."""
+        self._init_state(x)
+        df, wrap = _frame(x)
+        out = _ewm(df, self.alpha)
+        self.value = self._last(out)
+        return wrap(out)
+
+    def update(self, row):
+        """Advance one session; returns the new EMA per symbol."""
+        x = self._align(row)
+        self.value = _ema_step(self.value, x, self.alpha)
+        return self._wrap(self.value, row)
+
+
+class RSI(_Incremental):
+    """Wilder's RSI with carried-forward average gain/loss."""
+
+    _state = {'prev': np.nan, 'avg_gain': np.nan, 'avg_loss': np.nan, 'count': 0}
+
+    def __init__(self, n: int = 14):
+        super().__init__()
+        self.n = n
+
+    def fit(self, close: ArrayLike) -> ArrayLike:
+        """Compute over the full history and keep the final state."""
+        self._init_state(close)
+        df, _ = _frame(close)
+        avg_gain, avg_loss = _rsi_parts(df, self.n)
+        self.prev = self._last(df)
+        self.avg_gain = self._last(avg_gain)
+        self.avg_loss = self._last(avg_loss)
+        self.count = _changes(df).notna().sum().to_numpy(dtype=float)
+        return rsi(close, self.n)
+
+    def update(self, row):
+        """Advance one session; returns the new RSI per symbol."""
+        x = self._align(row)
+        delta = x - self.prev
+        alpha = 1.0 / self.n
+        self.avg_gain = _ema_step(self.avg_gain, np.where(np.isnan(delta), np.nan,
+                                                          np.maximum(delta, 0)), alpha)
+        self.avg_loss = _ema_step(self.avg_loss, np.where(np.isnan(delta), np.nan,
+                                                          np.maximum(-delta, 0)), alpha)
+        self.count = self.count + ~np.isnan(delta)
+        self.prev = np.where(np.isnan(x), self.prev, x)
+        out = np.where(self.count >= self.n, _rsi_from(self.avg_gain, self.avg_loss), np.nan)
+        return self._wrap(out, row)
+
+
+class MACD:
+    """MACD with carried-forward fast, slow and signal EMAs."""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+
+    def fit(self, close: ArrayLike) -> MACDResult:
+        """Compute over the full history and keep the final state."""
+        line = self.fast.fit(close) - self.slow.fit(close)
+        sig = self.signal.fit(line)
+        return MACDResult(line, sig, line - sig)
+
+    def update(self, row) -> MACDResult:
+        """Advance one session; returns the new (macd, signal, hist)."""
+        line = self.fast.update(row) - self.slow.update(row)
+        sig = self.signal.update(line)
+        return MACDResult(line, sig, line - sig)
+
+
+class ATR(_Incremental):
+    """Wilder's ATR with carried-forward previous close and average."""
+
+    _state = {'prev': np.nan, 'value': np.nan, 'count': 0}
+
+    def __init__(self, n: int = 14):
+        super().__init__()
+        self.n = n
+
+    def fit(self, high: ArrayLike, low: ArrayLike, close: ArrayLike) -> ArrayLike:
+        """Compute over the full history and keep the final state."""
+        self._init_state(close)
+        h, _ = _frame(high)
+        l, _ = _frame(low)
+        c, _ = _frame(close)
+        tr = _true_range(h, l, c)
+        self.prev = self._last(c)
+        self.value = self._last(_ewm(tr, 1.0 / self.n))
+        self.count = tr.notna().sum().to_numpy(dtype=float)
+        return atr(high, low, close, self.n)
+
+    def update(self, high, low, close):
+        """Advance one session; returns the new ATR per symbol."""
+        h, l, c = self._align(high), self._align(low), self._align(close)
+        tr = np.fmax(h - l, np.fmax(np.abs(h - self.prev), np.abs(l - self.prev)))
+        tr = np.where(np.isnan(h) | np.isnan(l), np.nan, tr)
+        self.value = _ema_step(self.value, tr, 1.0 / self.n)
+        self.count = self.count + ~np.isnan(tr)
+        self.prev = np.where(np.isnan(c), self.prev, c)
+        return self._wrap(np.where(self.count >= self.n, self.value, np.nan), close)
@@ -0,0 +1,227 @@
+"""Per-stage timing instrumentation for the scraper pipeline.
+
+Each stage of a fetch (token, http, parse, clean, concat) runs inside a
+``span``.  When no hooks are registered a span does nothing beyond one list
+check, so the hot path stays cheap.  Register a callback with ``add_hook`` to
+receive a ``StageEvent`` for every completed span, or use ``profile()`` to
+collect an aggregated per-stage breakdown.
+
+Hooks are process-wide.  A ``profile()`` block is bound to the context that
+entered it (a ``contextvars.ContextVar``), so profiles running concurrently
+in different threads each see only their own spans.
+"""
+
+import contextvars
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class StageEvent:
+    """A single completed pipeline stage."""
+    stage: str
+    duration: float
+    bytes: int = 0
+    rows: int = 0
+    cache_hit: Optional[bool] = None
+    error: Optional[str] = None
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+
+Hook = Callable[[StageEvent], None]
+
+_hooks: List[Hook] = []
+_hooks_lock = threading.Lock()
+
+# Profiles active in the current context, innermost last
+_profiles: contextvars.ContextVar = contextvars.ContextVar('sharesansar_profiles', default=())
+
+
+def add_hook(hook: Hook) -> None:
+    """Register a callback receiving a StageEvent for every completed span."""
+    global _hooks
+    with _hooks_lock:
+        # Copy-on-write so emitters can iterate without holding the lock
+        _hooks = _hooks + [hook]
+
+
+def remove_hook(hook: Hook) -> None:
+    """Unregister a callback previously passed to add_hook."""
+    global _hooks
+    with _hooks_lock:
+        _hooks = [h for h in _hooks if h != hook]
+
+
+def enabled() -> bool:
+    """Return True if any hook is registered or a profile is active here."""
+    return bool(_hooks) or bool(_profiles.get())
+
+
+def emit(event: StageEvent) -> None:
+    """Deliver an event to every registered hook and the profiles active here."""
+    for hook in _hooks:
+        try:
+            hook(event)
+        except Exception:
+            # A broken hook must never break a fetch
+            pass
+    for prof in _profiles.get():
+        prof.record(event)
+
+
+class span:
+    """Context manager timing one pipeline stage.
+
+    Set ``bytes``, ``rows``, ``cache_hit`` or entries of ``meta`` on the
+    object returned by ``__enter__`` to attach them to the emitted event.
+    """
+
+    __slots__ = ('stage', 'bytes', 'rows', 'cache_hit', 'meta', '_start')
+
+    def __init__(self, stage: str, **meta):
+        self.stage = stage
+        self.bytes = 0
+        self.rows = 0
+        self.cache_hit = None
+        self.meta = meta
+        self._start = None
+
+    def __enter__(self):
+        if _hooks or _profiles.get():
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._start is None:
+            return False
+        duration = time.perf_counter() - self._start
+        emit(StageEvent(
+            stage=self.stage,
+            duration=duration,
+            bytes=self.bytes,
+            rows=self.rows,
+            cache_hit=self.cache_hit,
+            error=exc_type.__name__ if exc_type is not None else None,
+            meta=self.meta,
+        ))
+        return False
+
+
+@dataclass
+class StageStats:
+    """Aggregated statistics for one stage."""
+    stage: str
+    calls: int = 0
+    total: float = 0.0
+    min: float = float('inf')
+    max: float = 0.0
+    bytes: int = 0
+    rows: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    errors: int = 0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+    def add(self, event: StageEvent) -> None:
+        self.calls += 1
+        self.total += event.duration
+        self.min = min(self.min, event.duration)
+        self.max = max(self.max, event.duration)
+        self.bytes += event.bytes
+        self.rows += event.rows
+        if event.cache_hit is True:
+            self.cache_hits += 1
+        elif event.cache_hit is False:
+            self.cache_misses += 1
+        if event.error:
+            self.errors += 1
+
+
+class Profile:
+    """Collects StageEvents and aggregates them per stage."""
+
+    def __init__(self):
+        self.stages: Dict[str, StageStats] = {}
+        self.events: List[StageEvent] = []
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self.wall_time = 0.0
+
+    def record(self, event: StageEvent) -> None:
+        with self._lock:
+            self.events.append(event)
+            stats = self.stages.get(event.stage)
+            if stats is None:
+                stats = self.stages[event.stage] = StageStats(event.stage)
+            stats.add(event)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Return one dict per stage, slowest total first."""
+        rows = []
+        for stats in sorted(self.stages.values(), key=lambda s: s.total, reverse=True):
+            rows.append({
+                'stage': stats.stage,
+                'calls': stats.calls,
+                'total_s': stats.total,
+                'mean_s': stats.mean,
+                'min_s': stats.min if stats.calls else 0.0,
+                'max_s': stats.max,
+                'bytes': stats.bytes,
+                'rows': stats.rows,
+                'cache_hits': stats.cache_hits,
+                'cache_misses': stats.cache_misses,
+                'errors': stats.errors,
+            })
+        return rows
+
+    def report(self) -> str:
+        """Format the summary as a fixed-width table."""
+        header = (f"{'stage':<10} {'calls':>6} {'total s':>9} {'mean ms':>9} "
+                  f"{'max ms':>9} {'bytes':>11} {'rows':>8} {'hit/miss':>9} {'err':>4}")
+        lines = [header, '-' * len(header)]
+        for row in self.summary():
+            hit_miss = f"{row['cache_hits']}/{row['cache_misses']}"
+            lines.append(
+                f"{row['stage']:<10} {row['calls']:>6} {row['total_s']:>9.3f} "
+                f"{row['mean_s'] * 1000:>9.1f} {row['max_s'] * 1000:>9.1f} "
+                f"{row['bytes']:>11} {row['rows']:>8} {hit_miss:>9} {row['errors']:>4}"
+            )
+        lines.append(f"wall time: {self.wall_time:.3f}s")
+        return '\n'.join(lines)
+
+
+class profile:
+    """Collect a per-stage breakdown of everything run inside the block.
+
+    Example:
+        with sharesansar.profile() as prof:
+            sharesansar.download(["NABIL", "SCB"], period="1w")
+        prof.summary()
+
+    Args:
+        verbose: Print the report to ``file`` (default stderr) on exit.
+    """
+
+    def __init__(self, verbose: bool = True, file=None):
+        self.verbose = verbose
+        self.file = file
+        self.profile = Profile()
+        self._token = None
+
+    def __enter__(self) -> Profile:
+        self.profile._start = time.perf_counter()
+        self._token = _profiles.set(_profiles.get() + (self.profile,))
+        return self.profile
+
+    def __exit__(self, exc_type, exc, tb):
+        _profiles.reset(self._token)
+        self.profile.wall_time = time.perf_counter() - self.profile._start
+        if self.verbose:
+            print(self.profile.report(), file=self.file or sys.stderr)
+        return False
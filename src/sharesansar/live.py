@@ -0,0 +1,85 @@
+"""Live polling of the market snapshot with per-poll deltas.
+
+``poll`` refetches the day's snapshot at a fixed interval and yields it
+together with the rows that changed since the previous poll, so
+consumers (portfolio valuation, alerts) can touch only the symbols that
+actually moved.
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .scraper import NoTradingDataError, ShareSansarScraper
+
+logger = logging.getLogger(__name__)
+
+DELTA_COLUMNS = ('LTP', 'PrevClose', 'Open', 'High', 'Low', 'Vol', 'Turnover',
+                 'Transactions')
+
+
+def snapshot_delta(previous: Optional[pd.DataFrame], current: pd.DataFrame,
+                   columns: Sequence[str] = DELTA_COLUMNS) -> pd.DataFrame:
+    """
+    Rows of the current snapshot that are new or changed in any of the columns.
+
+    Args:
+        previous: Earlier snapshot (None treats every row as new)
+        current: Latest snapshot
+        columns: Columns compared; NaN equals NaN
+
+    Returns:
+        pandas.DataFrame: Changed rows of current, in its order
+    """
+    if previous is None or previous.empty:
+        return current
+    columns = [c for c in columns if c in current.columns]
+    before = (previous.drop_duplicates('Symbol').set_index('Symbol')
+              .reindex(index=current['Symbol'], columns=columns))
+    new = before.to_numpy(dtype=np.float64, na_value=np.nan)
+    now = current[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+    same = (new == now) | (np.isnan(new) & np.isnan(now))
+    listed = current['Symbol'].isin(previous['Symbol']).to_numpy()
+    return current[~same.all(axis=1) | ~listed]
+
+
+def poll(interval: float = 60.0, date: Optional[str] = None,
+         scraper: Optional[ShareSansarScraper] = None,
+         columns: Sequence[str] = DELTA_COLUMNS,
+         max_polls: Optional[int] = None) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Poll the day's snapshot, yielding (snapshot, delta) after every successful fetch.
+
+    The first delta is the whole snapshot. Failed fetches and days without
+    data are logged and retried at the next interval.
+
+    Args:
+        interval: Seconds between polls
+        date: Session to poll (YYYY-MM-DD, default today)
+        scraper: Scraper to fetch with (a new one by default)
+        columns: Columns that define a change
+        max_polls: Stop after this many polls (default: run until closed)
+    """
+    scraper = scraper or ShareSansarScraper()
+    previous = None
+    polls = 0
+    while max_polls is None or polls < max_polls:
+        if polls:
+            time.sleep(interval)
+        polls += 1
+        session = date or datetime.now().strftime('%Y-%m-%d')
+        try:
+            current = scraper.get_today_data(session)
+        except NoTradingDataError:
+            logger.debug("No trading data for %s yet", session)
+            continue
+        except Exception as e:
+            logger.warning("Live poll for %s failed: %s", session, e)
+            continue
+        delta = snapshot_delta(previous, current, columns)
+        previous = current
+        yield current, delta
@@ -0,0 +1,261 @@
+"""Built-in counters and histograms exported in Prometheus text format.
+
+Metrics are always on.  Recording one is a dict lookup and an increment
+under a per-child lock, which is noise next to an HTTP round trip.  Serve
+``generate_latest()`` from your own app, or call ``start_http_server()``
+to expose ``/metrics`` from a background thread.
+"""
+
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    """A collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, '_Metric'] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: '_Metric') -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def unregister(self, metric: '_Metric') -> None:
+        with self._lock:
+            self._metrics.pop(metric.name, None)
+
+    def get(self, name: str) -> Optional['_Metric']:
+        return self._metrics.get(name)
+
+    def collect(self) -> List['_Metric']:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def reset(self) -> None:
+        """Zero every metric (mainly for tests)."""
+        for metric in self.collect():
+            metric.reset()
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Iterable[str] = (), registry: Optional[Registry] = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Return the child for a label value combination."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} requires labels {self.labelnames}")
+        return self.labels()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._children = {}
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {_escape(self.documentation)}',
+                 f'# TYPE {self.name} {self.type_name}']
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child) -> List[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default().inc(amount)
+
+    def value(self, *labelvalues) -> float:
+        child = self._children.get(tuple(str(v) for v in labelvalues))
+        return child.value if child is not None else 0.0
+
+    def _render_child(self, key, child):
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}']
+
+
+class _HistogramChild:
+    __slots__ = ('upper_bounds', 'counts', 'sum', 'count', '_lock')
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * len(upper_bounds)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 registry: Optional[Registry] = REGISTRY):
+        bounds = sorted(float(b) for b in buckets)
+        if not bounds or bounds[-1] != float('inf'):
+            bounds.append(float('inf'))
+        self.upper_bounds = tuple(bounds)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def _render_child(self, key, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(child.upper_bounds, child.counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f'{self.name}_sum{labels} {_format_value(child.sum)}')
+        lines.append(f'{self.name}_count{labels} {child.count}')
+        return lines
+
+
+def generate_latest(registry: Registry = REGISTRY) -> str:
+    """Render every metric in the registry as Prometheus text."""
+    lines = []
+    for metric in registry.collect():
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE_LATEST = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def start_http_server(port: int, addr: str = '', registry: Registry = REGISTRY):
+    """Serve ``/metrics`` from a daemon thread. Returns the server object."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = generate_latest(registry).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE_LATEST)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+# Built-in metrics
+UPSTREAM_REQUESTS = Counter(
+    'sharesansar_upstream_requests_total',
+    'Requests sent to sharesansar.com by endpoint and HTTP status.',
+    ['endpoint', 'status'])
+UPSTREAM_RESPONSE_BYTES = Counter(
+    'sharesansar_upstream_response_bytes_total',
+    'Response body bytes received from sharesansar.com.',
+    ['endpoint'])
+UPSTREAM_LATENCY = Histogram(
+    'sharesansar_upstream_request_duration_seconds',
+    'Upstream request latency.',
+    ['endpoint'])
+TOKEN_REFRESHES = Counter(
+    'sharesansar_token_refreshes_total',
+    'CSRF token fetches from the main page.')
+PARSE_FAILURES = Counter(
+    'sharesansar_parse_failures_total',
+    'Responses that could not be parsed into a table.')
+SNAPSHOT_CACHE_HITS = Counter(
+    'sharesansar_snapshot_cache_hits_total',
+    'Snapshot lookups answered from the local cache or store.')
+SNAPSHOT_CACHE_MISSES = Counter(
+    'sharesansar_snapshot_cache_misses_total',
+    'Snapshot lookups that had to go to the network.')
+RATE_LIMIT_WAIT = Histogram(
+    'sharesansar_rate_limiter_wait_seconds',
+    'Time spent waiting on the request rate limiter.',
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
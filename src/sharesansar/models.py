@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Optional, Dict, List
 import pandas as pd
 
@@ -15,6 +15,16 @@ class StockInfo:
     volume: int
     previous_close: float
 
+@dataclass
+class SymbolInfo:
+    """Registry entry for one symbol; dates are YYYY-MM-DD, None if never traded."""
+    symbol: str
+    company: str = ''
+    sector: str = ''
+    status: str = 'listed'
+    first_seen: Optional[str] = None
+    last_seen: Optional[str] = None
+
 @dataclass
 class MarketSummary:
     total_traded_volume: int
@@ -22,4 +32,22 @@ class MarketSummary:
     total_transactions: int
     advances: int
     declines: int
-    unchanged: int
\ No newline at end of file
+    unchanged: int
+
+@dataclass
+class HistoryResult:
+    """Outcome of a multi-date fetch for one symbol.
+
+    ``failed_dates`` maps each failed date to the exception type name, so
+    callers can retry just those dates with ``fetch_history(dates=...)``.
+    """
+    symbol: str
+    data: pd.DataFrame = field(default_factory=pd.DataFrame)
+    fetched_dates: List[str] = field(default_factory=list)
+    skipped_dates: List[str] = field(default_factory=list)
+    failed_dates: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        """True if no date failed."""
+        return not self.failed_dates
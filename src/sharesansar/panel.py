@@ -0,0 +1,236 @@
+"""Wide Date x Symbol panels built from full-market snapshots.
+
+Every snapshot already holds the whole market, so a panel needs each
+session once rather than once per symbol.  Sessions are read from the
+default store when it has them and fetched otherwise; their field values
+are then scattered into one preallocated array in a single fancy-index
+assignment, so there is no per-symbol concat and no pivot.  The array is
+allocated in the axis order of the requested layout, which lets the
+final DataFrame wrap it without another copy.
+"""
+
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .instrumentation import span
+from .scraper import DEFAULT_RATE, NoTradingDataError, ShareSansarScraper
+from .store import get_store, scan_if_covered
+from .trading_calendar import trading_days
+
+logger = logging.getLogger(__name__)
+
+PANEL_FIELDS = ('Open', 'High', 'Low', 'Close', 'LTP', 'VWAP', 'Vol', 'Turnover',
+                'Transactions', 'PrevClose', 'ChangePercent')
+
+GROUP_BY = ('column', 'ticker')
+
+
+def iter_sessions(start: str, end: str, columns: Optional[List[str]] = None,
+                  scraper: Optional[ShareSansarScraper] = None, workers: int = 1,
+                  rate: Optional[float] = DEFAULT_RATE,
+                  sector: Optional[str] = None,
+                  failed: Optional[Dict[str, str]] = None) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Full-market snapshots for every session in [start, end], each read once.
+
+    Sessions held by the default store are read from it; known non-trading
+    days are skipped; everything else is fetched.
+
+    Args:
+        start: First date (YYYY-MM-DD)
+        end: Last date (YYYY-MM-DD)
+        columns: Columns to read from the store (Symbol and Date always included)
+        scraper: Scraper for sessions the store lacks (a new one by default)
+        workers: Concurrent requests
+        rate: Maximum requests per second (None for no limit)
+        sector: Fetch only this sector's rows (stored sessions are read whole)
+        failed: Dict to fill with date -> exception type for sessions that
+            failed to fetch (they are skipped with a warning)
+
+    Yields:
+        tuple: (date, DataFrame) in date order
+    """
+    store = get_store()
+    usecols = list(dict.fromkeys(['Symbol', 'Date'] + list(columns))) if columns else None
+    closed = store.non_trading_dates() if store is not None else set()
+
+    stored, to_fetch = set(), []
+    for date in trading_days(start, end):
+        if date in closed:
+            continue
+        if store is not None and store.has(date):
+            stored.add(date)
+        else:
+            to_fetch.append(date)
+
+    fetched = iter(())
+    if to_fetch:
+        scraper = scraper or ShareSansarScraper()
+        fetched = scraper.iter_market_data(to_fetch, workers, rate, sector)
+    pending = next(fetched, None)
+
+    # Merge the two ordered streams so sessions come out in date order
+    for date in sorted(stored.union(to_fetch)):
+        if date in stored:
+            yield date, store.read(date, usecols)
+            continue
+        fetched_date, df, error = pending
+        pending = next(fetched, None)
+        if isinstance(error, NoTradingDataError):
+            logger.debug("No trading data for %s", fetched_date)
+        elif error is not None:
+            logger.warning("Failed to fetch %s: %s", fetched_date, error)
+            if failed is not None:
+                failed[fetched_date] = type(error).__name__
+        else:
+            yield fetched_date, df
+
+
+def _stack(date_codes: np.ndarray, symbol_codes: np.ndarray, values: np.ndarray,
+           n_dates: int, n_symbols: int, order: str) -> np.ndarray:
+    """Scatter (date, symbol) rows into a NaN-filled array laid out for `order`."""
+    n_fields = values.shape[1]
+    if order == 'column':
+        out = np.full((n_dates, n_fields, n_symbols), np.nan)
+        view = out.transpose(0, 2, 1)
+    elif order == 'field':
+        out = np.full((n_fields, n_dates, n_symbols), np.nan)
+        view = out.transpose(1, 2, 0)
+    else:
+        out = np.full((n_dates, n_symbols, n_fields), np.nan)
+        view = out
+    # `view` is always [date, symbol, field] over the same memory
+    view[date_codes, symbol_codes] = values
+    return out
+
+
+def stack_sessions(sessions: Iterable[Tuple[str, pd.DataFrame]],
+                   fields: Sequence[str] = PANEL_FIELDS,
+                   symbols: Optional[Iterable[str]] = None,
+                   order: str = 'column') -> Tuple[pd.DatetimeIndex, pd.Index, np.ndarray]:
+    """
+    Stack per-session snapshots into one dense array.
+
+    Args:
+        sessions: (date, DataFrame) pairs, e.g. from iter_sessions
+        fields: Columns to keep; missing ones come out as NaN
+        symbols: Universe to keep (default: every symbol seen). Symbols
+            absent on a date, e.g. before listing or after delisting, are NaN.
+        order: 'column' for [date, field, symbol], 'ticker' for
+            [date, symbol, field], 'field' for [field, date, symbol]
+
+    Returns:
+        tuple: (dates, symbols, array)
+    """
+    wanted = sorted({s.upper() for s in symbols}) if symbols is not None else None
+    fields = list(fields)
+
+    dates, codes, names, blocks = [], [], [], []
+    for date, df in sessions:
+        if wanted is not None:
+            df = df[df['Symbol'].isin(wanted)]
+        dates.append(date)
+        codes.append(np.full(len(df), len(dates) - 1, dtype=np.intp))
+        names.append(df['Symbol'].astype(str).to_numpy())
+        blocks.append(df.reindex(columns=fields).to_numpy(dtype=np.float64, na_value=np.nan))
+
+    if not dates:
+        return _assemble([], np.array([], dtype=np.intp), np.array([], dtype=object),
+                         np.empty((0, len(fields))), wanted, order)
+    return _assemble(dates, np.concatenate(codes), np.concatenate(names),
+                     np.concatenate(blocks), wanted, order)
+
+
+def stack_frame(df: pd.DataFrame, fields: Sequence[str] = PANEL_FIELDS,
+                symbols: Optional[Iterable[str]] = None,
+                order: str = 'column') -> Tuple[pd.DatetimeIndex, pd.Index, np.ndarray]:
+    """Like stack_sessions, for a long frame such as SnapshotStore.scan() returns."""
+    wanted = sorted({s.upper() for s in symbols}) if symbols is not None else None
+    date_codes, dates = pd.factorize(df['Date'].astype(str), sort=True)
+    values = df.reindex(columns=list(fields)).to_numpy(dtype=np.float64, na_value=np.nan)
+    return _assemble(list(dates), date_codes, df['Symbol'].astype(str).to_numpy(),
+                     values, wanted, order)
+
+
+def _assemble(dates: List[str], date_codes: np.ndarray, names: np.ndarray, values: np.ndarray,
+              wanted: Optional[List[str]], order: str):
+    with span('stack', sessions=len(dates)) as stage:
+        universe = pd.Index(wanted if wanted is not None else np.unique(names.astype(str)),
+                            name='Symbol')
+        symbol_codes = universe.get_indexer(names)
+        keep = symbol_codes >= 0
+        if not keep.all():
+            date_codes, symbol_codes, values = date_codes[keep], symbol_codes[keep], values[keep]
+        array = _stack(date_codes, symbol_codes, values, len(dates), len(universe), order)
+        stage.rows = len(values)
+    index = pd.DatetimeIndex(pd.to_datetime(list(dates)), name='Date')
+    return index, universe, array
+
+
+def to_wide(index: pd.DatetimeIndex, symbols: pd.Index, fields: Sequence[str],
+            array: np.ndarray, group_by: str = 'column') -> pd.DataFrame:
+    """Wrap a stacked array as a DataFrame with (field, symbol) or (symbol, field) columns."""
+    if group_by == 'column':
+        columns = pd.MultiIndex.from_product([list(fields), symbols], names=['Field', 'Symbol'])
+    else:
+        columns = pd.MultiIndex.from_product([symbols, list(fields)], names=['Symbol', 'Field'])
+    return pd.DataFrame(array.reshape(len(index), -1), index=index, columns=columns, copy=False)
+
+
+def stack_range(start: str, end: str, fields: Sequence[str] = PANEL_FIELDS,
+                symbols: Optional[Iterable[str]] = None, order: str = 'column',
+                workers: int = 1, rate: Optional[float] = DEFAULT_RATE,
+                sector: Optional[str] = None, failed: Optional[Dict[str, str]] = None
+                ) -> Tuple[pd.DatetimeIndex, pd.Index, np.ndarray]:
+    """Stack every session in [start, end]: one store scan if covered, else one read per session."""
+    symbols = list(symbols) if symbols is not None else None
+    stored = scan_if_covered(symbols, start, end)
+    if stored is not None:
+        return stack_frame(stored, fields, symbols, order=order)
+    sessions = iter_sessions(start, end, columns=list(fields), workers=workers, rate=rate,
+                             sector=sector, failed=failed)
+    return stack_sessions(sessions, fields, symbols, order=order)
+
+
+def wide_download(symbols: List[str], start: str, end: str,
+                  fields: Sequence[str] = PANEL_FIELDS, group_by: str = 'column',
+                  workers: int = 1, rate: Optional[float] = DEFAULT_RATE,
+                  sector: Optional[str] = None) -> pd.DataFrame:
+    """Wide download() result: one read per session, one scatter into the panel."""
+    if group_by not in GROUP_BY:
+        raise ValueError(f"group_by must be one of {GROUP_BY}, got {group_by!r}")
+    index, universe, array = stack_range(start, end, fields, symbols, group_by, workers, rate,
+                                         sector)
+    return to_wide(index, universe, fields, array, group_by)
+
+
+def market_panel(start: str, end: str, fields: Sequence[str] = ('LTP',),
+                 symbols: Optional[Iterable[str]] = None, workers: int = 1,
+                 rate: Optional[float] = DEFAULT_RATE,
+                 failed: Optional[Dict[str, str]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Dense Date x Symbol frame per field for the whole market.
+
+    Args:
+        start: First date (YYYY-MM-DD)
+        end: Last date (YYYY-MM-DD)
+        fields: Snapshot columns to return
+        symbols: Restrict to these symbols (default: every symbol that traded)
+        workers: Concurrent requests for sessions not in the store
+        rate: Maximum requests per second (None for no limit)
+        failed: Dict to fill with date -> exception type for sessions that
+            failed to fetch and are missing from the frames
+
+    Returns:
+        dict: Field name -> DataFrame (dates x symbols, NaN where a symbol
+        did not trade, e.g. before listing or after delisting)
+    """
+    fields = list(fields)
+    index, universe, array = stack_range(start, end, fields, symbols, 'field', workers, rate,
+                                         failed=failed)
+    # array is [field, date, symbol]; each field slice is contiguous
+    return {f: pd.DataFrame(array[i], index=index, columns=universe, copy=False)
+            for i, f in enumerate(fields)}
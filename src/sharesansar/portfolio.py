@@ -0,0 +1,161 @@
+"""Valuing many portfolios against one market snapshot.
+
+Holdings are kept as a sparse portfolio x symbol quantity matrix in
+compressed-column form (entries grouped by symbol), using NumPy arrays
+only.  A full mark is one sparse matrix-vector product per price vector
+(LTP and PrevClose), done with ``np.bincount``.  A live-poll delta that
+moves a few symbols only visits those symbols' entries, so an update
+costs O(holdings of the changed symbols), not O(portfolios x symbols).
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+class PortfolioBook:
+    """
+    Holdings of many portfolios, valued together.
+
+    Args:
+        holdings: Rows with Portfolio, Symbol, Quantity and optionally Cost
+            (average cost per share). Repeated (Portfolio, Symbol) rows are
+            combined: quantities summed, Cost weighted by quantity.
+    """
+
+    def __init__(self, holdings: pd.DataFrame):
+        df = holdings.copy()
+        df['Symbol'] = df['Symbol'].astype(str).str.upper()
+        if 'Cost' not in df.columns:
+            df['Cost'] = np.nan
+        df['CostBasis'] = df['Quantity'] * df['Cost']
+        df['Unknown'] = df['CostBasis'].isna()
+        df = df.groupby(['Portfolio', 'Symbol'], sort=False, as_index=False).agg(
+            Quantity=('Quantity', 'sum'), CostBasis=('CostBasis', 'sum'), Unknown=('Unknown', 'any'))
+        df.loc[df['Unknown'], 'CostBasis'] = np.nan
+
+        self.portfolios = pd.Index(pd.unique(df['Portfolio']), name='Portfolio')
+        self.symbols = pd.Index(sorted(df['Symbol'].unique()), name='Symbol')
+        rows = self.portfolios.get_indexer(df['Portfolio'])
+        cols = self.symbols.get_indexer(df['Symbol'])
+
+        # Group entries by symbol so each symbol's holdings are one slice
+        order = np.lexsort((rows, cols))
+        self._rows = rows[order]
+        self._cols = cols[order]
+        self._qty = df['Quantity'].to_numpy(dtype=np.float64)[order]
+        self._indptr = np.searchsorted(self._cols, np.arange(len(self.symbols) + 1))
+
+        n = len(self.portfolios)
+        self.cost_basis = np.bincount(rows, df['CostBasis'].fillna(0).to_numpy(dtype=np.float64),
+                                      minlength=n)
+        # A portfolio with any holding of unknown cost has no meaningful gain
+        unknown = np.bincount(rows, df['Unknown'].to_numpy(dtype=np.float64), minlength=n)
+        self.cost_basis[unknown > 0] = np.nan
+        self.ltp = np.full(len(self.symbols), np.nan)
+        self.prev_close = np.full(len(self.symbols), np.nan)
+        self.market_value = np.zeros(n)
+        self.prev_value = np.zeros(n)
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'PortfolioBook':
+        """Load holdings from a CSV with Portfolio, Symbol, Quantity[, Cost] columns."""
+        return cls(pd.read_csv(path))
+
+    def __len__(self) -> int:
+        return len(self.portfolios)
+
+    @property
+    def nnz(self) -> int:
+        """Number of (portfolio, symbol) holdings."""
+        return len(self._qty)
+
+    def _prices(self, snapshot: pd.DataFrame):
+        """Column positions and (LTP, PrevClose) of the held symbols in a snapshot."""
+        snap = snapshot.drop_duplicates('Symbol')
+        cols = self.symbols.get_indexer(snap['Symbol'].astype(str))
+        held = cols >= 0
+        ltp = snap['LTP'].to_numpy(dtype=np.float64, na_value=np.nan)[held]
+        prev = (snap['PrevClose'].to_numpy(dtype=np.float64, na_value=np.nan)[held]
+                if 'PrevClose' in snap.columns else np.full(held.sum(), np.nan))
+        return cols[held], ltp, prev
+
+    def mark(self, snapshot: pd.DataFrame) -> pd.DataFrame:
+        """
+        Revalue every portfolio against a full snapshot.
+
+        Symbols missing from the snapshot keep their last known prices.
+
+        Returns:
+            pandas.DataFrame: Valuation per portfolio
+        """
+        cols, ltp, prev = self._prices(snapshot)
+        self.ltp[cols] = np.where(np.isnan(ltp), self.ltp[cols], ltp)
+        self.prev_close[cols] = np.where(np.isnan(prev), self.prev_close[cols], prev)
+
+        n = len(self.portfolios)
+        self.market_value = np.bincount(self._rows,
+                                        self._qty * np.nan_to_num(self.ltp[self._cols]),
+                                        minlength=n)
+        self.prev_value = np.bincount(self._rows,
+                                      self._qty * np.nan_to_num(self.prev_close[self._cols]),
+                                      minlength=n)
+        return self.valuation()
+
+    def apply(self, delta: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply a live-poll delta, touching only holdings of the changed symbols.
+
+        Args:
+            delta: Changed snapshot rows, e.g. from live.snapshot_delta
+
+        Returns:
+            pandas.DataFrame: Valuation of the portfolios that changed
+        """
+        cols, ltp, prev = self._prices(delta)
+        ltp = np.where(np.isnan(ltp), self.ltp[cols], ltp)
+        prev = np.where(np.isnan(prev), self.prev_close[cols], prev)
+        d_ltp = np.nan_to_num(ltp) - np.nan_to_num(self.ltp[cols])
+        d_prev = np.nan_to_num(prev) - np.nan_to_num(self.prev_close[cols])
+        moved = (d_ltp != 0) | (d_prev != 0)
+        cols, d_ltp, d_prev = cols[moved], d_ltp[moved], d_prev[moved]
+        self.ltp[cols] = ltp[moved]
+        self.prev_close[cols] = prev[moved]
+        if not len(cols):
+            return self.valuation(np.array([], dtype=np.intp))
+
+        starts, ends = self._indptr[cols], self._indptr[cols + 1]
+        counts = ends - starts
+        # Entry positions of every changed symbol, without a Python loop
+        offsets = np.repeat(ends - counts.cumsum(), counts)
+        entries = offsets + np.arange(counts.sum())
+        rows = self._rows[entries]
+        qty = self._qty[entries]
+        np.add.at(self.market_value, rows, qty * np.repeat(d_ltp, counts))
+        np.add.at(self.prev_value, rows, qty * np.repeat(d_prev, counts))
+        return self.valuation(np.unique(rows))
+
+    def valuation(self, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Current valuation for all portfolios, or the given row positions."""
+        if rows is None:
+            rows = np.arange(len(self.portfolios))
+        mv = self.market_value[rows]
+        pv = self.prev_value[rows]
+        cost = self.cost_basis[rows]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            day_pct = np.where(pv > 0, (mv - pv) / pv * 100, np.nan)
+            unreal_pct = np.where(cost > 0, (mv - cost) / cost * 100, np.nan)
+        return pd.DataFrame({
+            'MarketValue': mv,
+            'PrevValue': pv,
+            'DayPnL': mv - pv,
+            'DayPnLPercent': day_pct,
+            'CostBasis': cost,
+            'Unrealized': mv - cost,
+            'UnrealizedPercent': unreal_pct,
+        }, index=self.portfolios[rows])
+
+    def __repr__(self) -> str:
+        return (f"PortfolioBook(portfolios={len(self.portfolios)}, "
+                f"symbols={len(self.symbols)}, holdings={self.nnz})")
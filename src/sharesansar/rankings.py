@@ -0,0 +1,77 @@
+"""Per-session top-K rankings: gainers, losers, turnover and volume leaders.
+
+Rankings are computed with bounded heaps (``heapq.nlargest``/``nsmallest``,
+O(n log k)) when a session is written to a store and saved beside it, so
+a dashboard asking for the day's top movers reads a few dozen records
+instead of loading and sorting the whole table.
+"""
+
+import heapq
+import math
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+# name -> (field, largest first, sign filter)
+RANKINGS = {
+    'gainers': ('ChangePercent', True, 1),
+    'losers': ('ChangePercent', False, -1),
+    'turnover': ('Turnover', True, None),
+    'volume': ('Vol', True, None),
+}
+
+# Entries kept per ranking; deeper requests fall back to the full snapshot
+RANKING_DEPTH = 25
+
+RECORD_FIELDS = ('Symbol', 'LTP', 'ChangePercent', 'Vol', 'Turnover')
+
+
+def compute_rankings(df: pd.DataFrame, k: int = RANKING_DEPTH) -> dict:
+    """
+    Top-k records of a snapshot for every ranking.
+
+    Gainers only include rising symbols and losers only falling ones.
+
+    Args:
+        df: One session's rows
+        k: Entries per ranking
+
+    Returns:
+        dict: {'k': k, ranking name: [record, ...]}, best first
+    """
+    columns = {f: df[f].tolist() if f in df.columns else [None] * len(df)
+               for f in RECORD_FIELDS}
+    records = [dict(zip(RECORD_FIELDS, row)) for row in zip(*columns.values())]
+    for record in records:
+        for field, value in record.items():
+            if isinstance(value, float) and math.isnan(value):
+                record[field] = None
+
+    out = {'k': k}
+    for name, (field, largest, sign) in RANKINGS.items():
+        candidates = [(r[field], i) for i, r in enumerate(records)
+                      if r[field] is not None and (sign is None or r[field] * sign > 0)]
+        pick = heapq.nlargest if largest else heapq.nsmallest
+        # Ties keep snapshot order: negate the position for nlargest
+        key = (lambda c: (c[0], -c[1])) if largest else (lambda c: (c[0], c[1]))
+        out[name] = [records[i] for _, i in pick(k, candidates, key=key)]
+    return out
+
+
+def rankings_frame(rankings: dict, by: str, k: Optional[int] = None) -> Optional[pd.DataFrame]:
+    """
+    One ranking as a DataFrame, or None if k is deeper than what was stored.
+
+    Args:
+        rankings: Output of compute_rankings
+        by: Ranking name
+        k: Entries wanted (default: all stored)
+    """
+    if by not in RANKINGS:
+        raise ValueError(f"by must be one of {tuple(RANKINGS)}, got {by!r}")
+    if k is not None and k > rankings['k']:
+        return None
+    entries: List[Dict] = rankings.get(by, [])[:k]
+    df = pd.DataFrame(entries, columns=list(RECORD_FIELDS))
+    df.insert(0, 'Rank', range(1, len(df) + 1))
+    return df
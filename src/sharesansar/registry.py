@@ -0,0 +1,231 @@
+"""Symbol registry: company, sector, listing status and trading span per symbol.
+
+The registry is built from market snapshots (the default store's history
+when one is set, otherwise the latest session), the company-list page
+and the cached sector map, and persisted as JSON under the cache
+directory.  Once loaded, symbol lists, company names and symbol
+validation are dictionary lookups with no network round trip; the
+registry is rebuilt when older than ``REGISTRY_TTL``.  A failed rebuild
+keeps serving the stale registry, and is not retried for
+``REGISTRY_RETRY`` seconds.
+
+Status is ``active`` for symbols that traded within ``ACTIVE_DAYS`` of
+the latest session seen, ``inactive`` for older ones (suspended or
+delisted), and ``listed`` for listed companies never seen trading.
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import asdict
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from .models import SymbolInfo
+from .scraper import FetchError, ShareSansarScraper
+from .sectors import sector_map
+from .store import get_store
+from .trading_calendar import to_date
+from .utils import atomic_write_json, default_cache_dir
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_TTL = 24 * 3600
+# Seconds to wait after a failed build before trying again
+REGISTRY_RETRY = 300
+ACTIVE_DAYS = 30
+STATUSES = ('active', 'inactive', 'listed')
+
+
+class SymbolRegistry:
+    """
+    Metadata for every known symbol, keyed by symbol.
+
+    Args:
+        path: JSON file to load from and save to (None keeps it in memory)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.built: Optional[float] = None
+        self.failed: Optional[float] = None
+        # Bumped on every change so dependents (e.g. search.SymbolIndex) can resync
+        self.version = 0
+        self._symbols: Dict[str, SymbolInfo] = {}
+        if path and os.path.exists(path):
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def __iter__(self) -> Iterator[SymbolInfo]:
+        return iter(list(self._symbols.values()))
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol.upper() in self._symbols
+
+    def get(self, symbol: str) -> Optional[SymbolInfo]:
+        return self._symbols.get(symbol.upper())
+
+    def symbols(self, status: Optional[str] = 'active') -> List[str]:
+        """Sorted symbols with the given status (None for all)."""
+        if status is not None and status not in STATUSES:
+            raise ValueError(f"status must be one of {STATUSES} or None, got {status!r}")
+        return sorted(s for s, info in self._symbols.items()
+                      if status is None or info.status == status)
+
+    def frame(self) -> pd.DataFrame:
+        """All entries as a DataFrame indexed by symbol."""
+        columns = ['symbol', 'company', 'sector', 'status', 'first_seen', 'last_seen']
+        df = pd.DataFrame([asdict(i) for i in self._symbols.values()], columns=columns)
+        return df.set_index('symbol').sort_index()
+
+    def _entry(self, symbol: str) -> SymbolInfo:
+        info = self._symbols.get(symbol)
+        if info is None:
+            info = self._symbols[symbol] = SymbolInfo(symbol)
+        return info
+
+    def observe(self, snapshots: pd.DataFrame) -> None:
+        """
+        Record the trading span of every symbol in one or many sessions.
+
+        Args:
+            snapshots: Rows with Symbol and Date columns (a snapshot or a store scan)
+        """
+        if snapshots.empty:
+            return
+        dates = snapshots['Date'].astype(str).str[:10]
+        spans = dates.groupby(snapshots['Symbol'].astype(str).str.upper()).agg(['min', 'max'])
+        for symbol, first, last in spans.itertuples():
+            info = self._entry(symbol)
+            if info.first_seen is None or first < info.first_seen:
+                info.first_seen = first
+            if info.last_seen is None or last > info.last_seen:
+                info.last_seen = last
+        self._restatus()
+
+    def add_listing(self, listing: pd.DataFrame) -> None:
+        """Merge Company and Sector from the company list (Symbol, Company[, Sector])."""
+        for row in listing.to_dict('records'):
+            info = self._entry(str(row['Symbol']).upper())
+            for field in ('company', 'sector'):
+                value = row.get(field.capitalize())
+                if isinstance(value, str) and value.strip():
+                    setattr(info, field, value.strip())
+        self._restatus()
+
+    def add_sectors(self, mapping: Dict[str, str]) -> None:
+        """Fill sectors from a symbol -> sector map for symbols that have none."""
+        for symbol, sector in mapping.items():
+            info = self._symbols.get(symbol.upper())
+            if info is not None and not info.sector:
+                info.sector = sector
+        self.version += 1
+
+    def _restatus(self) -> None:
+        self.version += 1
+        seen = [i.last_seen for i in self._symbols.values() if i.last_seen]
+        if not seen:
+            return
+        cutoff = (to_date(max(seen)) - timedelta(days=ACTIVE_DAYS)).isoformat()
+        for info in self._symbols.values():
+            if info.last_seen is None:
+                info.status = 'listed'
+            else:
+                info.status = 'active' if info.last_seen >= cutoff else 'inactive'
+
+    def build(self, scraper: Optional[ShareSansarScraper] = None) -> 'SymbolRegistry':
+        """
+        Rebuild from the store (or the latest session), the company list and sector map.
+
+        The company list and sector map are best effort: failures are
+        logged and the registry keeps what it has.
+        """
+        scraper = scraper or ShareSansarScraper()
+        store = get_store()
+        if store is not None and store.dates():
+            self.observe(store.scan(columns=['Symbol']))
+        else:
+            self.observe(scraper.get_latest_data())
+
+        try:
+            self.add_listing(scraper.get_company_list())
+        except Exception as e:
+            logger.warning("Company list unavailable: %s", e)
+        try:
+            self.add_sectors(sector_map(scraper=scraper))
+        except Exception as e:
+            logger.warning("Sector map unavailable: %s", e)
+
+        self.built = time.time()
+        self.save()
+        logger.info("Symbol registry built: %d symbols, %d active",
+                    len(self._symbols), len(self.symbols()))
+        return self
+
+    def save(self) -> None:
+        """Write the registry to its path (no-op without one)."""
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        atomic_write_json(self.path, {'built': self.built,
+                                      'symbols': [asdict(i) for i in self._symbols.values()]})
+
+    def _load(self) -> None:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self._symbols = {e['symbol']: SymbolInfo(**e) for e in data['symbols']}
+            self.built = data.get('built')
+            self.version += 1
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring unreadable symbol registry %s: %s", self.path, e)
+
+    def __repr__(self) -> str:
+        return f"SymbolRegistry(symbols={len(self._symbols)}, path={self.path!r})"
+
+
+_registries: Dict[str, SymbolRegistry] = {}
+
+
+def registry_path() -> str:
+    return os.path.join(default_cache_dir(), 'symbols.json')
+
+
+def symbol_registry(refresh: bool = False, max_age: float = REGISTRY_TTL,
+                    path: Optional[str] = None) -> SymbolRegistry:
+    """
+    The persisted registry, rebuilt when missing, older than max_age or refresh is set.
+
+    If the rebuild fails, the stale registry is returned when there is
+    one; otherwise FetchError is raised.  Either way the rebuild is not
+    attempted again for REGISTRY_RETRY seconds unless refresh is set.
+
+    Args:
+        refresh: Rebuild even if the registry is fresh
+        max_age: Seconds before the registry is rebuilt
+        path: JSON file (default: registry_path())
+    """
+    path = path or registry_path()
+    registry = _registries.get(path)
+    if registry is None:
+        registry = _registries[path] = SymbolRegistry(path)
+    now = time.time()
+    if not (refresh or registry.built is None or now - registry.built > max_age):
+        return registry
+    if refresh or registry.failed is None or now - registry.failed > REGISTRY_RETRY:
+        try:
+            registry.build()
+            registry.failed = None
+            return registry
+        except Exception as e:
+            registry.failed = now
+            logger.warning("Symbol registry build failed: %s", e)
+    if not len(registry):
+        raise FetchError("Symbol registry unavailable: its build failed and is "
+                         f"retried at most every {REGISTRY_RETRY}s")
+    return registry
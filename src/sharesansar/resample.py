@@ -0,0 +1,266 @@
+"""Weekly, monthly and quarterly OHLCV bars from daily sessions.
+
+Bars follow the NEPSE calendar: a week runs Sunday to Thursday and is
+labelled with its Sunday; months and quarters are labelled with their
+first day.  Within a bar, Open is the first traded open, High/Low are
+the extremes, Close/LTP the last traded values, Vol, Turnover and
+Transactions are summed, and VWAP is recomputed as Turnover / Vol, so
+it is volume-weighted over the whole bar rather than averaged.
+
+Aggregation is one groupby over all symbols at once, for long frames and
+for Date x Symbol panels alike.  Bars whose period has ended and whose
+sessions all fetched cleanly are cached (next to the default store when
+one is set), so they are never recomputed.  A completed period in which
+the symbol never traded (a suspension, a holiday-only week) is cached as
+a ``Sessions == 0`` marker, so it is not refetched either.
+"""
+
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .scraper import ShareSansarScraper
+from .store import get_store, scan_if_covered
+
+logger = logging.getLogger(__name__)
+
+INTERVALS = ('1d', '1wk', '1mo', '3mo')
+
+AGGREGATIONS = {
+    'Open': 'first',
+    'High': 'max',
+    'Low': 'min',
+    'Close': 'last',
+    'LTP': 'last',
+    'Vol': 'sum',
+    'Turnover': 'sum',
+    'Transactions': 'sum',
+    'PrevClose': 'first',
+}
+
+BAR_COLUMNS = ('Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'LTP', 'VWAP', 'Vol',
+               'Turnover', 'Transactions', 'PrevClose', 'Sessions')
+
+
+def _check_interval(interval: str) -> None:
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {INTERVALS}, got {interval!r}")
+
+
+def bar_start(dates, interval: str) -> pd.DatetimeIndex:
+    """The start date of the bar each date falls in."""
+    _check_interval(interval)
+    d = pd.DatetimeIndex(pd.to_datetime(dates)).normalize()
+    if interval == '1d':
+        return d
+    if interval == '1wk':
+        # dayofweek: Monday=0 ... Sunday=6; NEPSE weeks start on Sunday
+        return d - pd.to_timedelta((d.dayofweek + 1) % 7, unit='D')
+    return d.to_period('M' if interval == '1mo' else 'Q').to_timestamp()
+
+
+def bar_end(start: pd.Timestamp, interval: str) -> pd.Timestamp:
+    """The last calendar day of the bar starting at start."""
+    if interval == '1d':
+        return start
+    if interval == '1wk':
+        return start + pd.Timedelta(days=6)
+    return start.to_period('M' if interval == '1mo' else 'Q').end_time.normalize()
+
+
+def _vwap(volume, turnover=None, vwap_volume=None):
+    """Turnover / Vol, or sum(VWAP * Vol) / Vol without turnover."""
+    numerator = turnover if turnover is not None else vwap_volume
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return numerator / volume.where(volume > 0)
+
+
+def resample(daily: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Aggregate long daily rows (Symbol, Date, fields) into bars for every symbol.
+
+    Args:
+        daily: Rows such as history() or SnapshotStore.scan() return
+        interval: '1d', '1wk', '1mo' or '3mo'
+
+    Returns:
+        pandas.DataFrame: One row per (Symbol, bar), Date is the bar start
+    """
+    _check_interval(interval)
+    if daily.empty:
+        return pd.DataFrame(columns=list(BAR_COLUMNS))
+    df = daily.sort_values('Date', kind='mergesort')
+    df = df.assign(_Bar=bar_start(df['Date'], interval))
+    if 'VWAP' in df.columns and 'Vol' in df.columns:
+        df['_VWAPVolume'] = df['VWAP'] * df['Vol']
+
+    aggs = {c: f for c, f in AGGREGATIONS.items() if c in df.columns}
+    if '_VWAPVolume' in df.columns:
+        aggs['_VWAPVolume'] = 'sum'
+    grouped = df.groupby(['Symbol', '_Bar'], sort=True)
+    bars = grouped.agg(aggs)
+    bars['Sessions'] = grouped.size()
+
+    if 'Vol' in bars.columns and ('Turnover' in bars.columns or '_VWAPVolume' in bars.columns):
+        bars['VWAP'] = _vwap(bars['Vol'], bars.get('Turnover'), bars.get('_VWAPVolume'))
+
+    bars = bars.reset_index().rename(columns={'_Bar': 'Date'})
+    bars['Date'] = bars['Date'].dt.strftime('%Y-%m-%d')
+    return bars[[c for c in BAR_COLUMNS if c in bars.columns]]
+
+
+def resample_panel(panel: Dict[str, pd.DataFrame], interval: str) -> Dict[str, pd.DataFrame]:
+    """
+    Aggregate Date x Symbol frames (as get_market_panel returns) into bars.
+
+    Fields without a known aggregation are dropped; VWAP is rebuilt from
+    Turnover and Vol (or VWAP x Vol) when those are present.
+
+    Returns:
+        dict: Field name -> bar-start x Symbol frame
+    """
+    _check_interval(interval)
+    out = {}
+    keys = None
+    for name, frame in panel.items():
+        keys = bar_start(frame.index, interval).rename('Date')
+        how = AGGREGATIONS.get(name)
+        if how is None:
+            continue
+        grouped = frame.groupby(keys)
+        out[name] = grouped.sum(min_count=1) if how == 'sum' else grouped.agg(how)
+
+    if 'Vol' in panel and keys is not None:
+        volume = panel['Vol'].groupby(keys).sum(min_count=1)
+        if 'Turnover' in panel:
+            out['VWAP'] = _vwap(volume, out['Turnover'])
+        elif 'VWAP' in panel:
+            weighted = (panel['VWAP'] * panel['Vol']).groupby(keys).sum(min_count=1)
+            out['VWAP'] = _vwap(volume, vwap_volume=weighted)
+    return out
+
+
+class BarCache:
+    """
+    Completed bars per interval, optionally persisted as CSV files.
+
+    Args:
+        root: Path prefix for the CSV files (None keeps bars in memory)
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root
+        self._bars: Dict[str, pd.DataFrame] = {}
+
+    def _path(self, interval: str) -> Optional[str]:
+        return f"{self.root}_{interval}.csv" if self.root else None
+
+    def bars(self, interval: str) -> pd.DataFrame:
+        if interval not in self._bars:
+            path = self._path(interval)
+            if path and os.path.exists(path):
+                self._bars[interval] = pd.read_csv(path, dtype={'Symbol': str, 'Date': str})
+            else:
+                self._bars[interval] = pd.DataFrame(columns=list(BAR_COLUMNS))
+        return self._bars[interval]
+
+    def get(self, interval: str, symbol: str) -> pd.DataFrame:
+        bars = self.bars(interval)
+        return bars[bars['Symbol'] == symbol]
+
+    def put(self, interval: str, bars: pd.DataFrame) -> None:
+        if bars.empty:
+            return
+        current = self.bars(interval)
+        merged = pd.concat([current, bars], ignore_index=True) if not current.empty else bars
+        merged = merged.drop_duplicates(['Symbol', 'Date'], keep='last')
+        self._bars[interval] = merged.sort_values(['Symbol', 'Date']).reset_index(drop=True)
+        path = self._path(interval)
+        if path:
+            tmp = path + '.tmp'
+            self._bars[interval].to_csv(tmp, index=False)
+            os.replace(tmp, path)
+
+
+_caches: Dict[Optional[str], BarCache] = {}
+
+
+def bar_cache() -> BarCache:
+    """The bar cache for the default store (in memory when no store is set)."""
+    store = get_store()
+    root = store.sidecar_path('_bars') if store is not None else None
+    if root not in _caches:
+        _caches[root] = BarCache(root)
+    return _caches[root]
+
+
+def _daily(symbol: str, start: str, end: str, scraper: ShareSansarScraper,
+           sector: Optional[str] = None) -> Tuple[pd.DataFrame, Set[str]]:
+    """Daily rows for the span and the dates that failed to fetch."""
+    stored = scan_if_covered([symbol], start, end)
+    if stored is not None:
+        return stored, set()
+    result = scraper.fetch_history(symbol, start, end, sector=sector)
+    return result.data, set(result.failed_dates)
+
+
+def history_bars(symbol: str, start: str, end: str, interval: str,
+                 scraper: Optional[ShareSansarScraper] = None,
+                 sector: Optional[str] = None) -> pd.DataFrame:
+    """
+    Bars for one symbol covering [start, end], widened to whole bars.
+
+    Completed bars come from the cache; only the rest are built from daily
+    sessions (fetched for ``sector`` only, when given), and those that are
+    complete are added to the cache.
+    """
+    _check_interval(interval)
+    symbol = symbol.upper()
+    first = bar_start([start], interval)[0]
+    last = bar_start([end], interval)[0]
+    today = pd.Timestamp(datetime.now().date())
+
+    cache = bar_cache()
+    cached = cache.get(interval, symbol)
+    cached = cached[(cached['Date'] >= first.strftime('%Y-%m-%d'))
+                    & (cached['Date'] <= last.strftime('%Y-%m-%d'))]
+    traded = cached[cached['Sessions'] != 0]
+
+    periods = pd.DatetimeIndex(sorted(set(bar_start(pd.date_range(first, bar_end(last, interval)),
+                                                    interval))))
+    have = set(cached['Date'])
+    missing = [p for p in periods if p.strftime('%Y-%m-%d') not in have]
+    if not missing:
+        return traded.reset_index(drop=True)
+
+    span_end = min(bar_end(missing[-1], interval), today)
+    if span_end < missing[0]:
+        return traded.reset_index(drop=True)
+    daily, failed = _daily(symbol, missing[0].strftime('%Y-%m-%d'),
+                           span_end.strftime('%Y-%m-%d'), scraper or ShareSansarScraper(), sector)
+    fresh = resample(daily, interval)
+    fresh = fresh[~fresh['Date'].isin(have)]
+
+    starts = pd.to_datetime(fresh['Date'])
+    ends = pd.DatetimeIndex([bar_end(s, interval) for s in starts])
+    failed_bars = set(bar_start(sorted(failed), interval)) if failed else set()
+    complete = (ends < today) & ~starts.isin(failed_bars).to_numpy()
+    cache.put(interval, fresh[complete])
+
+    # Completed periods with no rows at all: remember them as empty bars
+    built = set(fresh['Date'])
+    empty = [p.strftime('%Y-%m-%d') for p in missing
+             if p <= span_end and bar_end(p, interval) < today and p not in failed_bars
+             and p.strftime('%Y-%m-%d') not in built]
+    if empty:
+        cache.put(interval, pd.DataFrame({'Symbol': [symbol] * len(empty), 'Date': empty,
+                                          'Sessions': 0}))
+    logger.debug("Bars %s %s: %d cached, %d built, %d newly cached, %d empty",
+                 symbol, interval, len(cached), len(fresh), int(complete.sum()), len(empty))
+
+    out = pd.concat([traded, fresh], ignore_index=True) if not traded.empty else fresh
+    return out.sort_values('Date').reset_index(drop=True)
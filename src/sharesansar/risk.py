@@ -0,0 +1,230 @@
+"""Market-wide returns, covariance and correlation.
+
+Returns come from a Date x Symbol close panel and are NaN wherever a
+symbol did not trade on either of two consecutive sessions, so listings,
+delistings and suspensions never produce fake zero returns.
+
+Two estimators handle those gaps:
+
+``pairwise``
+    Each pair uses only the sessions where both symbols have a return,
+    like ``DataFrame.cov()``/``corr()``.  All pairwise sums come from a few
+    matrix products of the zero-filled returns with the presence mask,
+    computed block by block so memory stays bounded for wide universes.
+``shrinkage``
+    Ledoit-Wolf shrinkage of the sample covariance towards a scaled
+    identity, with missing returns treated as zero deviations from each
+    symbol's mean.  Always positive semi-definite, which optimizers need.
+
+``market_risk`` caches its reports by (date range, universe, options,
+store write generation), so repeated reports over the same window are
+served from memory until a session is written or deleted.  Reports
+missing sessions that failed to fetch, or whose range reaches today, are
+not cached.
+"""
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .panel import market_panel
+from .scraper import DEFAULT_RATE
+from .store import get_store
+from .trading_calendar import nepal_now, to_date
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('pairwise', 'shrinkage')
+KINDS = ('simple', 'log')
+
+CACHE_SIZE = 32
+
+
+@dataclass
+class RiskReport:
+    """Returns and dependence matrices for one date range and universe."""
+    returns: pd.DataFrame
+    covariance: pd.DataFrame
+    correlation: pd.DataFrame
+    kind: str
+    method: str
+    shrinkage: Optional[float] = None
+
+
+def returns(prices: pd.DataFrame, kind: str = 'simple') -> pd.DataFrame:
+    """
+    Session-to-session returns of a Date x Symbol price panel.
+
+    Args:
+        prices: Close (or LTP) panel; NaN where a symbol did not trade
+        kind: 'simple' (p1 / p0 - 1) or 'log' (ln(p1 / p0))
+
+    Returns:
+        pandas.DataFrame: Returns, NaN unless both sessions traded; the
+        first session is dropped
+    """
+    if kind not in KINDS:
+        raise ValueError(f"kind must be one of {KINDS}, got {kind!r}")
+    ratio = prices / prices.shift(1)
+    ratio = ratio.where(ratio > 0)
+    out = np.log(ratio) if kind == 'log' else ratio - 1
+    return out.iloc[1:]
+
+
+def _pairwise(values: np.ndarray, min_periods: int, block: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Pairwise-complete covariance and correlation, block by block."""
+    present = (~np.isnan(values)).astype(np.float64)
+    x = np.nan_to_num(values)
+    x2 = x * x
+    n_symbols = values.shape[1]
+    cov = np.empty((n_symbols, n_symbols))
+    corr = np.empty((n_symbols, n_symbols))
+
+    for a in range(0, n_symbols, block):
+        rows = slice(a, a + block)
+        for b in range(a, n_symbols, block):
+            cols = slice(b, b + block)
+            n = present[:, rows].T @ present[:, cols]
+            sum_i = x[:, rows].T @ present[:, cols]          # x_i over sessions where j traded
+            sum_j = present[:, rows].T @ x[:, cols]          # x_j over sessions where i traded
+            sum_ij = x[:, rows].T @ x[:, cols]
+            sq_i = x2[:, rows].T @ present[:, cols]
+            sq_j = present[:, rows].T @ x2[:, cols]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                c = (sum_ij - sum_i * sum_j / n) / (n - 1)
+                var_i = (sq_i - sum_i * sum_i / n) / (n - 1)
+                var_j = (sq_j - sum_j * sum_j / n) / (n - 1)
+                r = c / np.sqrt(var_i * var_j)
+            thin = n < max(min_periods, 2)
+            c[thin] = np.nan
+            r[thin] = np.nan
+            cov[rows, cols] = c
+            cov[cols, rows] = c.T
+            corr[rows, cols] = np.clip(r, -1.0, 1.0)
+            corr[cols, rows] = corr[rows, cols].T
+    return cov, corr
+
+
+def _ledoit_wolf(values: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Ledoit-Wolf (2004) shrinkage towards mu * I; missing values count as the mean."""
+    x = values - np.nanmean(values, axis=0)
+    x = np.nan_to_num(x)
+    t, n = x.shape
+    sample = x.T @ x / t
+    mu = np.trace(sample) / n
+    target = mu * np.eye(n)
+    delta = ((sample - target) ** 2).sum() / n
+    row_norms = (x * x).sum(axis=1)
+    beta_bar = ((row_norms ** 2).sum() / t - (sample ** 2).sum()) / (t * n)
+    beta = min(beta_bar, delta)
+    shrink = beta / delta if delta else 0.0
+    return shrink * target + (1 - shrink) * sample, float(shrink)
+
+
+def _to_correlation(cov: np.ndarray) -> np.ndarray:
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.clip(cov / np.outer(std, std), -1.0, 1.0)
+
+
+def covariance(rets: pd.DataFrame, method: str = 'pairwise', min_periods: int = 2,
+               block: int = 128) -> pd.DataFrame:
+    """
+    Covariance matrix of a Date x Symbol returns frame.
+
+    Args:
+        rets: Returns, NaN where missing
+        method: 'pairwise' (complete pairs) or 'shrinkage' (Ledoit-Wolf)
+        min_periods: Pairwise only: fewer common sessions give NaN
+        block: Symbols per block for the pairwise products
+
+    Returns:
+        pandas.DataFrame: Symbol x Symbol covariance
+    """
+    return _dependence(rets, method, min_periods, block)[0]
+
+
+def correlation(rets: pd.DataFrame, method: str = 'pairwise', min_periods: int = 2,
+                block: int = 128) -> pd.DataFrame:
+    """Correlation matrix of a Date x Symbol returns frame (see covariance)."""
+    return _dependence(rets, method, min_periods, block)[1]
+
+
+def _dependence(rets: pd.DataFrame, method: str, min_periods: int, block: int):
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+    values = rets.to_numpy(dtype=np.float64)
+    shrink = None
+    if method == 'pairwise':
+        cov, corr = _pairwise(values, min_periods, block)
+    else:
+        cov, shrink = _ledoit_wolf(values)
+        corr = _to_correlation(cov)
+    labels = rets.columns
+    return (pd.DataFrame(cov, index=labels, columns=labels),
+            pd.DataFrame(corr, index=labels, columns=labels), shrink)
+
+
+_cache: 'OrderedDict[tuple, RiskReport]' = OrderedDict()
+
+
+def clear_cache() -> None:
+    """Forget every cached market_risk report."""
+    _cache.clear()
+
+
+def market_risk(start: str, end: str, symbols: Optional[Iterable[str]] = None,
+                kind: str = 'log', method: str = 'pairwise', min_periods: int = 20,
+                refresh: bool = False, workers: int = 1,
+                rate: Optional[float] = DEFAULT_RATE) -> RiskReport:
+    """
+    Returns, covariance and correlation for the market over a date range.
+
+    Args:
+        start: First date (YYYY-MM-DD)
+        end: Last date (YYYY-MM-DD)
+        symbols: Universe (default: every symbol that traded)
+        kind: 'log' or 'simple' returns
+        method: 'pairwise' or 'shrinkage'
+        min_periods: Pairwise only: minimum common sessions per pair
+        refresh: Recompute even if the report is cached
+        workers: Concurrent requests for sessions not in the store
+        rate: Maximum requests per second (None for no limit)
+
+    Returns:
+        RiskReport: Cached by (start, end, universe, kind, method, min_periods)
+        and the default store's write generation; not cached when any
+        session failed to fetch or the range reaches today
+    """
+    universe = tuple(sorted({s.upper() for s in symbols})) if symbols is not None else None
+    store = get_store()
+    stored = (store.root, store.generation) if store is not None else None
+    key = (start, end, universe, kind, method, min_periods, stored)
+    if not refresh and key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    failed = {}
+    close = market_panel(start, end, ['Close'], symbols=universe, workers=workers,
+                         rate=rate, failed=failed)['Close']
+    rets = returns(close, kind)
+    cov, corr, shrink = _dependence(rets, method, min_periods, 128)
+    report = RiskReport(returns=rets, covariance=cov, correlation=corr, kind=kind,
+                        method=method, shrinkage=shrink)
+    if failed:
+        logger.warning("Risk report for %s..%s is missing %d failed sessions; not caching it",
+                       start, end, len(failed))
+        return report
+    if to_date(end) >= nepal_now().date():
+        # Today's session is still changing
+        return report
+
+    _cache[key] = report
+    _cache.move_to_end(key)
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return report
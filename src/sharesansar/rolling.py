@@ -0,0 +1,277 @@
+"""Rolling per-symbol statistics: 52-week range, 120/180-day averages, volatility.
+
+The snapshot only carries ShareSansar's own ``Weeks52High``/``Days120``
+figures for the day it was taken.  ``RollingStats`` recomputes such
+figures for any date and any window from stored history.
+
+Each window is kept per symbol as incremental state: a monotonic deque
+for highs and lows, a running sum and sum of squares for averages and
+volatility.  ``update()`` with one session therefore costs O(1) amortized
+per symbol and window.  ``fit()`` computes the full series for every
+symbol in one vectorized pass over a Date x Symbol panel and primes the
+state from its tail, so updates continue exactly where it stopped.
+"""
+
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .panel import market_panel
+from .scraper import DEFAULT_RATE
+from .trading_calendar import to_date
+
+
+@dataclass(frozen=True)
+class Window:
+    """
+    One rolling statistic.
+
+    Args:
+        name: Output column name
+        stat: 'max', 'min', 'mean', 'sum' or 'std'
+        field: Snapshot column, or 'Return' for close-to-close returns
+        length: Window length
+        by: 'sessions' (trading sessions) or 'days' (calendar days)
+    """
+    name: str
+    stat: str
+    field: str
+    length: int
+    by: str = 'sessions'
+
+
+DEFAULT_WINDOWS = (
+    Window('high_52w', 'max', 'High', 365, by='days'),
+    Window('low_52w', 'min', 'Low', 365, by='days'),
+    Window('avg_120d', 'mean', 'Close', 120, by='days'),
+    Window('avg_180d', 'mean', 'Close', 180, by='days'),
+    Window('volatility_20', 'std', 'Return', 20),
+    Window('avg_volume_20', 'mean', 'Vol', 20),
+)
+
+STATS = ('max', 'min', 'mean', 'sum', 'std')
+
+
+class _Extreme:
+    """Monotonic deque: the window max (sign=1) or min (sign=-1) in O(1) amortized."""
+
+    __slots__ = ('items', 'sign')
+
+    def __init__(self, sign: int):
+        self.items = deque()
+        self.sign = sign
+
+    def push(self, t: int, value: float) -> None:
+        key = self.sign * value
+        while self.items and self.sign * self.items[-1][1] <= key:
+            self.items.pop()
+        self.items.append((t, value))
+
+    def evict(self, cutoff: int) -> None:
+        while self.items and self.items[0][0] <= cutoff:
+            self.items.popleft()
+
+    def value(self, stat: str) -> float:
+        return self.items[0][1] if self.items else math.nan
+
+
+class _Sum:
+    """Running sum and sum of squares over a window."""
+
+    __slots__ = ('items', 'total', 'total_sq')
+
+    def __init__(self):
+        self.items = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def push(self, t: int, value: float) -> None:
+        self.items.append((t, value))
+        self.total += value
+        self.total_sq += value * value
+
+    def evict(self, cutoff: int) -> None:
+        while self.items and self.items[0][0] <= cutoff:
+            _, value = self.items.popleft()
+            self.total -= value
+            self.total_sq -= value * value
+        if not self.items:
+            # Reset so rounding error does not accumulate across empty windows
+            self.total = self.total_sq = 0.0
+
+    def value(self, stat: str) -> float:
+        n = len(self.items)
+        if stat == 'sum':
+            return self.total if n else math.nan
+        if stat == 'mean':
+            return self.total / n if n else math.nan
+        if n < 2:
+            return math.nan
+        return math.sqrt(max(0.0, (self.total_sq - self.total * self.total / n) / (n - 1)))
+
+
+class RollingStats:
+    """
+    Incremental rolling statistics for every symbol.
+
+    Args:
+        windows: Statistics to maintain (default: DEFAULT_WINDOWS)
+    """
+
+    def __init__(self, windows: Sequence[Window] = DEFAULT_WINDOWS):
+        for w in windows:
+            if w.stat not in STATS:
+                raise ValueError(f"Unknown stat {w.stat!r} for window {w.name!r}")
+            if w.by not in ('sessions', 'days'):
+                raise ValueError(f"Window {w.name!r}: by must be 'sessions' or 'days'")
+        self.windows = list(windows)
+        self._reset()
+
+    def _reset(self) -> None:
+        self.last_date: Optional[str] = None
+        self._session = 0
+        self._state: Dict[str, list] = {}
+        self._prev_close: Dict[str, float] = {}
+
+    @property
+    def fields(self) -> List[str]:
+        """Snapshot columns the windows read."""
+        fields = {'Close' if w.field == 'Return' else w.field for w in self.windows}
+        return sorted(fields)
+
+    @property
+    def symbols(self) -> List[str]:
+        return list(self._state)
+
+    def _new_state(self) -> list:
+        return [_Extreme(1 if w.stat == 'max' else -1) if w.stat in ('max', 'min') else _Sum()
+                for w in self.windows]
+
+    def update(self, date: str, snapshot: pd.DataFrame) -> pd.DataFrame:
+        """
+        Advance every window by one session.
+
+        Args:
+            date: Session date (YYYY-MM-DD), later than the previous update
+            snapshot: One session's rows (Symbol plus the needed fields)
+
+        Returns:
+            pandas.DataFrame: Current statistics, one row per tracked symbol
+        """
+        if self.last_date is not None and date <= self.last_date:
+            raise ValueError(f"Sessions must be added in date order ({date} <= {self.last_date})")
+        columns = snapshot.reindex(columns=self.fields)
+        rows = dict(zip(snapshot['Symbol'].astype(str),
+                        columns.to_numpy(dtype=np.float64, na_value=np.nan)))
+        self._advance(date, rows)
+        return self.current()
+
+    def _advance(self, date: str, rows: Dict[str, np.ndarray]) -> None:
+        self._session += 1
+        day = to_date(date).toordinal()
+        field_pos = {f: i for i, f in enumerate(self.fields)}
+        close_pos = field_pos.get('Close')
+
+        for symbol in rows:
+            if symbol not in self._state:
+                self._state[symbol] = self._new_state()
+
+        for symbol, state in self._state.items():
+            values = rows.get(symbol)
+            ret = math.nan
+            if values is not None and close_pos is not None:
+                close = values[close_pos]
+                prev = self._prev_close.get(symbol, math.nan)
+                if not math.isnan(close):
+                    ret = close / prev - 1 if prev and not math.isnan(prev) else math.nan
+                    self._prev_close[symbol] = close
+
+            for w, window in zip(self.windows, state):
+                now = day if w.by == 'days' else self._session
+                window.evict(now - w.length)
+                if values is None:
+                    continue
+                value = ret if w.field == 'Return' else values[field_pos[w.field]]
+                if not math.isnan(value):
+                    window.push(now, value)
+
+        self.last_date = date
+
+    def current(self) -> pd.DataFrame:
+        """Latest statistics for every tracked symbol."""
+        data = {w.name: [state[i].value(w.stat) for state in self._state.values()]
+                for i, w in enumerate(self.windows)}
+        return pd.DataFrame(data, index=pd.Index(list(self._state), name='Symbol'))
+
+    def fit(self, panel: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """
+        Compute every window over a full history and prime the incremental state.
+
+        Args:
+            panel: Field name -> Date x Symbol frame, as get_market_panel() returns
+
+        Returns:
+            dict: Window name -> Date x Symbol frame of the statistic
+        """
+        frames = {f: panel[f].sort_index() for f in self.fields}
+        if 'Close' in frames:
+            close = frames['Close']
+            frames['Return'] = close / close.ffill().shift(1) - 1
+
+        out = {}
+        for w in self.windows:
+            frame = frames[w.field]
+            rolling = (frame.rolling(f'{w.length}D', min_periods=1) if w.by == 'days'
+                       else frame.rolling(w.length, min_periods=1))
+            out[w.name] = getattr(rolling, w.stat)()
+
+        self._prime(frames)
+        return out
+
+    def _prime(self, frames: Dict[str, pd.DataFrame]) -> None:
+        """Replay just the tail of the history that is still inside some window."""
+        first = next(iter(frames.values()))
+        index = first.index
+        self._reset()
+        if not len(index):
+            return
+
+        start = len(index)
+        last_day = index[-1].toordinal()
+        for w in self.windows:
+            if w.by == 'sessions':
+                start = min(start, max(0, len(index) - w.length))
+            else:
+                start = min(start, int(np.searchsorted(
+                    [d.toordinal() for d in index], last_day - w.length, side='right')))
+
+        if 'Close' in frames and start > 0:
+            seed = frames['Close'].iloc[:start].ffill().iloc[-1]
+            self._prev_close = {s: v for s, v in seed.items() if not math.isnan(v)}
+        self._session = start
+
+        symbols = first.columns
+        stacked = np.stack([frames[f].reindex(columns=symbols).to_numpy(dtype=np.float64)
+                            for f in self.fields], axis=-1)
+        for i in range(start, len(index)):
+            day = stacked[i]
+            traded = ~np.isnan(day).all(axis=1)
+            rows = {s: day[j] for j, s in enumerate(symbols) if traded[j]}
+            self._advance(index[i].strftime('%Y-%m-%d'), rows)
+        # Symbols that only traded before the replayed tail still get tracked
+        for symbol in symbols:
+            if symbol not in self._state:
+                self._state[symbol] = self._new_state()
+
+    def backfill(self, start: str, end: str, workers: int = 1,
+                 rate: Optional[float] = DEFAULT_RATE) -> Dict[str, pd.DataFrame]:
+        """fit() over every session in [start, end], read from the store or fetched once each."""
+        return self.fit(market_panel(start, end, self.fields, workers=workers, rate=rate))
+
+    def __repr__(self) -> str:
+        return (f"RollingStats(windows={[w.name for w in self.windows]}, "
+                f"symbols={len(self._state)}, last_date={self.last_date!r})")
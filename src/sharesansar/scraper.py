@@ -1,11 +1,62 @@
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 from datetime import datetime, timedelta
 import io
 from typing import Optional, Dict, Any, List
 import time
 import re
+import json
+import logging
+import os
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .instrumentation import span
+from . import metrics
+from .models import HistoryResult
+from .utils import RateLimiter
+
+# Requests per second used for multi-date fetches unless overridden
+DEFAULT_RATE = 5.0
+
+# Laravel answers 419 when the CSRF token no longer matches the session
+TOKEN_EXPIRED_STATUS = 419
+TOKEN_TTL_SECONDS = 300
+
+# Form value of the today-share-price sector filter that selects every sector
+ALL_SECTORS = 'all_sec'
+
+# Snapshot columns parsed as numbers
+NUMERIC_COLUMNS = ('Open', 'High', 'Low', 'Close', 'LTP', 'Vol', 'Turnover',
+                   'Confidence', 'VWAP', 'ChangePercent', 'RangePercent', 'Diff', 'Range',
+                   'Days120', 'Days180', 'Weeks52High', 'Weeks52Low', 'PrevClose', 'Transactions')
+
+logger = logging.getLogger(__name__)
+
+
+class NoTradingDataError(Exception):
+    """Raised when ShareSansar has no records for a date (holiday or weekend)."""
+
+
+class FetchError(Exception):
+    """Base class for failures fetching or reading a ShareSansar page."""
+
+
+class NetworkError(FetchError):
+    """The request failed without a response (connection error, timeout); worth retrying."""
+
+
+class HTTPStatusError(FetchError):
+    """ShareSansar answered with an unexpected HTTP status."""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ParseError(FetchError):
+    """A response arrived but the token or table could not be read from it."""
 
 
 class ShareSansarScraper:
@@ -16,6 +67,10 @@ class ShareSansarScraper:
         self._setup_session()
         self._token = None
         self._token_timestamp = None
+        self._token_lock = threading.Lock()
+        self._sectors: Optional[Dict[str, str]] = None
+        self._stats_lock = threading.Lock()
+        self.bytes_received = 0
 
     def _setup_session(self):
         """Setup session with headers."""
@@ -26,20 +81,89 @@ class ShareSansarScraper:
             'Referer': 'https://www.sharesansar.com/',
         })
 
+    def _request(self, method: str, url: str, endpoint: str, **kwargs) -> requests.Response:
+        """Send a request through the session, recording upstream metrics."""
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            metrics.UPSTREAM_REQUESTS.labels(endpoint, 'error').inc()
+            raise
+        finally:
+            metrics.UPSTREAM_LATENCY.labels(endpoint).observe(time.perf_counter() - start)
+
+        metrics.UPSTREAM_REQUESTS.labels(endpoint, response.status_code).inc()
+        metrics.UPSTREAM_RESPONSE_BYTES.labels(endpoint).inc(len(response.content))
+        with self._stats_lock:
+            self.bytes_received += len(response.content)
+        return response
+
     def _get_csrf_token(self, force_refresh: bool = False) -> str:
         """Get CSRF token with caching."""
-        if (self._token and not force_refresh and
-                self._token_timestamp and
-                (datetime.now() - self._token_timestamp).seconds < 300):  # 5 min cache
-            return self._token
-
+        with span('token') as stage:
+            if not force_refresh and self._token_is_fresh():
+                stage.cache_hit = True
+                return self._token
+
+            with self._token_lock:
+                # Another worker may have refreshed while we waited
+                if not force_refresh and self._token_is_fresh():
+                    stage.cache_hit = True
+                    return self._token
+
+                stage.cache_hit = False
+                return self._fetch_csrf_token(stage)
+
+    def _token_is_fresh(self) -> bool:
+        return bool(self._token and self._token_timestamp and
+                    (datetime.now() - self._token_timestamp).total_seconds() < TOKEN_TTL_SECONDS)
+
+    def save_session(self, path: str) -> None:
+        """Persist the CSRF token and cookies so a new process can reuse them."""
+        if not self._token_is_fresh():
+            return
+        state = {
+            'token': self._token,
+            'token_timestamp': self._token_timestamp.isoformat(),
+            'cookies': requests.utils.dict_from_cookiejar(self.session.cookies),
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def load_session(self, path: str) -> bool:
+        """Load a token and cookies saved by save_session if still fresh."""
+        try:
+            with open(path) as f:
+                state = json.load(f)
+            timestamp = datetime.fromisoformat(state['token_timestamp'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        if (datetime.now() - timestamp).total_seconds() >= TOKEN_TTL_SECONDS:
+            return False
+
+        self.session.cookies.update(state.get('cookies', {}))
+        self._token = state['token']
+        self._token_timestamp = timestamp
+        return True
+
+    def _fetch_csrf_token(self, stage: span) -> str:
+        """Fetch a fresh CSRF token from the main page."""
         main_url = 'https://www.sharesansar.com/today-share-price'
         try:
-            response = self.session.get(main_url, timeout=30)
+            metrics.TOKEN_REFRESHES.inc()
+            response = self._request('GET', main_url, 'today-share-price', timeout=30)
+            stage.bytes = len(response.content)
 
             if response.status_code != 200:
-                raise Exception(f"Error fetching main page: {response.status_code}")
+                raise HTTPStatusError(f"Error fetching main page: {response.status_code}",
+                                      response.status_code)
 
+            # Deferred: only needed when the token cache misses
+            from bs4 import BeautifulSoup
             soup = BeautifulSoup(response.text, 'html.parser')
 
             # Try to find the _token in various ways
@@ -64,21 +188,49 @@ class ShareSansarScraper:
                             break
 
             if not token:
-                raise Exception("CSRF token not found")
+                raise ParseError("CSRF token not found")
+
+            # The same page lists the sector filter options; an empty map
+            # records that the page was checked so lookups don't refetch it
+            select = soup.find('select', {'name': 'sector'})
+            options = select.find_all('option') if select is not None else []
+            self._sectors = {option.get_text(strip=True): option.get('value')
+                             for option in options
+                             if option.get('value') and option.get('value') != ALL_SECTORS}
 
             self._token = token
             self._token_timestamp = datetime.now()
             return token
 
         except requests.RequestException as e:
-            raise Exception(f"Network error while fetching token: {e}")
-
-    def get_today_data(self, date: Optional[str] = None) -> pd.DataFrame:
+            raise NetworkError(f"Network error while fetching token: {e}") from e
+
+    def get_sectors(self) -> Dict[str, str]:
+        """Sector names offered by the today-share-price filter, mapped to their form values."""
+        if self._sectors is None:
+            self._get_csrf_token(force_refresh=True)
+        return dict(self._sectors or {})
+
+    def _sector_value(self, sector: Optional[str]) -> str:
+        """Form value for a sector given by name (case-insensitive) or form value."""
+        if sector is None or sector == ALL_SECTORS:
+            return ALL_SECTORS
+        sectors = self.get_sectors()
+        if not sectors or sector in sectors.values():
+            return sector
+        by_name = {name.lower(): value for name, value in sectors.items()}
+        if sector.lower() in by_name:
+            return by_name[sector.lower()]
+        raise ValueError(f"Unknown sector {sector!r}; expected one of {sorted(sectors)}")
+
+    def get_today_data(self, date: Optional[str] = None,
+                       sector: Optional[str] = None) -> pd.DataFrame:
         """
         Get stock data for a specific date.
 
         Args:
             date: Date in YYYY-MM-DD format. If None, uses yesterday.
+            sector: Only this sector, by name or form value (default: all sectors)
 
         Returns:
             pandas.DataFrame: Stock data for the specified date
@@ -92,6 +244,11 @@ class ShareSansarScraper:
         except ValueError:
             raise ValueError("Date must be in YYYY-MM-DD format")
 
+        return self._fetch_today_data(date, sector=self._sector_value(sector))
+
+    def _fetch_today_data(self, date: str, retry_on_expired_token: bool = True,
+                          sector: str = ALL_SECTORS) -> pd.DataFrame:
+        """POST the AJAX request for a validated date and parse the table."""
         token = self._get_csrf_token()
 
         ajax_url = 'https://www.sharesansar.com/ajaxtodayshareprice'
@@ -106,48 +263,123 @@ class ShareSansarScraper:
 
         data = {
             '_token': token,
-            'sector': 'all_sec',
+            'sector': sector,
             'date': date
         }
 
         try:
-            response = self.session.post(ajax_url, headers=headers, data=data, timeout=30)
+            with span('http', endpoint='ajaxtodayshareprice', date=date) as stage:
+                response = self._request('POST', ajax_url, 'ajaxtodayshareprice',
+                                         headers=headers, data=data, timeout=30)
+                stage.bytes = len(response.content)
+                stage.meta['status'] = response.status_code
+
+            if response.status_code == TOKEN_EXPIRED_STATUS and retry_on_expired_token:
+                logger.debug("CSRF token expired, refreshing")
+                self._token = None
+                return self._fetch_today_data(date, retry_on_expired_token=False, sector=sector)
 
             if response.status_code != 200:
-                raise Exception(f"Error in AJAX request: {response.status_code} - {response.text}")
+                raise HTTPStatusError(
+                    f"Error in AJAX request: {response.status_code} - {response.text}",
+                    response.status_code)
 
             # Parse the response
             return self._parse_response(response.text, date)
 
         except requests.RequestException as e:
-            raise Exception(f"Network error while fetching data: {e}")
+            raise NetworkError(f"Network error while fetching data: {e}") from e
 
     def _parse_response(self, html_content: str, date: str) -> pd.DataFrame:
         """Parse HTML response into DataFrame."""
         try:
-            tables = pd.read_html(io.StringIO(html_content))
-            if not tables:
-                raise Exception("No tables found in response")
+            with span('parse', date=date) as stage:
+                stage.bytes = len(html_content)
+                tables = pd.read_html(io.StringIO(html_content))
+                if not tables:
+                    raise ParseError("No tables found in response")
 
-            df = tables[0]
+                df = tables[0]
+                stage.rows = len(df)
 
             if df.empty:
-                raise Exception(f"No data available for {date}")
+                raise NoTradingDataError(f"No data available for {date}")
 
             # Check for "No Record Found"
             if len(df) > 0 and ('No Record Found' in str(df.iloc[0, 0]) or 'No data available' in str(df.iloc[0, 0])):
-                raise Exception(f"No trading data available for {date}")
+                raise NoTradingDataError(f"No trading data available for {date}")
 
             # Clean and process the data
-            df = self._clean_dataframe(df)
-            df['Date'] = date
+            with span('clean', date=date) as stage:
+                df = self._clean_dataframe(df)
+                df['Date'] = date
+                stage.rows = len(df)
 
             return df
 
+        except NoTradingDataError:
+            raise
         except Exception as e:
-            raise Exception(f"Error parsing table: {e}")
+            metrics.PARSE_FAILURES.inc()
+            raise ParseError(f"Error parsing table: {e}") from e
+
+    def get_latest_data(self, max_days: int = 10) -> pd.DataFrame:
+        """
+        The most recent session's table, searching back from yesterday.
 
-    def get_historical_data(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        Args:
+            max_days: Calendar days to search before giving up
+
+        Returns:
+            pandas.DataFrame: Stock data, with the session in its Date column
+        """
+        today = datetime.now().date()
+        for days in range(1, max_days + 1):
+            date = (today - timedelta(days=days)).strftime('%Y-%m-%d')
+            try:
+                return self.get_today_data(date)
+            except NoTradingDataError:
+                logger.debug("No trading data for %s", date)
+        raise NoTradingDataError(f"No trading data in the last {max_days} days")
+
+    def get_company_list(self) -> pd.DataFrame:
+        """
+        Listed companies from the company-list page.
+
+        Returns:
+            pandas.DataFrame: Symbol, Company and (when listed) Sector
+            columns; empty if the page has no recognisable table
+        """
+        url = 'https://www.sharesansar.com/company-list'
+        try:
+            with span('http', endpoint='company-list') as stage:
+                response = self._request('GET', url, 'company-list', timeout=30)
+                stage.bytes = len(response.content)
+        except requests.RequestException as e:
+            raise NetworkError(f"Network error while fetching company list: {e}") from e
+        if response.status_code != 200:
+            raise HTTPStatusError(f"Error fetching company list: {response.status_code}",
+                                  response.status_code)
+
+        try:
+            tables = pd.read_html(io.StringIO(response.text))
+        except ValueError:
+            tables = []
+        for table in tables:
+            table.columns = [str(c).strip() for c in table.columns]
+            if 'Symbol' not in table.columns:
+                continue
+            table = table.rename(columns={'Company Name': 'Company', 'Name': 'Company',
+                                          'Sector Name': 'Sector'})
+            columns = [c for c in ('Symbol', 'Company', 'Sector') if c in table.columns]
+            table = table[columns].dropna(subset=['Symbol'])
+            table['Symbol'] = table['Symbol'].astype(str).str.strip().str.upper()
+            return table.reset_index(drop=True)
+        logger.warning("No company table found on %s", url)
+        return pd.DataFrame(columns=['Symbol', 'Company'])
+
+    def get_historical_data(self, symbol: str, start_date: str, end_date: str,
+                            sector: Optional[str] = None) -> pd.DataFrame:
         """
         Get historical data for a specific symbol.
 
@@ -155,11 +387,120 @@ class ShareSansarScraper:
             symbol: Stock symbol
             start_date: Start date in YYYY-MM-DD format
             end_date: End date in YYYY-MM-DD format
+            sector: The symbol's sector, to fetch only that sector's table
 
         Returns:
             pandas.DataFrame: Historical data for the symbol
         """
-        # Validate dates
+        return self.fetch_history(symbol, start_date, end_date, sector=sector).data
+
+    def iter_market_data(self, dates: List[str], workers: int = 1,
+                         rate: Optional[float] = DEFAULT_RATE, sector: Optional[str] = None):
+        """
+        Fetch full-market snapshots for many dates, yielding as they arrive.
+
+        Args:
+            dates: Dates in YYYY-MM-DD format
+            workers: Number of concurrent requests
+            rate: Maximum requests per second across all workers (None for no limit)
+            sector: Only this sector's rows (default: the whole market)
+
+        Yields:
+            tuple: (date, DataFrame or None, exception or None), in input order
+        """
+        limiter = RateLimiter(rate) if rate else None
+
+        def fetch(date):
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                return date, self.get_today_data(date, sector=sector), None
+            except Exception as e:
+                return date, None, e
+
+        if workers <= 1:
+            for date in dates:
+                yield fetch(date)
+            return
+
+        # Keep a bounded window in flight so results stream in order and an
+        # abandoned generator does not leave thousands of queued requests
+        pool = ThreadPoolExecutor(max_workers=workers)
+        pending = deque()
+        try:
+            for date in dates:
+                # Run in a copy of this context so an active profile() sees the spans
+                pending.append(pool.submit(contextvars.copy_context().run, fetch, date))
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+
+    def fetch_history(self, symbol: str, start_date: Optional[str] = None,
+                      end_date: Optional[str] = None,
+                      dates: Optional[List[str]] = None, workers: int = 1,
+                      rate: Optional[float] = DEFAULT_RATE,
+                      sector: Optional[str] = None) -> HistoryResult:
+        """
+        Fetch historical data for a symbol and report per-date outcomes.
+
+        Args:
+            symbol: Stock symbol
+            start_date: Start date in YYYY-MM-DD format
+            end_date: End date in YYYY-MM-DD format
+            dates: Explicit dates to fetch instead of a range, e.g.
+                ``previous_result.failed_dates`` to retry only the failures
+            workers: Number of concurrent requests
+            rate: Maximum requests per second (None for no limit)
+            sector: The symbol's sector, to fetch only that sector's table
+
+        Returns:
+            HistoryResult: Data plus fetched, skipped and failed dates
+        """
+        if dates is None:
+            if start_date is None or end_date is None:
+                raise ValueError("Either start_date and end_date or dates must be given")
+            dates = self._date_range(start_date, end_date)
+        else:
+            dates = sorted(dates)
+
+        result = HistoryResult(symbol=symbol)
+        all_data = []
+
+        for date_str, daily_data, error in self.iter_market_data(dates, workers, rate, sector):
+            if isinstance(error, NoTradingDataError):
+                logger.debug("No trading data for %s", date_str)
+                result.skipped_dates.append(date_str)
+
+            elif error is not None:
+                logger.warning("Failed to fetch %s for %s: %s", date_str, symbol, error)
+                result.failed_dates[date_str] = type(error).__name__
+
+            else:
+                symbol_data = daily_data[daily_data['Symbol'] == symbol]
+                if not symbol_data.empty:
+                    all_data.append(symbol_data.copy())
+                result.fetched_dates.append(date_str)
+
+        if all_data:
+            with span('concat', symbol=symbol) as stage:
+                result_df = pd.concat(all_data, ignore_index=True)
+                result_df = result_df.sort_values('Date').reset_index(drop=True)
+                stage.rows = len(result_df)
+            result.data = result_df
+
+        logger.info("History for %s: %d fetched, %d skipped, %d failed",
+                    symbol, len(result.fetched_dates), len(result.skipped_dates),
+                    len(result.failed_dates))
+        return result
+
+    @staticmethod
+    def _date_range(start_date: str, end_date: str) -> List[str]:
+        """Validate a date range and expand it to YYYY-MM-DD strings."""
         try:
             start_dt = datetime.strptime(start_date, '%Y-%m-%d')
             end_dt = datetime.strptime(end_date, '%Y-%m-%d')
@@ -173,33 +514,8 @@ class ShareSansarScraper:
         except ValueError as e:
             raise ValueError(f"Invalid date format: {e}")
 
-        all_data = []
-        current_date = start_dt
-
-        while current_date <= end_dt:
-            try:
-                date_str = current_date.strftime('%Y-%m-%d')
-                daily_data = self.get_today_data(date_str)
-
-                if symbol in daily_data['Symbol'].values:
-                    symbol_data = daily_data[daily_data['Symbol'] == symbol].copy()
-                    all_data.append(symbol_data)
-
-                current_date += timedelta(days=1)
-                time.sleep(0.2)  # Be nice to the server
-
-            except Exception as e:
-                # Skip dates with no data
-                print(f"No data for {current_date.strftime('%Y-%m-%d')}: {e}")
-                current_date += timedelta(days=1)
-                continue
-
-        if all_data:
-            result_df = pd.concat(all_data, ignore_index=True)
-            result_df = result_df.sort_values('Date').reset_index(drop=True)
-            return result_df
-        else:
-            return pd.DataFrame()
+        days = (end_dt - start_dt).days
+        return [(start_dt + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days + 1)]
 
     def _clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """Clean and process the dataframe."""
@@ -224,12 +540,8 @@ class ShareSansarScraper:
         df = df.rename(columns=column_mapping)
 
         # Convert numeric columns
-        numeric_columns = ['Open', 'High', 'Low', 'Close', 'LTP', 'Volume', 'Turnover',
-                           'Confidence', 'VWAP', 'ChangePercent', 'RangePercent', 'Diff', 'Range',
-                           'Days120', 'Days180', 'Weeks52High', 'Weeks52Low', 'PrevClose', 'Transactions']
-
         for col in df.columns:
-            if any(num_key in col for num_key in numeric_columns):
+            if any(num_key in col for num_key in NUMERIC_COLUMNS):
                 # Clean the data
                 df[col] = (df[col].astype(str)
                            .str.replace(',', '')
@@ -0,0 +1,250 @@
+"""Declarative market screens compiled to vectorized NumPy masks.
+
+A screen is a boolean expression over snapshot columns and rolling-stat
+names, e.g.::
+
+    ChangePercent > 5 and Vol > 2 * avg_volume_20
+
+The expression is parsed and checked once, rewritten so that ``and``,
+``or``, ``not`` and chained comparisons become element-wise ``&``, ``|``,
+``~``, and compiled to a code object.  Evaluating it is then a handful of
+NumPy operations over whole columns: one call screens a live snapshot,
+and the same compiled screen runs over a Date x Symbol panel of stored
+sessions to show every date a screen would have fired.
+"""
+
+import ast
+import datetime
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .panel import market_panel
+from .rolling import DEFAULT_WINDOWS, RollingStats, Window
+from .scraper import DEFAULT_RATE
+
+FUNCTIONS = {
+    'abs': np.abs,
+    'min': np.minimum,
+    'max': np.maximum,
+    'log': np.log,
+}
+
+# Largest constant exponent allowed with ** (x ** 2 is useful, 9 ** 9 ** 9 is not)
+MAX_EXPONENT = 4
+
+_ALLOWED_NODES = frozenset({
+    'Expression', 'BoolOp', 'And', 'Or', 'UnaryOp', 'Not', 'USub', 'UAdd',
+    'BinOp', 'Add', 'Sub', 'Mult', 'Div', 'Mod', 'Pow',
+    'Compare', 'Gt', 'GtE', 'Lt', 'LtE', 'Eq', 'NotEq',
+    'Name', 'Load', 'Constant', 'Num', 'Call',
+})
+
+_BOOLEAN_NODES = ('BoolOp', 'Compare')
+
+
+class _Vectorize(ast.NodeTransformer):
+    """Rewrite Python boolean logic into element-wise NumPy operators."""
+
+    def visit_BoolOp(self, node):
+        self.generic_visit(node)
+        op = ast.BitAnd() if isinstance(node.op, ast.And) else ast.BitOr()
+        result = node.values[0]
+        for value in node.values[1:]:
+            result = ast.BinOp(left=result, op=op, right=value)
+        return result
+
+    def visit_UnaryOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Not):
+            return ast.UnaryOp(op=ast.Invert(), operand=node.operand)
+        return node
+
+    def visit_Compare(self, node):
+        self.generic_visit(node)
+        left, parts = node.left, []
+        for op, right in zip(node.ops, node.comparators):
+            parts.append(ast.Compare(left=left, ops=[op], comparators=[right]))
+            left = right
+        result = parts[0]
+        for part in parts[1:]:
+            result = ast.BinOp(left=result, op=ast.BitAnd(), right=part)
+        return result
+
+
+def _is_boolean(node) -> bool:
+    if type(node).__name__ in _BOOLEAN_NODES:
+        return True
+    return isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not)
+
+
+class Screen:
+    """
+    A compiled screen expression.
+
+    Args:
+        expression: Boolean expression over column and rolling-stat names
+
+    Raises:
+        ValueError: If the expression is not a valid screen
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        try:
+            tree = ast.parse(expression.strip(), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"Invalid screen {expression!r}: {e.msg}") from None
+
+        names = set()
+        for node in ast.walk(tree):
+            kind = type(node).__name__
+            if kind not in _ALLOWED_NODES:
+                raise ValueError(f"Invalid screen {expression!r}: {kind} is not allowed")
+            if isinstance(node, ast.Call):
+                if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+                    raise ValueError(f"Invalid screen {expression!r}: only "
+                                     f"{', '.join(sorted(FUNCTIONS))} may be called")
+                arity = FUNCTIONS[node.func.id].nin
+                if len(node.args) != arity:
+                    raise ValueError(f"Invalid screen {expression!r}: {node.func.id}() takes "
+                                     f"{arity} argument{'s' if arity > 1 else ''}")
+            elif isinstance(node, ast.BinOp) and isinstance(node.op, ast.Pow):
+                exponent = node.right
+                if not (isinstance(exponent, ast.Constant) and type(exponent.value) in (int, float)
+                        and 0 <= exponent.value <= MAX_EXPONENT):
+                    raise ValueError(f"Invalid screen {expression!r}: ** needs a constant "
+                                     f"exponent between 0 and {MAX_EXPONENT}")
+            elif isinstance(node, ast.Name) and node.id not in FUNCTIONS:
+                names.add(node.id)
+            elif isinstance(node, ast.BoolOp) and not all(_is_boolean(v) for v in node.values):
+                raise ValueError(f"Invalid screen {expression!r}: 'and'/'or' need comparisons "
+                                 f"on both sides")
+            elif (isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not)
+                  and not _is_boolean(node.operand)):
+                raise ValueError(f"Invalid screen {expression!r}: 'not' needs a comparison")
+            elif kind == 'Constant' and (isinstance(node.value, bool)
+                                         or not isinstance(node.value, (int, float))):
+                raise ValueError(f"Invalid screen {expression!r}: only numeric constants "
+                                 f"are allowed, got {node.value!r}")
+        if not _is_boolean(tree.body):
+            raise ValueError(f"Invalid screen {expression!r}: must be a comparison")
+
+        self.names: FrozenSet[str] = frozenset(names)
+        tree = ast.fix_missing_locations(_Vectorize().visit(tree))
+        self._code = compile(tree, f'<screen {expression}>', 'eval')
+
+    def _evaluate(self, env: Dict[str, np.ndarray], shape) -> np.ndarray:
+        scope = dict(FUNCTIONS)
+        scope.update(env)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = eval(self._code, {'__builtins__': {}}, scope)
+        return np.broadcast_to(np.asarray(result, dtype=bool), shape)
+
+    def mask(self, snapshot: pd.DataFrame, derived: Optional[pd.DataFrame] = None) -> np.ndarray:
+        """
+        Boolean mask over the rows of one snapshot.
+
+        Args:
+            snapshot: One session's rows (as get_market_data() returns)
+            derived: Extra per-symbol columns indexed by Symbol, e.g.
+                RollingStats.current()
+
+        Returns:
+            numpy.ndarray: True for rows that pass the screen
+        """
+        env = {}
+        for name in self.names:
+            if name in snapshot.columns:
+                column = snapshot[name]
+            elif derived is not None and name in derived.columns:
+                column = derived[name].reindex(snapshot['Symbol'].astype(str))
+            else:
+                raise KeyError(f"Screen uses unknown field {name!r}")
+            env[name] = pd.to_numeric(column, errors='coerce').to_numpy(dtype=np.float64,
+                                                                         na_value=np.nan)
+        return self._evaluate(env, (len(snapshot),))
+
+    def filter(self, snapshot: pd.DataFrame, derived: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """Rows of the snapshot that pass the screen."""
+        return snapshot[self.mask(snapshot, derived)]
+
+    def evaluate_panel(self, panel: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """
+        Evaluate over Date x Symbol frames in one vectorized pass.
+
+        Args:
+            panel: Name -> Date x Symbol frame for every name the screen uses
+
+        Returns:
+            pandas.DataFrame: Boolean Date x Symbol frame of when the screen fired
+        """
+        missing = self.names - set(panel)
+        if missing:
+            raise KeyError(f"Screen uses unknown field(s) {sorted(missing)}")
+        frames = [panel[name] for name in sorted(self.names)]
+        index = frames[0].index if frames else pd.DatetimeIndex([], name='Date')
+        columns = frames[0].columns if frames else pd.Index([], name='Symbol')
+        env = {name: panel[name].reindex(index=index, columns=columns).to_numpy(dtype=np.float64)
+               for name in self.names}
+        return pd.DataFrame(self._evaluate(env, (len(index), len(columns))),
+                            index=index, columns=columns)
+
+    def backtest(self, start: str, end: str, windows: Sequence[Window] = DEFAULT_WINDOWS,
+                 workers: int = 1, rate: Optional[float] = DEFAULT_RATE) -> pd.DataFrame:
+        """
+        When the screen would have fired on each session in [start, end].
+
+        Snapshot fields come from get_market_panel (store or one fetch per
+        session); rolling-stat names are computed with RollingStats, with
+        enough extra history before start to warm their windows up.
+
+        Returns:
+            pandas.DataFrame: Boolean Date x Symbol frame
+        """
+        by_name = {w.name: w for w in windows}
+        used = [by_name[n] for n in sorted(self.names) if n in by_name]
+        stats = RollingStats(used)
+        fields = sorted((self.names - set(by_name)) | set(stats.fields))
+
+        warmup = max([w.length if w.by == 'days' else w.length * 7 // 5 + 14 for w in used],
+                     default=0)
+        fetch_start = start
+        if warmup:
+            fetch_start = (datetime.datetime.strptime(start, '%Y-%m-%d')
+                           - datetime.timedelta(days=warmup)).strftime('%Y-%m-%d')
+
+        panel = market_panel(fetch_start, end, fields, workers=workers, rate=rate)
+        if used:
+            panel.update(stats.fit(panel))
+        fired = self.evaluate_panel(panel)
+        return fired[fired.index >= pd.Timestamp(start)]
+
+    def __repr__(self) -> str:
+        return f"Screen({self.expression!r})"
+
+
+@lru_cache(maxsize=256)
+def compile_screen(expression: str) -> Screen:
+    """Compile a screen once; repeated calls with the same text reuse it."""
+    return Screen(expression)
+
+
+def screen(expression: str, snapshot: pd.DataFrame,
+           stats: Optional[RollingStats] = None) -> pd.DataFrame:
+    """
+    Rows of a live snapshot that pass a screen.
+
+    Args:
+        expression: Screen expression
+        snapshot: One session's rows (as get_market_data() returns)
+        stats: Rolling statistics kept up to date with the session, for
+            expressions that use names such as avg_volume_20
+
+    Returns:
+        pandas.DataFrame: Matching rows
+    """
+    derived = stats.current() if stats is not None else None
+    return compile_screen(expression).filter(snapshot, derived)
@@ -0,0 +1,204 @@
+"""Prefix and fuzzy search over symbols and company names.
+
+``SymbolIndex`` keeps two structures built from the symbol registry:
+
+* a sorted list of (key, kind, symbol) entries, where the keys are the
+  symbol, the full company name and the name from each later word on
+  ("invest" finds "Nepal Investment Bank"); a prefix query is one
+  ``bisect`` plus a scan over the matching run;
+* a trigram -> symbols map over "symbol company", used when prefixes
+  find too little ("nabli", "nepal investmnt").
+
+Results are ranked exact symbol > symbol prefix > name prefix > word
+prefix > fuzzy, closer-length keys first.  The index follows the
+registry's ``version`` and re-indexes only the symbols whose name or
+status changed, so listings and delistings are picked up without a
+rebuild.
+"""
+
+import heapq
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .models import SymbolInfo
+from .registry import SymbolRegistry, symbol_registry
+
+# Entry kinds, in ranking order
+SYMBOL, NAME, WORD = 0, 1, 2
+KIND_SCORES = {SYMBOL: 3.0, NAME: 2.0, WORD: 1.5}
+EXACT_SCORE = 4.0
+
+# Share of the query's trigrams a fuzzy match must contain; fuzzy scores
+# stay below 1.1, under every prefix match
+MIN_SIMILARITY = 0.4
+
+DEFAULT_STATUSES = ('active', 'listed')
+
+_separators = re.compile(r'[^0-9a-z]+')
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    symbol: str
+    company: str
+    score: float
+    match: str
+
+
+def normalize(text: str) -> str:
+    """Lowercase with runs of punctuation and spaces collapsed to one space."""
+    return _separators.sub(' ', text.lower()).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolIndex:
+    """
+    Search index over a symbol registry.
+
+    Args:
+        registry: Registry to index (default: symbol_registry())
+        statuses: Registry statuses to include (default: active and listed)
+    """
+
+    def __init__(self, registry: Optional[SymbolRegistry] = None,
+                 statuses: Sequence[str] = DEFAULT_STATUSES):
+        self.registry = registry if registry is not None else symbol_registry()
+        self.statuses = frozenset(statuses)
+        self._entries: List[Tuple[str, int, str]] = []
+        self._grams: Dict[str, Set[str]] = {}
+        self._indexed: Dict[str, Tuple[str, Tuple[Tuple[str, int, str], ...], Set[str]]] = {}
+        self._version = None
+        self.sync()
+
+    def __len__(self) -> int:
+        return len(self._indexed)
+
+    def add(self, info: SymbolInfo) -> None:
+        """Index one symbol, replacing any earlier entry for it."""
+        self.remove(info.symbol)
+        symbol = info.symbol.upper()
+        keys = [(symbol.lower(), SYMBOL, symbol)]
+        name = normalize(info.company)
+        if name:
+            words = name.split(' ')
+            keys.append((name, NAME, symbol))
+            keys += [(' '.join(words[i:]), WORD, symbol) for i in range(1, len(words))]
+        for key in keys:
+            insort(self._entries, key)
+        grams = trigrams(f"{symbol.lower()} {name}".strip())
+        for gram in grams:
+            self._grams.setdefault(gram, set()).add(symbol)
+        self._indexed[symbol] = (info.company, tuple(keys), grams)
+
+    def remove(self, symbol: str) -> None:
+        """Drop a symbol from the index (no-op if it is not indexed)."""
+        entry = self._indexed.pop(symbol.upper(), None)
+        if entry is None:
+            return
+        _, keys, grams = entry
+        for key in keys:
+            i = bisect_left(self._entries, key)
+            if i < len(self._entries) and self._entries[i] == key:
+                del self._entries[i]
+        for gram in grams:
+            owners = self._grams.get(gram)
+            if owners is not None:
+                owners.discard(symbol.upper())
+                if not owners:
+                    del self._grams[gram]
+
+    def sync(self) -> None:
+        """Re-index the symbols that were added, renamed or changed status in the registry."""
+        if self._version == self.registry.version:
+            return
+        wanted = {}
+        for info in self.registry:
+            if info.status in self.statuses:
+                wanted[info.symbol] = info
+        for symbol in [s for s in self._indexed if s not in wanted]:
+            self.remove(symbol)
+        for symbol, info in wanted.items():
+            indexed = self._indexed.get(symbol)
+            if indexed is None or indexed[0] != info.company:
+                self.add(info)
+        self._version = self.registry.version
+
+    def search(self, query: str, limit: int = 10) -> List[SearchResult]:
+        """
+        Ranked matches for a partial symbol or company name.
+
+        Args:
+            query: Text as typed, e.g. "nabi" or "nepal invest"
+            limit: Maximum results
+
+        Returns:
+            list: SearchResult(symbol, company, score, match), best first
+        """
+        self.sync()
+        q = normalize(query)
+        if not q:
+            return []
+
+        best: Dict[str, Tuple[float, str]] = {}
+        i = bisect_left(self._entries, (q,))
+        while i < len(self._entries) and self._entries[i][0].startswith(q):
+            key, kind, symbol = self._entries[i]
+            i += 1
+            if kind == SYMBOL and key == q:
+                score, match = EXACT_SCORE, 'exact'
+            else:
+                score = KIND_SCORES[kind] + 0.5 * len(q) / len(key)
+                match = ('symbol', 'name', 'word')[kind]
+            if score > best.get(symbol, (0.0,))[0]:
+                best[symbol] = (score, match)
+
+        if len(best) < limit:
+            grams = trigrams(q)
+            shared = Counter()
+            for gram in grams:
+                shared.update(self._grams.get(gram, ()))
+            for symbol, count in shared.items():
+                similarity = count / len(grams)
+                if symbol not in best and similarity >= MIN_SIMILARITY:
+                    # Jaccard breaks ties in favour of shorter, closer names
+                    jaccard = count / (len(grams) + len(self._indexed[symbol][2]) - count)
+                    best[symbol] = (similarity + 0.1 * jaccard, 'fuzzy')
+
+        ranked = heapq.nsmallest(limit, best.items(),
+                                 key=lambda item: (-item[1][0], len(item[0]), item[0]))
+        return [SearchResult(symbol, self._indexed[symbol][0], round(score, 4), match)
+                for symbol, (score, match) in ranked]
+
+    def __repr__(self) -> str:
+        return f"SymbolIndex(symbols={len(self._indexed)}, keys={len(self._entries)})"
+
+
+_indexes: Dict[Tuple[int, frozenset], SymbolIndex] = {}
+
+
+def search_symbols(query: str, limit: int = 10,
+                   statuses: Sequence[str] = DEFAULT_STATUSES) -> List[SearchResult]:
+    """
+    Search the default symbol registry by partial symbol or company name.
+
+    Args:
+        query: Text as typed
+        limit: Maximum results
+        statuses: Registry statuses to include (add 'inactive' for delisted symbols)
+
+    Returns:
+        list: SearchResult(symbol, company, score, match), best first
+    """
+    registry = symbol_registry()
+    key = (id(registry), frozenset(statuses))
+    index = _indexes.get(key)
+    if index is None or index.registry is not registry:
+        index = _indexes[key] = SymbolIndex(registry, statuses)
+    return index.search(query, limit)
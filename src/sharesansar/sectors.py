@@ -0,0 +1,179 @@
+"""Sector membership and per-sector market aggregates.
+
+The today-share-price page filters by sector, so a consumer that only
+follows one sector can fetch just that sector's table.  ``sector_map()``
+keeps a symbol -> sector map built from one request per sector, cached
+in memory and on disk (``~/.cache/sharesansar/sectors.json``) and
+rebuilt when older than ``SECTOR_MAP_TTL``.  ``sector="auto"`` in
+``history()``/``download()`` uses it to narrow fetches to the sector the
+requested symbols belong to.
+
+``sector_aggregates()`` summarises a snapshot per sector in one groupby.
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+import pandas as pd
+
+from .scraper import NoTradingDataError, ShareSansarScraper
+from .utils import atomic_write_json, default_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# Rebuild the cached map after a week; sector changes are rare
+SECTOR_MAP_TTL = 7 * 24 * 3600
+
+# Days searched backwards for a session to build the map from
+LOOKBACK_DAYS = 10
+
+AUTO = 'auto'
+UNKNOWN = 'Unknown'
+
+AGGREGATE_COLUMNS = ('Symbols', 'Turnover', 'Volume', 'Advances', 'Declines', 'Unchanged',
+                     'MedianChange')
+
+_maps: Dict[str, Tuple[float, Dict[str, str]]] = {}
+
+
+def sector_map_path() -> str:
+    return os.path.join(default_cache_dir(), 'sectors.json')
+
+
+def build_sector_map(date: Optional[str] = None,
+                     scraper: Optional[ShareSansarScraper] = None) -> Dict[str, str]:
+    """
+    Fetch every sector's table for one session and map each symbol to its sector.
+
+    Args:
+        date: Session to use (default: the latest within LOOKBACK_DAYS)
+        scraper: Scraper to fetch with (a new one by default)
+
+    Returns:
+        dict: Symbol -> sector name
+    """
+    scraper = scraper or ShareSansarScraper()
+    sectors = scraper.get_sectors()
+    if not sectors:
+        raise ValueError("The today-share-price page did not list any sectors")
+
+    if date is None:
+        session = scraper.get_latest_data(LOOKBACK_DAYS)['Date'].iloc[0]
+    else:
+        scraper.get_today_data(date)  # raises NoTradingDataError for a closed day
+        session = date
+
+    mapping = {}
+    for name, value in sectors.items():
+        try:
+            rows = scraper.get_today_data(session, sector=value)
+        except NoTradingDataError:
+            continue  # nothing traded in this sector that day
+        mapping.update(dict.fromkeys(rows['Symbol'].astype(str), name))
+    logger.info("Sector map built from %s: %d symbols in %d sectors",
+                session, len(mapping), len(sectors))
+    return mapping
+
+
+def _load(path: str) -> Optional[Tuple[float, Dict[str, str]]]:
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return float(data['built']), dict(data['sectors'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def sector_map(refresh: bool = False, max_age: float = SECTOR_MAP_TTL,
+               path: Optional[str] = None,
+               scraper: Optional[ShareSansarScraper] = None) -> Dict[str, str]:
+    """
+    The cached symbol -> sector map, rebuilt when missing, stale or refresh is set.
+
+    Args:
+        refresh: Rebuild even if the cached map is fresh
+        max_age: Seconds before a cached map is rebuilt
+        path: JSON file to persist to (default: sector_map_path())
+        scraper: Scraper used for a rebuild
+    """
+    path = path or sector_map_path()
+    entry = _maps.get(path) or _load(path)
+    if refresh or entry is None or time.time() - entry[0] > max_age:
+        entry = (time.time(), build_sector_map(scraper=scraper))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        atomic_write_json(path, {'built': entry[0], 'sectors': entry[1]})
+    _maps[path] = entry
+    return entry[1]
+
+
+def sector_of(symbol: str) -> Optional[str]:
+    """The sector of a symbol according to the cached map, or None."""
+    return sector_map().get(symbol.upper())
+
+
+def resolve_sector(sector: Optional[str], symbols: Iterable[str]) -> Optional[str]:
+    """
+    The sector to fetch for these symbols.
+
+    'auto' picks the symbols' common sector from the cached map, or None
+    (the whole market) when they span several sectors or are unknown;
+    anything else is returned unchanged.
+    """
+    if sector != AUTO:
+        return sector
+    mapping = sector_map()
+    found = {mapping.get(s.upper()) for s in symbols}
+    if len(found) == 1 and None not in found:
+        return found.pop()
+    return None
+
+
+def sector_aggregates(snapshot: pd.DataFrame, sectors: Optional[Mapping[str, str]] = None,
+                      by_date: bool = False) -> pd.DataFrame:
+    """
+    Per-sector turnover, volume, breadth and median change of a snapshot.
+
+    Args:
+        snapshot: Snapshot rows (several sessions with by_date)
+        sectors: Symbol -> sector (default: a Sector column if present, else sector_map())
+        by_date: Group by (Date, Sector) instead of Sector
+
+    Returns:
+        pandas.DataFrame: Symbols, Turnover, Volume, Advances, Declines,
+        Unchanged and MedianChange per sector; symbols without a known
+        sector are grouped as 'Unknown'
+    """
+    if sectors is None and 'Sector' in snapshot.columns:
+        sector = snapshot['Sector'].fillna(UNKNOWN)
+    else:
+        mapping = sectors if sectors is not None else sector_map()
+        sector = snapshot['Symbol'].astype(str).map(mapping).fillna(UNKNOWN)
+
+    change = snapshot['ChangePercent']
+    df = pd.DataFrame({
+        'Sector': sector,
+        'Symbol': snapshot['Symbol'],
+        'Turnover': snapshot['Turnover'],
+        'Volume': snapshot['Vol'],
+        'Advances': change > 0,
+        'Declines': change < 0,
+        'Unchanged': change == 0,
+        'ChangePercent': change,
+    })
+    keys = ['Sector']
+    if by_date:
+        df['Date'] = snapshot['Date']
+        keys = ['Date', 'Sector']
+    out = df.groupby(keys, sort=True).agg(
+        Symbols=('Symbol', 'size'),
+        Turnover=('Turnover', 'sum'),
+        Volume=('Volume', 'sum'),
+        Advances=('Advances', 'sum'),
+        Declines=('Declines', 'sum'),
+        Unchanged=('Unchanged', 'sum'),
+        MedianChange=('ChangePercent', 'median'),
+    )
+    return out[list(AGGREGATE_COLUMNS)]
@@ -0,0 +1,810 @@
+"""Local snapshot stores: full-market tables for every trading session.
+
+Every store directory holds::
+
+    <root>/_manifest.json        format, known non-trading dates
+    <root>/_index.jsonl          per-session row counts, appended on write
+    <root>/_rankings.jsonl       per-session top-K movers, appended on write
+
+``SnapshotStore`` keeps one CSV file per session.  ``ParquetStore`` keeps
+one Parquet file per month (``year=2024/month=01/data.parquet``) with
+rows sorted by Symbol, so ``scan()`` reads only the months, row groups
+and columns a query needs.  ``SQLiteStore`` keeps everything in one SQLite
+file keyed on (symbol, date) for deployments without pyarrow.
+``open_store()`` picks the right class for an existing path.
+
+Writes go to a temporary file and are renamed into place, so an
+interrupted process never leaves a half-written session behind.
+"""
+
+import glob
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+import pandas as pd
+
+from . import metrics
+from .rankings import compute_rankings
+from .trading_calendar import to_date, trading_days
+from .utils import atomic_write_json
+
+MANIFEST = '_manifest.json'
+INDEX = '_index.jsonl'
+RANKINGS = '_rankings.jsonl'
+
+# ParquetStore: merged sessions of a month, and the footer key listing their dates
+MONTH_FILE = 'data.parquet'
+DATES_KEY = b'sharesansar.dates'
+
+# Columns a fully parsed session must have
+REQUIRED_COLUMNS = ('Symbol', 'LTP', 'Close', 'Date')
+PRICE_COLUMNS = ('LTP', 'Close')
+
+
+def session_stats(date: str, df: pd.DataFrame) -> dict:
+    """Row count and parse-quality figures recorded for each stored session."""
+    price_cols = [c for c in PRICE_COLUMNS if c in df.columns]
+    null_prices = int(df[price_cols].isna().any(axis=1).sum()) if price_cols else len(df)
+    return {
+        'date': date,
+        'rows': int(len(df)),
+        'null_prices': null_prices,
+        'missing_columns': [c for c in REQUIRED_COLUMNS if c not in df.columns],
+    }
+
+
+class SnapshotStore:
+    """Directory of per-session market snapshots."""
+
+    format = 'csv'
+    # Bumped by every write or delete, so callers can tell cached results are stale
+    generation = 0
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._manifest = self._load_manifest()
+        self._non_trading: Set[str] = set(self._manifest.get('non_trading', []))
+        self._dates: Set[str] = self._scan_dates()
+        self._stats: Optional[Dict[str, dict]] = None
+        self._rankings: Optional[Dict[str, dict]] = None
+
+    def _load_manifest(self) -> dict:
+        path = os.path.join(self.root, MANIFEST)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        manifest = {'format': self.format, 'non_trading': []}
+        atomic_write_json(path, manifest)
+        return manifest
+
+    def _save_manifest(self) -> None:
+        self._manifest['non_trading'] = sorted(self._non_trading)
+        atomic_write_json(os.path.join(self.root, MANIFEST), self._manifest)
+
+    def _scan_dates(self) -> Set[str]:
+        pattern = os.path.join(self.root, f'????-??-??.{self.format}')
+        return {os.path.basename(p)[:10] for p in glob.glob(pattern)}
+
+    def _path(self, date: str) -> str:
+        return os.path.join(self.root, f'{date}.{self.format}')
+
+    def sidecar_path(self, name: str) -> str:
+        """Path for an auxiliary file (e.g. a backfill checkpoint) kept with the store."""
+        return os.path.join(self.root, name)
+
+    def _write_session(self, date: str, df: pd.DataFrame) -> None:
+        path = self._path(date)
+        tmp_path = f"{path}.tmp"
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def _read_session(self, date: str, columns: Optional[List[str]]) -> pd.DataFrame:
+        return pd.read_csv(self._path(date), usecols=columns)
+
+    def _delete_session(self, date: str) -> None:
+        os.remove(self._path(date))
+
+    def write(self, date: str, df: pd.DataFrame) -> None:
+        """Store the full-market snapshot for a session, replacing any existing one."""
+        rankings = compute_rankings(df)
+        with self._lock:
+            self._write_session(date, df)
+            self._dates.add(date)
+            self.generation += 1
+            self._append_stats(session_stats(date, df))
+            self._append_rankings(date, rankings)
+            if date in self._non_trading:
+                self._non_trading.discard(date)
+                self._save_manifest()
+
+    def _append_stats(self, stats: dict) -> None:
+        with open(os.path.join(self.root, INDEX), 'a') as f:
+            f.write(json.dumps(stats) + '\n')
+        if self._stats is not None:
+            self._stats[stats['date']] = stats
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-session stats (rows, null_prices, missing_columns) keyed by date.
+
+        Read from the append-only index; sessions written before the index
+        existed are measured once and added to it.
+        """
+        if self._stats is None:
+            stats = {}
+            path = os.path.join(self.root, INDEX)
+            if os.path.exists(path):
+                with open(path) as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue  # torn write from an interrupted append
+                        stats[entry['date']] = entry
+            self._stats = stats
+
+        for date in self._dates - set(self._stats):
+            try:
+                entry = session_stats(date, self.read(date))
+            except Exception as e:
+                entry = {'date': date, 'rows': 0, 'null_prices': 0,
+                         'missing_columns': list(REQUIRED_COLUMNS), 'error': type(e).__name__}
+            with self._lock:
+                self._append_stats(entry)
+        return {d: s for d, s in self._stats.items() if d in self._dates}
+
+    def _append_rankings(self, date: str, rankings: dict) -> None:
+        with open(os.path.join(self.root, RANKINGS), 'a') as f:
+            f.write(json.dumps(dict(rankings, date=date)) + '\n')
+        if self._rankings is not None:
+            self._rankings[date] = rankings
+
+    def _load_rankings(self) -> Dict[str, dict]:
+        rankings = {}
+        path = os.path.join(self.root, RANKINGS)
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn write from an interrupted append
+                    rankings[entry.pop('date')] = entry
+        return rankings
+
+    def rankings(self, date: str) -> Optional[dict]:
+        """Top-K rankings saved when the session was written (see rankings.compute_rankings).
+
+        Returns None for sessions that are not stored or were written
+        before rankings were recorded.
+        """
+        if date not in self._dates:
+            return None
+        if self._rankings is None:
+            self._rankings = self._load_rankings()
+        return self._rankings.get(date)
+
+    def save_rankings(self, date: str, rankings: dict) -> None:
+        """Record rankings for a stored session (e.g. one written before they existed)."""
+        with self._lock:
+            self._append_rankings(date, rankings)
+
+    def read(self, date: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load a stored session. Raises KeyError if it is not stored."""
+        if date not in self._dates:
+            raise KeyError(date)
+        df = self._read_session(date, columns)
+        if columns is not None:
+            df = df[list(columns)]
+        if 'Date' in df.columns:
+            df['Date'] = df['Date'].astype(str)
+        return df
+
+    def compact(self) -> None:
+        """Merge recently written sessions into their long-term layout (no-op here)."""
+
+    def delete(self, date: str) -> None:
+        """Remove a stored session."""
+        with self._lock:
+            if date in self._dates:
+                self._delete_session(date)
+                self._dates.discard(date)
+                self.generation += 1
+
+    def has(self, date: str) -> bool:
+        return date in self._dates
+
+    def dates(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        """Stored session dates, ascending, optionally within [start, end]."""
+        start = to_date(start).isoformat() if start else None
+        end = to_date(end).isoformat() if end else None
+        return sorted(d for d in self._dates
+                      if (start is None or d >= start) and (end is None or d <= end))
+
+    def mark_non_trading(self, dates: Iterable[str]) -> None:
+        """Record dates that have no trading data so they are never refetched."""
+        with self._lock:
+            new = set(dates) - self._non_trading - self._dates
+            if new:
+                self._non_trading |= new
+                self._save_manifest()
+
+    def non_trading_dates(self) -> Set[str]:
+        return set(self._non_trading)
+
+    def is_known(self, date: str) -> bool:
+        """True if the date is stored or known not to trade."""
+        return date in self._dates or date in self._non_trading
+
+    def covers(self, start: str, end: str) -> bool:
+        """True if every candidate session in [start, end] is stored or known closed."""
+        return all(self.is_known(d) for d in trading_days(start, end))
+
+    def scan(self, symbols: Optional[Iterable[str]] = None, start: Optional[str] = None,
+             end: Optional[str] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Long-format rows for the given symbols and date range.
+
+        Args:
+            symbols: Symbols to keep (all if None)
+            start: First date (inclusive)
+            end: Last date (inclusive)
+            columns: Columns to return; Symbol and Date are always included
+
+        Returns:
+            pandas.DataFrame: Rows in date order
+        """
+        usecols = None
+        if columns is not None:
+            usecols = list(dict.fromkeys(['Date', 'Symbol'] + list(columns)))
+        wanted = {s.upper() for s in symbols} if symbols is not None else None
+
+        frames = []
+        for date in self.dates(start, end):
+            df = self.read(date, usecols)
+            if wanted is not None:
+                df = df[df['Symbol'].isin(wanted)]
+            if not df.empty:
+                frames.append(df)
+
+        if not frames:
+            return pd.DataFrame(columns=usecols) if usecols else pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+
+class ParquetStore(SnapshotStore):
+    """
+    Parquet history in one file per month, rows sorted by Symbol.
+
+    A new session is first written to its own staged file next to the
+    month file; staged sessions are merged into the month file once
+    writing moves on to another month, or on ``compact()``.  Every file
+    shares the column types recorded in the manifest, so ``scan()`` reads
+    them as one ``pyarrow.dataset`` and pushes the date and symbol filters
+    down: only the months in range are opened, row groups whose Symbol
+    statistics cannot match are skipped, and only the requested columns
+    are decoded.
+
+    Requires pyarrow.
+    """
+
+    format = 'parquet'
+    row_group_size = 512
+
+    def __init__(self, root: str):
+        import pyarrow.parquet  # noqa: F401 - fail early without pyarrow
+        super().__init__(root)
+
+    def _month_dir(self, month: str) -> str:
+        return os.path.join(self.root, f'year={month[:4]}', f'month={month[5:7]}')
+
+    def _month_path(self, month: str) -> str:
+        return os.path.join(self._month_dir(month), MONTH_FILE)
+
+    def _path(self, date: str) -> str:
+        return os.path.join(self._month_dir(date[:7]), f'{date}.parquet')
+
+    def _scan_dates(self) -> Set[str]:
+        import pyarrow.parquet as pq
+
+        # Called from SnapshotStore.__init__, so the layout state starts here
+        self._months: Dict[str, Set[str]] = {}
+        for path in glob.glob(os.path.join(self.root, 'year=*', 'month=*', MONTH_FILE)):
+            meta = pq.read_metadata(path).metadata or {}
+            dates = set(json.loads(meta.get(DATES_KEY, b'[]')))
+            if dates:
+                self._months[min(dates)[:7]] = dates
+        pattern = os.path.join(self.root, 'year=*', 'month=*', '????-??-??.parquet')
+        self._staged: Set[str] = {os.path.basename(p)[:10] for p in glob.glob(pattern)}
+        return self._staged.union(*self._months.values())
+
+    def _schema(self, names: Optional[Iterable[str]] = None):
+        import pyarrow as pa
+
+        types = self._manifest.get('columns', {})
+        names = types if names is None else names
+        return pa.schema([pa.field(n, pa.type_for_alias(types[n])) for n in names])
+
+    def _write_table(self, path: str, table, dates: Iterable[str]) -> None:
+        import pyarrow.parquet as pq
+
+        table = table.sort_by([('Symbol', 'ascending'), ('Date', 'ascending')])
+        table = table.replace_schema_metadata({DATES_KEY: json.dumps(sorted(dates))})
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path, row_group_size=self.row_group_size)
+        os.replace(tmp_path, path)
+
+    def _write_session(self, date: str, df: pd.DataFrame) -> None:
+        import pyarrow as pa
+
+        types = self._manifest.setdefault('columns', {})
+        new = {n: t for n, t in arrow_types(df).items() if n not in types}
+        if new:
+            types.update(new)
+            self._save_manifest()
+
+        path = self._path(date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        schema = self._schema()
+        df = df.assign(Date=date).reindex(columns=schema.names)
+        self._write_table(path, pa.Table.from_pandas(df, schema=schema, preserve_index=False),
+                          [date])
+        self._staged.add(date)
+
+        # Backfills run in date order: a month is complete once writing leaves it
+        for month in {d[:7] for d in self._staged} - {date[:7]}:
+            self._compact_month(month)
+
+    def _compact_month(self, month: str, drop: Iterable[str] = ()) -> None:
+        """Merge a month's staged sessions into its month file, leaving out `drop`."""
+        import pyarrow.dataset as ds
+
+        staged = sorted(d for d in self._staged if d[:7] == month)
+        replaced = set(staged) | set(drop)
+        kept = self._months.get(month, set()) - replaced
+        filters = {}
+        if kept:
+            filters[self._month_path(month)] = ~ds.field('Date').isin(sorted(replaced))
+        for d in staged:
+            if d not in drop:
+                filters[self._path(d)] = None
+
+        dates = kept | (set(staged) - set(drop))
+        path = self._month_path(month)
+        if dates:
+            tables = [ds.dataset(p, schema=self._schema()).to_table(filter=f)
+                      for p, f in filters.items()]
+            self._write_table(path, _concat_tables(tables), dates)
+            self._months[month] = dates
+        elif os.path.exists(path):
+            os.remove(path)
+            self._months.pop(month, None)
+
+        for d in staged:
+            os.remove(self._path(d))
+            self._staged.discard(d)
+
+    def compact(self) -> None:
+        """Merge every staged session into its month file."""
+        with self._lock:
+            for month in sorted({d[:7] for d in self._staged}):
+                self._compact_month(month)
+
+    def _delete_session(self, date: str) -> None:
+        if date in self._staged and date not in self._months.get(date[:7], ()):
+            os.remove(self._path(date))
+            self._staged.discard(date)
+        else:
+            self._compact_month(date[:7], drop=[date])
+
+    def _files(self, start: Optional[str], end: Optional[str]) -> list:
+        """(path, filter excluding superseded dates) for each file with sessions in range."""
+        import pyarrow.dataset as ds
+
+        parts = []
+        for month in sorted(self._months):
+            if (start is None or month >= start[:7]) and (end is None or month <= end[:7]):
+                staged = sorted(d for d in self._staged if d[:7] == month)
+                parts.append((self._month_path(month),
+                              ~ds.field('Date').isin(staged) if staged else None))
+        parts += [(self._path(d), None) for d in sorted(self._staged)
+                  if (start is None or d >= start) and (end is None or d <= end)]
+        return parts
+
+    def _read(self, symbols: Optional[List[str]], start: Optional[str], end: Optional[str],
+              columns: Optional[List[str]]) -> pd.DataFrame:
+        import pyarrow.dataset as ds
+
+        names = self._schema().names
+        read_cols = None if columns is None else [c for c in columns if c in names]
+        condition = None
+        for term in (ds.field('Symbol').isin(symbols) if symbols is not None else None,
+                     ds.field('Date') >= start if start is not None else None,
+                     ds.field('Date') <= end if end is not None else None):
+            if term is not None:
+                condition = term if condition is None else condition & term
+
+        with self._lock:
+            tables = []
+            for path, exclude in self._files(start, end):
+                where = condition if exclude is None else (
+                    exclude if condition is None else condition & exclude)
+                dataset = ds.dataset(path, schema=self._schema())
+                tables.append(dataset.to_table(columns=read_cols, filter=where))
+        if not tables:
+            return pd.DataFrame(columns=columns)
+
+        df = _concat_tables(tables).to_pandas()
+        if columns is not None:
+            for c in columns:
+                if c not in df.columns:
+                    df[c] = float('nan')
+            df = df[list(columns)]
+        return df
+
+    def _read_session(self, date: str, columns: Optional[List[str]]) -> pd.DataFrame:
+        return self._read(None, date, date, columns)
+
+    def scan(self, symbols: Optional[Iterable[str]] = None, start: Optional[str] = None,
+             end: Optional[str] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Long-format rows for the given symbols and date range.
+
+        Only month files overlapping the range are opened; within them
+        pyarrow skips row groups whose Symbol statistics cannot match, and
+        reads only the requested columns.
+
+        Args:
+            symbols: Symbols to keep (all if None)
+            start: First date (inclusive)
+            end: Last date (inclusive)
+            columns: Columns to return; Symbol and Date are always included
+
+        Returns:
+            pandas.DataFrame: Rows sorted by Date then Symbol
+        """
+        start = to_date(start).isoformat() if start else None
+        end = to_date(end).isoformat() if end else None
+        if columns is not None:
+            columns = list(dict.fromkeys(['Date', 'Symbol'] + list(columns)))
+        wanted = sorted({s.upper() for s in symbols}) if symbols is not None else None
+
+        df = self._read(wanted, start, end, columns)
+        if df.empty:
+            return pd.DataFrame(columns=columns) if columns else pd.DataFrame()
+        return df.sort_values(['Date', 'Symbol'], kind='mergesort').reset_index(drop=True)
+
+
+def arrow_types(df: pd.DataFrame) -> Dict[str, str]:
+    """Arrow type name for each column: snapshot numbers as double, others by dtype."""
+    from .scraper import NUMERIC_COLUMNS
+
+    types = {}
+    for name, dtype in df.dtypes.items():
+        # A numeric column can be all-NaN, or int in one session and NaN in the next
+        if name in NUMERIC_COLUMNS or pd.api.types.is_float_dtype(dtype):
+            types[str(name)] = 'double'
+        elif pd.api.types.is_bool_dtype(dtype):
+            types[str(name)] = 'bool'
+        elif pd.api.types.is_integer_dtype(dtype):
+            types[str(name)] = 'int64'
+        else:
+            types[str(name)] = 'string'
+    return types
+
+
+def _concat_tables(tables):
+    import pyarrow as pa
+
+    return pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+
+
+# Typed columns kept by SQLiteStore; anything else in a snapshot is dropped
+SQLITE_FIELDS = {
+    'Confidence': 'REAL', 'Open': 'REAL', 'High': 'REAL', 'Low': 'REAL',
+    'Close': 'REAL', 'LTP': 'REAL', 'VWAP': 'REAL', 'Vol': 'INTEGER',
+    'PrevClose': 'REAL', 'Turnover': 'REAL', 'Transactions': 'INTEGER',
+    'Diff': 'REAL', 'Range': 'REAL', 'ChangePercent': 'REAL', 'RangePercent': 'REAL',
+    'Days120': 'REAL', 'Days180': 'REAL', 'Weeks52High': 'REAL', 'Weeks52Low': 'REAL',
+}
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS symbols (
+    id INTEGER PRIMARY KEY,
+    symbol TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    date INTEGER PRIMARY KEY,
+    rows INTEGER NOT NULL,
+    null_prices INTEGER NOT NULL,
+    missing_columns TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS non_trading (
+    date INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS prices (
+    symbol_id INTEGER NOT NULL REFERENCES symbols(id),
+    date INTEGER NOT NULL,
+    {fields},
+    PRIMARY KEY (symbol_id, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS prices_by_date ON prices(date);
+CREATE TABLE IF NOT EXISTS rankings (
+    date INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+""".format(fields=',\n    '.join(f'"{name}" {kind}' for name, kind in SQLITE_FIELDS.items()))
+
+
+def _encode_date(date: str) -> int:
+    return int(date[:4] + date[5:7] + date[8:10])
+
+
+def _decode_date(value: int) -> str:
+    text = str(value)
+    return f'{text[:4]}-{text[4:6]}-{text[6:8]}'
+
+
+class SQLiteStore(SnapshotStore):
+    """
+    Snapshot store in a single SQLite file.
+
+    Symbols and dates are integer-encoded (dates as YYYYMMDD), prices are
+    REAL, and ``prices`` is keyed on (symbol, date) so one symbol's history
+    over any range is a single index range scan.  WAL mode lets readers
+    query while a backfill writes; each session is one executemany insert.
+    """
+
+    format = 'sqlite'
+
+    def __init__(self, path: str):
+        self.root = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SQLITE_SCHEMA)
+        self._symbol_ids: Dict[str, int] = dict(
+            self._conn.execute('SELECT symbol, id FROM symbols'))
+        self._dates = {_decode_date(d) for (d,) in self._conn.execute('SELECT date FROM sessions')}
+        self._non_trading = {_decode_date(d) for (d,) in self._conn.execute('SELECT date FROM non_trading')}
+        self._stats = None
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def refresh(self) -> None:
+        """Reload session and symbol lists written by other connections."""
+        with self._lock:
+            self._symbol_ids.update(self._conn.execute('SELECT symbol, id FROM symbols'))
+            self._dates = {_decode_date(d) for (d,) in self._conn.execute('SELECT date FROM sessions')}
+            self._non_trading = {_decode_date(d) for (d,)
+                                 in self._conn.execute('SELECT date FROM non_trading')}
+
+    def covers(self, start: str, end: str) -> bool:
+        # A backfill in another process may have added sessions since we opened
+        self.refresh()
+        return super().covers(start, end)
+
+    def sidecar_path(self, name: str) -> str:
+        return f"{self.root}.{name.lstrip('_')}"
+
+    def _ids_for(self, symbols: Iterable[str]) -> List[int]:
+        new = [s for s in dict.fromkeys(symbols) if s not in self._symbol_ids]
+        if new:
+            self._conn.executemany('INSERT OR IGNORE INTO symbols(symbol) VALUES (?)',
+                                   [(s,) for s in new])
+            placeholders = ','.join('?' * len(new))
+            self._symbol_ids.update(self._conn.execute(
+                f'SELECT symbol, id FROM symbols WHERE symbol IN ({placeholders})', new))
+        return [self._symbol_ids[s] for s in symbols]
+
+    def write(self, date: str, df: pd.DataFrame) -> None:
+        """Store a session in one transaction, replacing any existing rows."""
+        code = _encode_date(date)
+        values = df.reindex(columns=list(SQLITE_FIELDS))
+        values = values.astype(object).where(values.notna(), None)
+        stats = session_stats(date, df)
+        rankings = json.dumps(compute_rankings(df))
+        columns = ', '.join(f'"{c}"' for c in SQLITE_FIELDS)
+        placeholders = ', '.join('?' * (len(SQLITE_FIELDS) + 2))
+
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                ids = self._ids_for(df['Symbol'].astype(str).tolist())
+                self._conn.execute('DELETE FROM prices WHERE date = ?', (code,))
+                self._conn.executemany(
+                    f'INSERT OR REPLACE INTO prices (symbol_id, date, {columns}) VALUES ({placeholders})',
+                    [(sid, code) + row for sid, row in
+                     zip(ids, values.itertuples(index=False, name=None))])
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?)',
+                    (code, stats['rows'], stats['null_prices'], json.dumps(stats['missing_columns'])))
+                self._conn.execute('INSERT OR REPLACE INTO rankings VALUES (?, ?)',
+                                   (code, rankings))
+                self._conn.execute('DELETE FROM non_trading WHERE date = ?', (code,))
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._dates.add(date)
+            self._non_trading.discard(date)
+            self.generation += 1
+
+    def _save_manifest(self) -> None:
+        self._conn.executemany('INSERT OR IGNORE INTO non_trading VALUES (?)',
+                               [(_encode_date(d),) for d in self._non_trading])
+
+    def delete(self, date: str) -> None:
+        with self._lock:
+            code = _encode_date(date)
+            self._conn.execute('BEGIN IMMEDIATE')
+            self._conn.execute('DELETE FROM prices WHERE date = ?', (code,))
+            self._conn.execute('DELETE FROM sessions WHERE date = ?', (code,))
+            self._conn.execute('DELETE FROM rankings WHERE date = ?', (code,))
+            self._conn.execute('COMMIT')
+            self._dates.discard(date)
+            self.generation += 1
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            _decode_date(d): {'date': _decode_date(d), 'rows': rows, 'null_prices': nulls,
+                              'missing_columns': json.loads(missing)}
+            for d, rows, nulls, missing in self._conn.execute('SELECT * FROM sessions')
+        }
+
+    def rankings(self, date: str) -> Optional[dict]:
+        row = self._conn.execute('SELECT data FROM rankings WHERE date = ?',
+                                 (_encode_date(date),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_rankings(self, date: str, rankings: dict) -> None:
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO rankings VALUES (?, ?)',
+                               (_encode_date(date), json.dumps(rankings)))
+
+    def _query(self, symbols: Optional[List[str]], start: Optional[str], end: Optional[str],
+               columns: Optional[List[str]]) -> pd.DataFrame:
+        fields = [c for c in (columns or SQLITE_FIELDS) if c in SQLITE_FIELDS]
+        select = ', '.join(['s.symbol AS "Symbol"', 'p.date AS "Date"'] +
+                           [f'p."{c}"' for c in fields])
+        where, params = [], []
+        if symbols is not None:
+            if any(s not in self._symbol_ids for s in symbols):
+                self.refresh()
+            ids = [self._symbol_ids[s] for s in symbols if s in self._symbol_ids]
+            if not ids:
+                return pd.DataFrame(columns=['Date', 'Symbol'] + fields)
+            where.append(f"p.symbol_id IN ({','.join('?' * len(ids))})")
+            params += ids
+        if start is not None:
+            where.append('p.date >= ?')
+            params.append(_encode_date(to_date(start).isoformat()))
+        if end is not None:
+            where.append('p.date <= ?')
+            params.append(_encode_date(to_date(end).isoformat()))
+
+        sql = f'SELECT {select} FROM prices p JOIN symbols s ON s.id = p.symbol_id'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY p.date, s.symbol'
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=params)
+        if not df.empty:
+            text = df['Date'].astype(str)
+            df['Date'] = text.str[:4] + '-' + text.str[4:6] + '-' + text.str[6:8]
+        if columns is not None:
+            for c in columns:
+                if c not in df.columns:
+                    df[c] = float('nan')
+            return df[list(columns)]
+        return df[['Symbol'] + fields + ['Date']]
+
+    def read(self, date: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        if date not in self._dates:
+            raise KeyError(date)
+        return self._query(None, date, date, columns)
+
+    def scan(self, symbols: Optional[Iterable[str]] = None, start: Optional[str] = None,
+             end: Optional[str] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Long-format rows for the given symbols and date range.
+
+        Runs as one query against the (symbol, date) primary key.
+
+        Args:
+            symbols: Symbols to keep (all if None)
+            start: First date (inclusive)
+            end: Last date (inclusive)
+            columns: Columns to return; Symbol and Date are always included
+
+        Returns:
+            pandas.DataFrame: Rows sorted by Date then Symbol
+        """
+        if columns is not None:
+            columns = list(dict.fromkeys(['Date', 'Symbol'] + list(columns)))
+        wanted = sorted({s.upper() for s in symbols}) if symbols is not None else None
+        return self._query(wanted, start, end, columns)
+
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+
+def _parquet_available() -> bool:
+    try:
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def open_store(path: str, format: Optional[str] = None) -> SnapshotStore:
+    """
+    Open a snapshot store, choosing the backend from its manifest.
+
+    Args:
+        path: Store directory, or a .db/.sqlite file for SQLiteStore
+        format: 'parquet', 'csv' or 'sqlite' for a new store; defaults to
+            parquet when pyarrow is installed
+
+    Returns:
+        SnapshotStore: The opened store
+    """
+    path = os.path.expanduser(path)
+    if format == 'sqlite' or path.lower().endswith(SQLITE_SUFFIXES):
+        return SQLiteStore(path)
+
+    manifest_path = os.path.join(path, MANIFEST)
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            format = json.load(f).get('format', 'csv')
+    elif format is None:
+        format = 'parquet' if _parquet_available() else 'csv'
+
+    if format == 'parquet':
+        return ParquetStore(path)
+    if format == 'csv':
+        return SnapshotStore(path)
+    raise ValueError(f"Unknown store format: {format}")
+
+
+_default_store: Optional[SnapshotStore] = None
+
+
+def set_store(store) -> None:
+    """
+    Let history() and download() answer from a local store.
+
+    Args:
+        store: A store, a store directory, or None to disable. The
+            SHARESANSAR_STORE environment variable sets it too.
+    """
+    global _default_store
+    _default_store = open_store(store) if isinstance(store, str) else store
+
+
+def get_store() -> Optional[SnapshotStore]:
+    """The store used by history() and download(), if any."""
+    global _default_store
+    if _default_store is None and os.environ.get('SHARESANSAR_STORE'):
+        _default_store = open_store(os.environ['SHARESANSAR_STORE'])
+    return _default_store
+
+
+def scan_if_covered(symbols: Iterable[str], start: str, end: str) -> Optional[pd.DataFrame]:
+    """Rows from the default store if it already holds every session in range."""
+    store = get_store()
+    if store is None or start is None or end is None:
+        return None
+    if not store.covers(start, end):
+        metrics.SNAPSHOT_CACHE_MISSES.inc()
+        return None
+    metrics.SNAPSHOT_CACHE_HITS.inc()
+    return store.scan(symbols=symbols, start=start, end=end)
@@ -0,0 +1,75 @@
+"""NEPSE trading calendar.
+
+NEPSE trades Sunday to Thursday.  Public holidays are not published in a
+machine-readable form, so they are learned: a weekday that ShareSansar
+reports as "No Record Found" is recorded by the snapshot store as a
+non-trading day and excluded from then on.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, List, Optional, Union
+
+# datetime.weekday(): Monday=0 ... Sunday=6
+NEPSE_WEEKDAYS = frozenset({6, 0, 1, 2, 3})
+
+# Nepal Standard Time has no daylight saving; NEPSE trades 11:00-15:00
+NEPAL_TZ = timezone(timedelta(hours=5, minutes=45))
+MARKET_CLOSE = time(15, 0)
+
+DateLike = Union[str, date, datetime]
+
+
+def to_date(value: DateLike) -> date:
+    """Convert a YYYY-MM-DD string, date or datetime to a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def nepal_now() -> datetime:
+    """Current time in Nepal."""
+    return datetime.now(NEPAL_TZ)
+
+
+def last_closed_day(now: Optional[datetime] = None) -> date:
+    """Latest date whose session, if any, has closed: today after 15:00 NPT, else yesterday."""
+    now = now or nepal_now()
+    if now.tzinfo is not None:
+        now = now.astimezone(NEPAL_TZ)
+    today = now.date()
+    return today if now.time() >= MARKET_CLOSE else today - timedelta(days=1)
+
+
+def is_trading_weekday(value: DateLike, weekdays: Iterable[int] = NEPSE_WEEKDAYS) -> bool:
+    """True if the date falls on a NEPSE trading weekday."""
+    return to_date(value).weekday() in weekdays
+
+
+def trading_days(start: DateLike, end: DateLike,
+                 holidays: Optional[Iterable[DateLike]] = None,
+                 weekdays: Iterable[int] = NEPSE_WEEKDAYS) -> List[str]:
+    """
+    Candidate trading sessions between start and end (inclusive).
+
+    Args:
+        start: First date
+        end: Last date
+        holidays: Dates known not to trade
+        weekdays: Trading weekdays (Monday=0); defaults to Sunday-Thursday
+
+    Returns:
+        list: Dates in YYYY-MM-DD format, ascending
+    """
+    start_d, end_d = to_date(start), to_date(end)
+    weekdays = frozenset(weekdays)
+    closed = {to_date(h) for h in holidays} if holidays else set()
+
+    days = []
+    current = start_d
+    while current <= end_d:
+        if current.weekday() in weekdays and current not in closed:
+            days.append(current.strftime('%Y-%m-%d'))
+        current += timedelta(days=1)
+    return days
@@ -1,8 +1,12 @@
 import requests
 import pandas as pd
 from typing import Dict, Any, Optional
+import json
+import os
+import threading
 import time
 from datetime import datetime
+from . import metrics
 
 def safe_float_conversion(value, default=0.0):
     """Safely convert value to float."""
@@ -36,4 +40,44 @@ def validate_date(date_string: str) -> bool:
 
 def format_date(date_obj) -> str:
     """Format datetime object to YYYY-MM-DD."""
-    return date_obj.strftime('%Y-%m-%d')
\ No newline at end of file
+    return date_obj.strftime('%Y-%m-%d')
+
+def atomic_write_json(path: str, obj) -> None:
+    """Write JSON to a temporary file and rename it over path."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(obj, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def default_cache_dir() -> str:
+    """Directory for persisted sessions and local data (honours XDG_CACHE_HOME)."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'sharesansar')
+
+
+class RateLimiter:
+    """Thread-safe token bucket allowing ``rate`` calls per second."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a call is allowed. Returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # Reserve a slot now and sleep outside the lock
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        metrics.RATE_LIMIT_WAIT.observe(wait)
+        return wait
@@ -0,0 +1,37 @@
+"""Shared offline fixtures: canned ShareSansar AJAX responses."""
+
+import pytest
+
+HEADERS = ['S.No', 'Symbol', 'Conf.', 'Open', 'High', 'Low', 'Close', 'LTP',
+           'VWAP', 'Vol', 'Prev. Close', 'Turnover', 'Trans.', 'Diff',
+           'Range', 'Diff %', 'Range %', '120 Days', '180 Days',
+           '52 Weeks High', '52 Weeks Low']
+
+ROWS = [
+    ['1', 'NABIL', '50.1', '500', '510', '495', '505', '505', '503.2', '10,000',
+     '498', '5,032,000', '120', '7', '15', '1.41%', '3.03%', '480.5', '470.1',
+     '620', '410'],
+    ['2', 'SCB', '48.3', '600', '612', '598', '610', '610', '605.5', '4,000',
+     '600', '2,422,000', '80', '10', '14', '1.67%', '2.34%', '590.0', '585.2',
+     '700', '520'],
+    ['3', 'NICA', '45.0', '800', '801', '780', '785', '785', '790.0', '2,500',
+     '805', '1,975,000', '60', '-20', '21', '-2.48%', '2.69%', '810.0', '820.3',
+     '950', '700'],
+]
+
+
+def make_snapshot_html(rows=None):
+    """Build an HTML table shaped like the ajaxtodayshareprice response."""
+    rows = ROWS if rows is None else rows
+    head = ''.join(f'<th>{h}</th>' for h in HEADERS)
+    body = ''.join('<tr>' + ''.join(f'<td>{c}</td>' for c in row) + '</tr>' for row in rows)
+    return f'<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>'
+
+
+NO_RECORD_HTML = ('<table><thead><tr><th>S.No</th><th>Symbol</th></tr></thead>'
+                  '<tbody><tr><td colspan="2">No Record Found.</td></tr></tbody></table>')
+
+
+@pytest.fixture
+def snapshot_html():
+    return make_snapshot_html()
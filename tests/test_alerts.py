@@ -0,0 +1,94 @@
+"""Offline tests for the incremental alert engine."""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sharesansar import alerts
+from sharesansar.alerts import AlertEngine, Rule
+from sharesansar.scraper import ShareSansarScraper
+
+
+def _tick(**ltp):
+    return pd.DataFrame({'Symbol': list(ltp), 'LTP': list(ltp.values())})
+
+
+def test_rules_fire_once_per_crossing():
+    engine = AlertEngine([Rule('nabil', 'LTP', 'above', 520), Rule('NABIL', 'LTP', 'below', 480)])
+    assert engine.evaluate(_tick(NABIL=510)).empty
+    fired = engine.evaluate(_tick(NABIL=525))
+    assert list(fired['Rule']) == ['r1'] and fired['Value'].iloc[0] == 525
+    assert engine.evaluate(_tick(NABIL=530)).empty          # still above: no refire
+    assert engine.evaluate(_tick(NABIL=np.nan)).empty       # unknown keeps state
+    assert engine.evaluate(_tick(NABIL=531)).empty
+    assert list(engine.evaluate(_tick(NABIL=470))['Rule']) == ['r2']
+    assert list(engine.evaluate(_tick(NABIL=521))['Rule']) == ['r1']   # crossed again
+
+
+def test_only_rules_of_changed_symbols_match_a_full_scan():
+    rng = np.random.default_rng(5)
+    symbols = [f'S{i:03d}' for i in range(200)]
+    rules = [Rule(str(s), 'LTP', str(op), float(level))
+             for s, op, level in zip(rng.choice(symbols, 2000), rng.choice(['above', 'below'], 2000),
+                                     rng.uniform(90, 110, 2000))]
+    engine = AlertEngine(rules)
+    prices = pd.Series(100.0, index=symbols)
+    active = {r.id: False for r in rules}
+    for _ in range(20):
+        moved = rng.choice(symbols, 15, replace=False)
+        prices[moved] += rng.normal(0, 5, 15)
+        fired = set(engine.evaluate(pd.DataFrame({'Symbol': moved, 'LTP': prices[moved].values}))['Rule'])
+
+        expected = set()
+        for r in rules:
+            holds = prices[r.symbol] > r.level if r.op == 'above' else prices[r.symbol] < r.level
+            if r.symbol in moved:
+                if holds and not active[r.id]:
+                    expected.add(r.id)
+                active[r.id] = bool(holds)
+        assert fired == expected
+
+
+def test_baseline_multiples_and_persistence(tmp_path):
+    path = str(tmp_path / 'alerts.json')
+    engine = AlertEngine(path=path)
+    engine.set_baseline('avg_volume_20', pd.Series({'NABIL': 1000.0, 'SCB': np.nan}))
+    engine.add([Rule('NABIL', 'Vol', 'above', 3, baseline='avg_volume_20'),
+                Rule('SCB', 'Vol', 'above', 3, baseline='avg_volume_20')])
+    delta = pd.DataFrame({'Symbol': ['NABIL', 'SCB'], 'Vol': [3500, 10 ** 6]})
+    fired = engine.evaluate(delta)
+    assert list(fired['Symbol']) == ['NABIL'] and fired['Threshold'].iloc[0] == 3000
+    with open(path) as f:
+        assert json.load(f)['active'] == []                 # crossings go to the state log
+    with open(path + '.state') as f:
+        assert [json.loads(line) for line in f] == [{'on': ['r1'], 'off': []}]
+
+    reloaded = AlertEngine(path=path)
+    assert len(reloaded) == 2
+    assert reloaded.rules().loc['r1', 'active']
+    assert reloaded.evaluate(delta).empty                   # already fired before the restart
+    assert list(reloaded.add([Rule('SCB', 'LTP', 'below', 600)])) == ['r3']
+    with pytest.raises(ValueError):
+        reloaded.add([Rule('SCB', 'LTP', 'crosses', 600)])
+    reloaded.remove(['r1'])
+    assert list(AlertEngine(path=path).rules().index) == ['r2', 'r3']
+    assert not os.path.exists(path + '.state')             # folded into the full save
+
+
+def test_watch_evaluates_live_deltas(monkeypatch, snapshot_html):
+    scraper = ShareSansarScraper()
+    base = scraper._parse_response(snapshot_html, '2024-01-02')
+    moved = base.copy()
+    moved.loc[moved['Symbol'] == 'SCB', 'LTP'] = 650.0
+    frames = iter([base, base, moved])
+    monkeypatch.setattr(scraper, 'get_today_data', lambda date=None, sector=None: next(frames))
+    monkeypatch.setattr(alerts.live.time, 'sleep', lambda s: None)
+
+    engine = AlertEngine([Rule('SCB', 'LTP', 'above', 640), Rule('NICA', 'LTP', 'above', 700)])
+    fired = [a for _, a in alerts.watch(engine, scraper=scraper, max_polls=3)]
+    assert list(fired[0]['Symbol']) == ['NICA']
+    assert fired[1].empty
+    assert list(fired[2]['Symbol']) == ['SCB']
@@ -0,0 +1,72 @@
+"""Offline tests for the running z-score anomaly detector."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sharesansar.anomaly import AnomalyDetector
+
+
+@pytest.fixture
+def panel():
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range('2024-01-01', periods=60)
+    symbols = ['NABIL', 'NICA', 'SCB']
+    volume = pd.DataFrame(np.exp(rng.normal(9, 0.2, (60, 3))).round(), index=dates,
+                          columns=symbols)
+    change = pd.DataFrame(rng.normal(0, 1, (60, 3)).round(2), index=dates, columns=symbols)
+    volume.iloc[50, 1] *= 20          # NICA volume spike
+    change.iloc[55, 2] = -9.5         # SCB crash
+    volume.iloc[:30, 0] = np.nan      # NABIL lists on day 30
+    change.iloc[:30, 0] = np.nan
+    return {'Vol': volume, 'ChangePercent': change}
+
+
+def _snapshot(panel, i):
+    return pd.DataFrame({'Symbol': panel['Vol'].columns,
+                         'Vol': panel['Vol'].iloc[i].to_numpy(),
+                         'ChangePercent': panel['ChangePercent'].iloc[i].to_numpy()})
+
+
+def test_fit_flags_spikes_in_one_pass(panel):
+    detector = AnomalyDetector(fields=['Vol', 'ChangePercent'], threshold=4.0)
+    flags = detector.fit(panel)
+    found = set(zip(flags['Date'], flags['Symbol'], flags['Field']))
+    assert (panel['Vol'].index[50].strftime('%Y-%m-%d'), 'NICA', 'Vol') in found
+    assert (panel['Vol'].index[55].strftime('%Y-%m-%d'), 'SCB', 'ChangePercent') in found
+    assert len(flags) == 2
+    spike = flags[flags['Symbol'] == 'NICA'].iloc[0]
+    assert spike['Value'] == panel['Vol'].iloc[50, 1]
+    assert spike['Typical'] == pytest.approx(np.expm1(np.log1p(panel['Vol'].iloc[:50, 1]).mean()))
+
+
+def test_live_updates_match_the_retrospective_pass(panel):
+    fitted = AnomalyDetector(fields=['Vol', 'ChangePercent'], threshold=4.0)
+    expected = fitted.fit(panel)
+
+    live = AnomalyDetector(fields=['Vol', 'ChangePercent'], threshold=4.0)
+    flags = []
+    for i, date in enumerate(panel['Vol'].index):
+        day = live.update(_snapshot(panel, i))
+        flags.append(day.assign(Date=date.strftime('%Y-%m-%d')))
+    got = pd.concat(flags, ignore_index=True)
+    assert sorted(zip(got['Date'], got['Symbol'], got['Field'])) == sorted(
+        zip(expected['Date'], expected['Symbol'], expected['Field']))
+
+    stats = live.stats()
+    np.testing.assert_allclose(stats[('Std', 'ChangePercent')].reindex(panel['Vol'].columns),
+                               panel['ChangePercent'].std().to_numpy())
+    assert stats[('Count', 'Vol')]['NABIL'] == 30
+
+
+def test_short_history_and_falls_are_not_volume_flags(panel):
+    detector = AnomalyDetector(fields=['Vol'], threshold=3.0, min_periods=40)
+    detector.fit({'Vol': panel['Vol'].iloc[:45]})
+    z = detector.score(pd.DataFrame({'Symbol': ['NABIL', 'NICA', 'NEW'],
+                                     'Vol': [1e9, 1.0, 1e9]}))
+    assert np.isnan(z.loc['NABIL', 'Vol'])     # only 15 sessions so far
+    assert np.isnan(z.loc['NEW', 'Vol'])
+    assert 'NEW' not in detector.symbols           # scoring does not add symbols
+    assert z.loc['NICA', 'Vol'] < -3.0
+    flags = detector.update(pd.DataFrame({'Symbol': ['NICA'], 'Vol': [1.0]}))
+    assert flags.empty
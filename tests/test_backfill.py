@@ -0,0 +1,119 @@
+"""Offline tests for the trading calendar, snapshot store and backfill engine."""
+
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+from sharesansar.backfill import Backfill
+from sharesansar.scraper import ShareSansarScraper
+from sharesansar.store import SnapshotStore
+from sharesansar.trading_calendar import NEPAL_TZ, last_closed_day, trading_days
+
+from conftest import NO_RECORD_HTML
+
+
+def test_trading_days_skip_friday_and_saturday():
+    # 2024-01-05 is a Friday, 2024-01-06 a Saturday
+    assert trading_days('2024-01-04', '2024-01-08') == ['2024-01-04', '2024-01-07', '2024-01-08']
+    assert trading_days('2024-01-04', '2024-01-08', holidays=['2024-01-07']) == [
+        '2024-01-04', '2024-01-08']
+
+
+def test_last_closed_day_turns_over_at_the_close():
+    assert str(last_closed_day(datetime(2024, 1, 4, 14, 59, tzinfo=NEPAL_TZ))) == '2024-01-03'
+    assert str(last_closed_day(datetime(2024, 1, 4, 15, 0, tzinfo=NEPAL_TZ))) == '2024-01-04'
+
+
+@pytest.fixture
+def scraper(monkeypatch, snapshot_html):
+    scraper = ShareSansarScraper()
+    scraper.calls = []
+
+    def get_today_data(date=None, sector=None):
+        scraper.calls.append(date)
+        if date == '2024-01-02':
+            return scraper._parse_response(NO_RECORD_HTML, date)
+        if date in scraper.broken:
+            raise ConnectionError('boom')
+        return scraper._parse_response(snapshot_html, date)
+
+    scraper.broken = {'2024-01-03'}
+    monkeypatch.setattr(scraper, 'get_today_data', get_today_data)
+    return scraper
+
+
+def test_backfill_stores_sessions_and_checkpoints(tmp_path, scraper):
+    store = SnapshotStore(str(tmp_path))
+    progress = Backfill(store, scraper, rate=None).run('2024-01-01', '2024-01-04')
+
+    assert store.dates() == ['2024-01-01', '2024-01-04']
+    assert store.non_trading_dates() == {'2024-01-02'}
+    assert progress.failed_dates == {'2024-01-03': 'ConnectionError'}
+    assert progress.done == progress.total == 4
+
+    with open(os.path.join(str(tmp_path), '_backfill.json')) as f:
+        checkpoint = json.load(f)
+    assert checkpoint['status'] == 'complete'
+    assert checkpoint['failed_dates'] == {'2024-01-03': 'ConnectionError'}
+
+    # Resume: only the failed session is fetched again
+    scraper.calls.clear()
+    scraper.broken = set()
+    progress = Backfill(SnapshotStore(str(tmp_path)), scraper, rate=None).run('2024-01-01', '2024-01-04')
+    assert scraper.calls == ['2024-01-03']
+    assert progress.stored == 1
+
+
+def test_interrupted_backfill_keeps_written_sessions(tmp_path, scraper):
+    scraper.broken = set()
+    store = SnapshotStore(str(tmp_path))
+
+    def stop_after_first(progress):
+        if progress.done == 1:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        Backfill(store, scraper, rate=None, progress=stop_after_first).run('2024-01-01', '2024-01-04')
+
+    assert store.dates() == ['2024-01-01']
+    with open(os.path.join(str(tmp_path), '_backfill.json')) as f:
+        assert json.load(f)['status'] == 'interrupted'
+
+    scraper.calls.clear()
+    Backfill(SnapshotStore(str(tmp_path)), scraper, rate=None).run('2024-01-01', '2024-01-04')
+    assert scraper.calls == ['2024-01-02', '2024-01-03', '2024-01-04']
+
+
+def test_store_scan_filters_symbols_and_columns(tmp_path, scraper):
+    scraper.broken = set()
+    store = SnapshotStore(str(tmp_path))
+    Backfill(store, scraper, rate=None).run('2024-01-01', '2024-01-04')
+
+    df = store.scan(symbols=['nabil'], start='2024-01-03', columns=['LTP'])
+    assert list(df.columns) == ['Date', 'Symbol', 'LTP']
+    assert list(df['Date']) == ['2024-01-03', '2024-01-04']
+
+
+def test_backfill_stops_at_last_closed_session(tmp_path, scraper, monkeypatch):
+    # 2024-01-04 11:30 NPT: the session is open, so today is neither stored nor marked closed
+    morning = datetime(2024, 1, 4, 11, 30, tzinfo=NEPAL_TZ)
+    monkeypatch.setattr('sharesansar.backfill.nepal_now', lambda: morning)
+    store = SnapshotStore(str(tmp_path))
+    backfill = Backfill(store, scraper, rate=None)
+
+    assert backfill.pending('2024-01-01', '2024-01-10') == ['2024-01-01', '2024-01-02', '2024-01-03']
+    backfill.run_dates(['2024-01-04', '2024-01-07'])
+    assert scraper.calls == []
+    assert not store.covers('2024-01-04', '2024-01-04')
+
+    # After the close today is fetched, but "No Record Found" is not made permanent
+    evening = datetime(2024, 1, 4, 15, 5, tzinfo=NEPAL_TZ)
+    monkeypatch.setattr('sharesansar.backfill.nepal_now', lambda: evening)
+    monkeypatch.setattr(scraper, 'get_today_data',
+                        lambda date=None, sector=None: scraper._parse_response(NO_RECORD_HTML, date))
+    assert backfill.pending('2024-01-04', '2024-01-04') == ['2024-01-04']
+    progress = backfill.run('2024-01-04', '2024-01-04')
+    assert progress.non_trading == 1
+    assert store.non_trading_dates() == set()
@@ -0,0 +1,62 @@
+"""Offline tests for the panel backtester and NEPSE cost model."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sharesansar.backtest import NepseCosts, run, sweep, target_weights
+
+FREE = NepseCosts(tiers=((float('inf'), 0.0),), min_commission=0.0, sebon_rate=0.0,
+                  dp_charge=0.0)
+
+
+def momentum(prices, lookback):
+    return prices > prices.shift(lookback)
+
+
+@pytest.fixture
+def prices():
+    dates = pd.DatetimeIndex(pd.date_range('2024-01-01', periods=6), name='Date')
+    return pd.DataFrame({'NABIL': [100, 100, 110, 121, 121, 110],
+                         'SCB': [200, 190, 180, 170, 160, 150]},
+                        index=dates, dtype=float)
+
+
+def test_commission_tiers_and_charges():
+    costs = NepseCosts()
+    np.testing.assert_allclose(costs.commission([1_000, 50_000, 50_001, 3_000_000, 0]),
+                               [10.0, 180.0, 50_001 * 0.0033, 3_000_000 * 0.0027, 0.0])
+    assert costs.cost([100_000], sell=True)[0] == pytest.approx(330 + 15 + 25)
+    assert costs.cost([100_000], sell=False)[0] == pytest.approx(330 + 15)
+
+
+def test_target_weights_sizing(prices):
+    scores = pd.DataFrame({'A': [3.0, 0.0], 'B': [2.0, 1.0], 'C': [1.0, np.nan]})
+    weights = target_weights(scores, max_positions=2)
+    assert weights.iloc[0].tolist() == [0.5, 0.5, 0.0]
+    assert weights.iloc[1].tolist() == [0.0, 1.0, 0.0]
+    assert target_weights(scores > 0, max_weight=0.25).iloc[0].tolist() == [0.25] * 3
+
+
+def test_run_trades_next_session_with_lots(prices):
+    signals = pd.DataFrame({'NABIL': [True] * 4 + [False] * 2, 'SCB': False}, index=prices.index)
+    result = run(signals, prices, capital=10_005, costs=FREE)
+    # Signal on day 0 buys at day 1's close; the exit signal on day 4 sells on day 5
+    assert result.positions['NABIL'].tolist() == [0, 100, 100, 100, 100, 0]
+    np.testing.assert_allclose(result.equity, [10_005, 10_005, 11_005, 12_105, 12_105, 11_005])
+    assert result.trades == 2
+
+    charged = run(signals, prices, capital=10_100)
+    # Buy 10,000 (36 commission, 1.5 SEBON); sell 11,000 (39.6, 1.65, DP 25)
+    assert charged.costs == pytest.approx(36 + 1.5 + 39.6 + 1.65 + 25)
+    assert charged.equity.iloc[-1] == pytest.approx(10_100 + 1_000 - charged.costs)
+    # Not enough cash for fees on 100 shares: the buy is scaled down a lot
+    assert run(signals, prices, capital=10_005).positions['NABIL'].max() == 90
+    assert result.summary()['max_drawdown'] == pytest.approx(11_005 / 12_105 - 1)
+
+
+def test_sweep_in_process_and_pool(prices):
+    inline = sweep(momentum, {'lookback': [1, 2]}, prices, processes=1, costs=FREE)
+    pooled = sweep(momentum, {'lookback': [1, 2]}, prices, processes=2, costs=FREE)
+    assert inline['lookback'].tolist() == [1, 2]
+    pd.testing.assert_frame_equal(inline, pooled)
@@ -0,0 +1,123 @@
+"""Offline tests for the command-line interface."""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from sharesansar import cli
+from sharesansar.scraper import ShareSansarScraper
+from sharesansar.store import open_store
+
+from conftest import NO_RECORD_HTML
+
+
+@pytest.fixture
+def fake_scraper(monkeypatch, snapshot_html):
+    scraper = ShareSansarScraper()
+
+    def get_today_data(date=None, sector=None):
+        date = date or '2024-01-01'
+        html = NO_RECORD_HTML if date == '2024-01-02' else snapshot_html
+        return scraper._parse_response(html, date)
+
+    monkeypatch.setattr(scraper, 'get_today_data', get_today_data)
+    monkeypatch.setattr(cli, '_make_scraper', lambda args: scraper)
+    monkeypatch.setattr(cli, '_save_scraper', lambda args, s: None)
+    return scraper
+
+
+def test_help_does_not_need_heavy_imports():
+    with pytest.raises(SystemExit) as exc:
+        cli.main(['--help'])
+    assert exc.value.code == 0
+
+
+def test_download_streams_csv(fake_scraper, capsys):
+    code = cli.main(['download', 'NABIL', 'scb', '--start', '2024-01-01',
+                     '--end', '2024-01-03', '--rate', '0'])
+    lines = capsys.readouterr().out.strip().splitlines()
+    assert code == 0
+    assert lines[0].startswith('SNo,Symbol')
+    assert len(lines) == 1 + 4  # header + 2 symbols x 2 trading days
+
+
+def test_start_without_end_runs_to_yesterday():
+    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
+    args = cli.build_parser().parse_args(['download', 'NABIL', '--start', '2024-01-01'])
+    assert cli._resolve_range(args) == ('2024-01-01', yesterday)
+
+
+def test_quote_jsonl(fake_scraper, capsys):
+    assert cli.main(['quote', 'NICA', '--format', 'jsonl']) == 0
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r['Symbol'] for r in records] == ['NICA']
+
+
+def test_backfill_fills_store_and_resumes(fake_scraper, tmp_path, capsys):
+    store_dir = str(tmp_path / 'store')
+    args = ['backfill', '--start', '2024-01-01', '--end', '2024-01-03',
+            '--store', store_dir, '--rate', '0', '--workers', '2']
+    assert cli.main(args) == 0
+    assert open_store(store_dir).dates() == ['2024-01-01', '2024-01-03']
+
+    calls = []
+    original = fake_scraper.get_today_data
+    fake_scraper.get_today_data = lambda date=None, sector=None: calls.append(date) or original(date)
+    assert cli.main(args) == 0
+    assert calls == []
+    assert '0/0 sessions' in capsys.readouterr().err
+
+
+def test_session_round_trip(tmp_path):
+    from datetime import datetime
+
+    path = str(tmp_path / 'session.json')
+    scraper = ShareSansarScraper()
+    scraper._token = 'tok'
+    scraper._token_timestamp = datetime.now()
+    scraper.session.cookies.set('laravel_session', 'abc')
+    scraper.save_session(path)
+
+    restored = ShareSansarScraper()
+    assert restored.load_session(path)
+    assert restored._get_csrf_token() == 'tok'
+    assert restored.session.cookies.get('laravel_session') == 'abc'
+
+
+def test_rate_limiter_spaces_calls():
+    from sharesansar.utils import RateLimiter
+
+    limiter = RateLimiter(rate=50)
+    waits = [limiter.acquire() for _ in range(4)]
+    assert waits[0] == 0
+    assert sum(waits) > 0.04
+
+
+def test_parquet_needs_output_before_fetching(fake_scraper, monkeypatch):
+    monkeypatch.setattr(fake_scraper, 'get_today_data', lambda *a, **k: pytest.fail('fetched'))
+    with pytest.raises(SystemExit) as exc:
+        cli.main(['snapshot', '--format', 'parquet'])
+    assert exc.value.code == 2
+
+
+def test_parquet_schema_tolerates_nan_in_later_chunks(fake_scraper, monkeypatch, tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    original = fake_scraper.get_today_data
+
+    def get_today_data(date=None, sector=None):
+        df = original(date)
+        if date == '2024-01-01':
+            df['VWAP'] = None                     # column failed to parse this session
+        else:
+            df['Vol'] = df['Vol'].where(df['Symbol'] != 'NABIL')
+        return df
+
+    monkeypatch.setattr(fake_scraper, 'get_today_data', get_today_data)
+    path = str(tmp_path / 'out.parquet')
+    assert cli.main(['download', 'NABIL', 'SCB', '--start', '2024-01-01', '--end', '2024-01-03',
+                     '--rate', '0', '-o', path]) == 0
+    table = pq.read_table(path)
+    assert str(table.schema.field('Vol').type) == 'double'
+    assert table.column('Vol').null_count == 1 and table.num_rows == 4
+    assert table.column('VWAP').null_count == 2
@@ -0,0 +1,84 @@
+"""Offline tests for the memory-mapped price cube."""
+
+import numpy as np
+import pytest
+
+from sharesansar.backfill import Backfill
+from sharesansar.cube import PriceCube
+from sharesansar.scraper import ShareSansarScraper
+from sharesansar.store import SnapshotStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, snapshot_html):
+    scraper = ShareSansarScraper()
+    monkeypatch.setattr(scraper, 'get_today_data',
+                        lambda date=None, sector=None: scraper._parse_response(snapshot_html, date))
+    store = SnapshotStore(str(tmp_path / 'store'))
+    Backfill(store, scraper, rate=None).run('2024-01-01', '2024-01-04')
+    return store
+
+
+def test_build_from_store(tmp_path, store):
+    cube = PriceCube.build(str(tmp_path / 'cube'), store)
+    assert cube.dates == store.dates()
+    assert cube.symbols == ['NABIL', 'NICA', 'SCB']
+    assert cube.values.shape == (len(cube.dates), 3, 7)
+    nabil = store.read('2024-01-02').set_index('Symbol').loc['NABIL']
+    assert cube.cross_section('2024-01-02', 'LTP')[cube.symbol_index['NABIL']] == nabil['LTP']
+    assert cube.series('NABIL', 'Vol')[0] == nabil['Vol']
+
+
+def test_views_are_zero_copy(tmp_path, store):
+    cube = PriceCube.build(str(tmp_path / 'cube'), store)
+    assert np.shares_memory(cube.series('SCB'), cube._data)
+    assert np.shares_memory(cube.field('Close'), cube._data)
+    assert np.shares_memory(cube.cross_section('2024-01-01'), cube._data)
+
+
+def test_append_grows_sessions_and_symbols(tmp_path, store):
+    cube = PriceCube(str(tmp_path / 'cube'), symbol_capacity=2, session_capacity=1)
+    for date in store.dates():
+        cube.append(date, store.read(date))
+    df = store.read('2024-01-01').copy()
+    df['Symbol'] = df['Symbol'] + 'X'
+    cube.append('2024-01-05', df)
+
+    assert len(cube) == len(store.dates()) + 1
+    assert len(cube.symbols) == 6
+    assert cube._symbol_capacity >= 6
+    # New symbols are NaN before they listed, old ones NaN after they vanish
+    assert np.isnan(cube.series('NABILX')[0])
+    assert np.isnan(cube.cross_section('2024-01-05', 'LTP')[cube.symbol_index['NABIL']])
+    assert cube.series('NABIL')[0] == store.read('2024-01-01').set_index('Symbol').loc['NABIL', 'LTP']
+
+    with pytest.raises(ValueError):
+        cube.append('2023-12-31', df)
+
+
+def test_reader_process_view(tmp_path, store):
+    root = str(tmp_path / 'cube')
+    writer = PriceCube.build(root, store, end='2024-01-02')
+    reader = PriceCube(root, readonly=True)
+    assert reader.dates == writer.dates
+    writer.append('2024-01-03', store.read('2024-01-03'))
+    reader.refresh()
+    assert reader.dates[-1] == '2024-01-03'
+    np.testing.assert_array_equal(reader.field('LTP'), writer.field('LTP'))
+    frame = reader.to_frame('Close')
+    assert list(frame.columns) == writer.symbols
+
+
+def test_append_writes_only_new_metadata(tmp_path, store):
+    root = tmp_path / 'cube'
+    cube = PriceCube.build(str(root), store, end='2024-01-02')
+    meta = (root / 'meta.json').stat().st_ino
+    cube.append('2024-01-03', store.read('2024-01-03'))
+    assert (root / 'meta.json').stat().st_ino == meta        # capacity unchanged: not rewritten
+    assert (root / 'dates.txt').read_text().splitlines()[-1] == '2024-01-03'
+    assert cube.date_index['2024-01-03'] == len(cube) - 1
+
+    with open(root / 'dates.txt', 'a') as f:
+        f.write('2024-01-0')                                  # writer mid-line
+    reader = PriceCube(str(root), readonly=True)
+    assert reader.dates == cube.dates
@@ -0,0 +1,68 @@
+"""Offline tests for gap detection and repair."""
+
+import pandas as pd
+
+from sharesansar.gaps import repair, scan_gaps
+from sharesansar.scraper import ShareSansarScraper
+from sharesansar.store import SnapshotStore
+from sharesansar.trading_calendar import trading_days
+
+
+def _frame(date, rows=10, null_prices=0):
+    ltp = [100.0] * (rows - null_prices) + [float('nan')] * null_prices
+    return pd.DataFrame({'Symbol': [f'S{i}' for i in range(rows)], 'LTP': ltp,
+                         'Close': ltp, 'Date': date})
+
+
+def _build_store(root):
+    store = SnapshotStore(root)
+    days = trading_days('2024-01-01', '2024-01-31')
+    for d in days:
+        if d in ('2024-01-10', '2024-01-29'):
+            continue  # missing; the 29th is a known holiday
+        if d == '2024-01-15':
+            store.write(d, _frame(d, rows=3))  # thin
+        elif d == '2024-01-22':
+            store.write(d, _frame(d, null_prices=6))  # partial
+        else:
+            store.write(d, _frame(d))
+    store.mark_non_trading(['2024-01-29'])
+    return store
+
+
+def test_scan_flags_missing_thin_and_partial(tmp_path):
+    store = _build_store(str(tmp_path))
+    report = scan_gaps(store)
+
+    assert report.missing == ['2024-01-10']
+    assert report.thin == {'2024-01-15': 3}
+    assert list(report.partial) == ['2024-01-22']
+    assert report.dates_to_repair == ['2024-01-10', '2024-01-15', '2024-01-22']
+
+
+def test_scan_uses_index_without_reading_sessions(tmp_path, monkeypatch):
+    _build_store(str(tmp_path))
+    store = SnapshotStore(str(tmp_path))
+
+    def fail(*args, **kwargs):
+        raise AssertionError('snapshot file opened')
+
+    monkeypatch.setattr(store, 'read', fail)
+    assert not scan_gaps(store).ok
+
+
+def test_repair_refetches_only_flagged_dates(tmp_path, monkeypatch):
+    store = _build_store(str(tmp_path))
+    scraper = ShareSansarScraper()
+    calls = []
+
+    def get_today_data(date=None, sector=None):
+        calls.append(date)
+        return _frame(date)
+
+    monkeypatch.setattr(scraper, 'get_today_data', get_today_data)
+    progress = repair(store, scan_gaps(store), scraper=scraper, rate=None)
+
+    assert calls == ['2024-01-10', '2024-01-15', '2024-01-22']
+    assert progress.stored == 3
+    assert scan_gaps(store).ok
@@ -0,0 +1,88 @@
+"""Offline tests for structured history results and logging."""
+
+import logging
+from datetime import datetime
+
+import pytest
+import requests
+
+from sharesansar import scraper as scraper_module
+from sharesansar.scraper import (FetchError, HTTPStatusError, NoTradingDataError,
+                                  ShareSansarScraper)
+
+from conftest import NO_RECORD_HTML
+
+
+@pytest.fixture
+def offline_scraper(monkeypatch, snapshot_html):
+    """Scraper whose fetches come from canned HTML keyed by date."""
+    monkeypatch.setattr(scraper_module.time, 'sleep', lambda s: None)
+    scraper = ShareSansarScraper()
+    responses = {
+        '2024-01-01': snapshot_html,
+        '2024-01-02': NO_RECORD_HTML,
+        '2024-01-04': snapshot_html,
+    }
+
+    def get_today_data(date=None, sector=None):
+        if date == '2024-01-03':
+            raise ConnectionError('reset by peer')
+        return scraper._parse_response(responses[date], date)
+
+    monkeypatch.setattr(scraper, 'get_today_data', get_today_data)
+    return scraper
+
+
+def test_no_record_found_raises_no_trading_data():
+    with pytest.raises(NoTradingDataError):
+        ShareSansarScraper()._parse_response(NO_RECORD_HTML, '2024-01-02')
+
+
+def test_fetch_history_classifies_dates(offline_scraper, caplog):
+    with caplog.at_level(logging.WARNING, logger='sharesansar.scraper'):
+        result = offline_scraper.fetch_history('NABIL', '2024-01-01', '2024-01-04')
+
+    assert result.fetched_dates == ['2024-01-01', '2024-01-04']
+    assert result.skipped_dates == ['2024-01-02']
+    assert result.failed_dates == {'2024-01-03': 'ConnectionError'}
+    assert not result.ok
+    assert list(result.data['Date']) == ['2024-01-01', '2024-01-04']
+    assert '2024-01-03' in caplog.text
+
+
+def test_retry_only_failed_dates(offline_scraper):
+    first = offline_scraper.fetch_history('SCB', '2024-01-01', '2024-01-02')
+    assert first.ok
+    retry = offline_scraper.fetch_history('SCB', dates=['2024-01-04'])
+    assert retry.fetched_dates == ['2024-01-04']
+    assert len(retry.data) == 1
+
+
+def test_get_historical_data_returns_frame(offline_scraper, capsys):
+    df = offline_scraper.get_historical_data('NICA', '2024-01-01', '2024-01-04')
+    assert len(df) == 2
+    assert capsys.readouterr().out == ''
+
+
+def test_failures_are_typed(monkeypatch):
+    scraper = ShareSansarScraper()
+    scraper._token, scraper._token_timestamp = 'tok', datetime.now()
+
+    class Response:
+        def __init__(self, status_code, text):
+            self.status_code, self.text, self.content = status_code, text, text.encode()
+
+    def request(method, url, data=None, **kwargs):
+        if data['date'] == '2024-01-01':
+            raise requests.ConnectionError('reset by peer')
+        if data['date'] == '2024-01-02':
+            return Response(503, 'unavailable')
+        return Response(200, '<p>not a table</p>')
+
+    monkeypatch.setattr(scraper.session, 'request', request)
+    result = scraper.fetch_history('NABIL', '2024-01-01', '2024-01-03', rate=None)
+    assert result.failed_dates == {'2024-01-01': 'NetworkError', '2024-01-02': 'HTTPStatusError',
+                                   '2024-01-03': 'ParseError'}
+    with pytest.raises(HTTPStatusError) as excinfo:
+        scraper.get_today_data('2024-01-02')
+    assert excinfo.value.status_code == 503 and isinstance(excinfo.value, FetchError)
@@ -0,0 +1,42 @@
+"""Import-time regression guard for ``import sharesansar``."""
+
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ('pandas', 'numpy', 'requests', 'bs4', 'lxml')
+
+# Generous budget: the package itself should import in a few milliseconds.
+IMPORT_BUDGET_SECONDS = 0.25
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import sharesansar
+elapsed = time.perf_counter() - start
+print(json.dumps({'elapsed': elapsed,
+                  'loaded': [m for m in %r if m in sys.modules]}))
+"""
+
+
+def _probe():
+    out = subprocess.run([sys.executable, '-c', _PROBE % (HEAVY_MODULES,)],
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out)
+
+
+def test_import_does_not_load_heavy_dependencies():
+    assert _probe()['loaded'] == []
+
+
+def test_import_time_budget():
+    best = min(_probe()['elapsed'] for _ in range(3))
+    assert best < IMPORT_BUDGET_SECONDS, f"import sharesansar took {best * 1000:.1f} ms"
+
+
+def test_lazy_attributes_resolve():
+    import sharesansar as ss
+    assert callable(ss.download)
+    assert ss.Ticker.__module__ == 'sharesansar.api'
+    assert 'get_market_data' in dir(ss)
+    assert ss.metrics.REGISTRY is not None
@@ -0,0 +1,80 @@
+"""Offline tests for the vectorized indicator library."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sharesansar import indicators as ind
+
+
+@pytest.fixture
+def panel():
+    rng = np.random.default_rng(7)
+    dates = pd.date_range('2024-01-01', periods=60, name='Date')
+    close = pd.DataFrame(100 + rng.normal(0, 2, (60, 4)).cumsum(axis=0), index=dates,
+                         columns=pd.Index(['NABIL', 'SCB', 'NICA', 'NEWCO'], name='Symbol'))
+    close.iloc[20:23, 1] = np.nan          # SCB halted for three sessions
+    close.iloc[:40, 3] = np.nan            # NEWCO lists on session 40
+    high = close + rng.uniform(0, 3, close.shape)
+    low = close - rng.uniform(0, 3, close.shape)
+    return high, low, close
+
+
+def test_single_series_matches_panel_column(panel):
+    _, _, close = panel
+    nabil = close['NABIL']
+    pd.testing.assert_series_equal(ind.sma(nabil, 5), ind.sma(close, 5)['NABIL'])
+    pd.testing.assert_series_equal(ind.rsi(nabil), ind.rsi(close)['NABIL'])
+    values = ind.ema(nabil.to_numpy(), 10)
+    np.testing.assert_allclose(values, ind.ema(close, 10)['NABIL'].to_numpy())
+    assert ind.sma(nabil, 5).iloc[4] == pytest.approx(nabil.iloc[:5].mean())
+
+
+def test_reference_values():
+    close = pd.Series([1.0, 2.0, 3.0, 2.0, 4.0])
+    np.testing.assert_allclose(ind.ema(close, 3), [1.0, 1.5, 2.25, 2.125, 3.0625])
+    # gains 1, 1, 0, 2; losses 0, 0, 1, 0 with Wilder alpha 1/2
+    assert ind.rsi(close, 2).iloc[-1] == pytest.approx(100 - 100 / (1 + 1.25 / 0.25))
+    bands = ind.bollinger(close, 3, k=1)
+    assert bands.upper.iloc[-1] == pytest.approx(3 + np.std([3.0, 2.0, 4.0]))
+    hist = ind.macd(close, 2, 3, 2).hist
+    assert np.isfinite(hist).all()
+    assert ind.rsi(pd.Series([5.0] * 4), 2).iloc[-1] == 50
+
+
+def test_incremental_update_matches_recompute(panel):
+    high, low, close = panel
+    head = slice(None, -1)
+    last_h, last_l, last_c = high.iloc[-1], low.iloc[-1], close.iloc[-1]
+
+    ema = ind.EMA(10)
+    ema.fit(close.iloc[head])
+    np.testing.assert_allclose(ema.update(last_c), ind.ema(close, 10).iloc[-1])
+
+    rsi = ind.RSI(14)
+    rsi.fit(close.iloc[head])
+    np.testing.assert_allclose(rsi.update(last_c), ind.rsi(close).iloc[-1])
+
+    macd = ind.MACD()
+    macd.fit(close.iloc[head])
+    batch = ind.macd(close)
+    for got, want in zip(macd.update(last_c), batch):
+        np.testing.assert_allclose(got, want.iloc[-1])
+
+    atr = ind.ATR(14)
+    atr.fit(high.iloc[head], low.iloc[head], close.iloc[head])
+    np.testing.assert_allclose(atr.update(last_h, last_l, last_c),
+                               ind.atr(high, low, close).iloc[-1])
+
+
+def test_update_adds_new_symbols(panel):
+    _, _, close = panel
+    ema = ind.EMA(5)
+    ema.fit(close[['NABIL']])
+    out = ema.update(pd.Series({'NABIL': 120.0, 'IPO': 50.0}))
+    assert list(out.index) == ['NABIL', 'IPO']
+    assert out['IPO'] == 50.0
+
+    scalar = ind.RSI(3)
+    scalar.fit(close['NABIL'].to_numpy())
+    assert isinstance(scalar.update(101.0), float)
@@ -0,0 +1,88 @@
+"""Offline tests for per-stage instrumentation."""
+
+import io
+import threading
+
+import sharesansar as ss
+from sharesansar import instrumentation
+from sharesansar.scraper import ShareSansarScraper
+
+
+def test_span_is_inert_without_hooks():
+    assert not instrumentation.enabled()
+    with instrumentation.span('parse') as stage:
+        stage.rows = 3
+    assert stage._start is None
+
+
+def test_profile_aggregates_parse_and_clean(snapshot_html):
+    scraper = ShareSansarScraper()
+    out = io.StringIO()
+    with ss.profile(file=out) as prof:
+        scraper._parse_response(snapshot_html, '2024-01-01')
+        scraper._parse_response(snapshot_html, '2024-01-02')
+
+    assert prof.stages['parse'].calls == 2
+    assert prof.stages['parse'].rows == 6
+    assert prof.stages['clean'].rows == 6
+    assert prof.stages['parse'].bytes == 2 * len(snapshot_html)
+    assert 'parse' in out.getvalue()
+    assert not instrumentation.enabled()
+
+
+def test_concurrent_profiles_see_only_their_own_spans(snapshot_html):
+    scraper = ShareSansarScraper()
+    barrier = threading.Barrier(2)
+    profiles = {}
+
+    def run(name, sessions):
+        with ss.profile(verbose=False) as prof:
+            barrier.wait()
+            for i in range(sessions):
+                scraper._parse_response(snapshot_html, f'2024-01-0{i + 1}')
+            barrier.wait()
+        profiles[name] = prof
+
+    threads = [threading.Thread(target=run, args=('a', 1)), threading.Thread(target=run, args=('b', 3))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert profiles['a'].stages['parse'].calls == 1
+    assert profiles['b'].stages['parse'].calls == 3
+    assert not instrumentation.enabled()
+
+
+def test_profile_follows_worker_threads(snapshot_html, monkeypatch):
+    scraper = ShareSansarScraper()
+    monkeypatch.setattr(scraper, 'get_today_data',
+                        lambda date=None, sector=None: scraper._parse_response(snapshot_html, date))
+    with ss.profile(verbose=False) as prof:
+        results = list(scraper.iter_market_data(['2024-01-01', '2024-01-02', '2024-01-03'],
+                                                workers=3, rate=None))
+    assert all(error is None for _, _, error in results)
+    assert prof.stages['parse'].calls == 3
+
+
+def test_token_cache_hit_is_reported():
+    scraper = ShareSansarScraper()
+    scraper._token = 'abc'
+    from datetime import datetime
+    scraper._token_timestamp = datetime.now()
+    with ss.profile(verbose=False) as prof:
+        assert scraper._get_csrf_token() == 'abc'
+    assert prof.stages['token'].cache_hits == 1
+    assert prof.stages['token'].cache_misses == 0
+
+
+def test_hook_errors_do_not_propagate():
+    def broken(event):
+        raise RuntimeError('boom')
+
+    instrumentation.add_hook(broken)
+    try:
+        with instrumentation.span('http'):
+            pass
+    finally:
+        instrumentation.remove_hook(broken)
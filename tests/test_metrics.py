@@ -0,0 +1,60 @@
+"""Offline tests for the Prometheus metrics registry."""
+
+import urllib.request
+
+import pytest
+
+from sharesansar import metrics
+from sharesansar.scraper import ShareSansarScraper
+
+
+def test_counter_and_histogram_render():
+    registry = metrics.Registry()
+    requests_total = metrics.Counter('t_requests_total', 'Requests.', ['endpoint', 'status'],
+                                     registry=registry)
+    latency = metrics.Histogram('t_latency_seconds', 'Latency.', buckets=(0.1, 1.0),
+                                registry=registry)
+
+    requests_total.labels('ajax', 200).inc()
+    requests_total.labels('ajax', 200).inc(2)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    text = metrics.generate_latest(registry)
+    assert '# TYPE t_requests_total counter' in text
+    assert 't_requests_total{endpoint="ajax",status="200"} 3' in text
+    assert 't_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 't_latency_seconds_bucket{le="1"} 2' in text
+    assert 't_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 't_latency_seconds_count 3' in text
+
+
+def test_label_validation():
+    registry = metrics.Registry()
+    counter = metrics.Counter('t_labelled_total', 'x', ['a'], registry=registry)
+    with pytest.raises(ValueError):
+        counter.inc()
+    with pytest.raises(ValueError):
+        counter.labels('1', '2')
+    with pytest.raises(ValueError):
+        metrics.Counter('t_labelled_total', 'dup', registry=registry)
+
+
+def test_parse_failures_are_counted():
+    before = metrics.PARSE_FAILURES.value()
+    with pytest.raises(Exception):
+        ShareSansarScraper()._parse_response('<p>not a table</p>', '2024-01-01')
+    assert metrics.PARSE_FAILURES.value() == before + 1
+
+
+def test_http_server_serves_registry():
+    registry = metrics.Registry()
+    metrics.Counter('t_served_total', 'Served.', registry=registry).inc()
+    server = metrics.start_http_server(0, addr='127.0.0.1', registry=registry)
+    try:
+        port = server.server_address[1]
+        body = urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics').read().decode()
+    finally:
+        server.shutdown()
+    assert 't_served_total 1' in body
@@ -0,0 +1,104 @@
+"""Offline tests for wide download() panels."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sharesansar as ss
+from sharesansar import store as store_module
+from sharesansar.scraper import ShareSansarScraper
+from sharesansar.store import SnapshotStore
+
+from conftest import ROWS, make_snapshot_html
+
+NEWCO = ['4', 'NEWCO', '40.0', '100', '110', '95', '105', '105', '104.0', '1,000',
+         '100', '104,000', '10', '5', '15', '5.00%', '15.79%', '', '', '110', '95']
+
+
+def _rows_for(date):
+    rows = list(ROWS)
+    if date >= '2024-01-03':
+        rows.append(NEWCO)              # lists mid-range
+    if date == '2024-01-04':
+        rows = [r for r in rows if r[1] != 'NICA']   # delisted
+    return rows
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    calls = []
+
+    def fake(self, date=None, sector=None):
+        calls.append(date)
+        return self._parse_response(make_snapshot_html(_rows_for(date)), date)
+
+    monkeypatch.setattr(ShareSansarScraper, 'get_today_data', fake)
+    yield calls
+    ss.set_store(None)
+    store_module._default_store = None
+
+
+def test_wide_column_layout_aligns_listings(fetched):
+    df = ss.download(['NABIL', 'NICA', 'NEWCO'], start='2024-01-01', end='2024-01-04',
+                     layout='wide')
+    assert len(fetched) == 4                        # one fetch per session, not per symbol
+    assert list(df.index) == list(pd.to_datetime(['2024-01-01', '2024-01-02',
+                                                  '2024-01-03', '2024-01-04']))
+    assert df.columns.names == ['Field', 'Symbol']
+    assert list(df['Close'].columns) == ['NABIL', 'NEWCO', 'NICA']
+    assert df[('Close', 'NABIL')].tolist() == [505.0] * 4
+    assert df[('Vol', 'NEWCO')].isna().tolist() == [True, True, False, False]
+    assert np.isnan(df.loc['2024-01-04', ('LTP', 'NICA')])
+
+
+def test_wide_ticker_layout_and_fields(fetched):
+    df = ss.download(['scb', 'MISSING'], start='2024-01-01', end='2024-01-02',
+                     group_by='ticker', fields=['LTP', 'Vol'])
+    assert df.columns.names == ['Symbol', 'Field']
+    assert list(df.columns) == [('MISSING', 'LTP'), ('MISSING', 'Vol'),
+                                ('SCB', 'LTP'), ('SCB', 'Vol')]
+    assert df['MISSING'].isna().all().all()
+    assert df[('SCB', 'Vol')].tolist() == [4000.0, 4000.0]
+
+
+def test_stored_sessions_are_not_refetched(fetched, tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    for date in ('2024-01-01', '2024-01-02'):
+        store.write(date, ShareSansarScraper()._parse_response(
+            make_snapshot_html(_rows_for(date)), date))
+    fetched.clear()
+    ss.set_store(store)
+
+    df = ss.download(['NABIL', 'NEWCO'], start='2024-01-01', end='2024-01-04', layout='wide')
+    assert fetched == ['2024-01-03', '2024-01-04']
+    assert len(df) == 4
+    assert df[('LTP', 'NEWCO')].notna().tolist() == [False, False, True, True]
+
+    # Fully covered ranges are one store scan
+    fetched.clear()
+    covered = ss.download(['NABIL'], start='2024-01-01', end='2024-01-02', group_by='column')
+    assert fetched == []
+    assert covered[('Close', 'NABIL')].tolist() == [505.0, 505.0]
+
+
+def test_layout_is_validated(fetched):
+    with pytest.raises(ValueError):
+        ss.download('NABIL', start='2024-01-01', end='2024-01-01', layout='tall')
+    with pytest.raises(ValueError):
+        ss.download('NABIL', start='2024-01-01', end='2024-01-01', group_by='sector')
+
+
+def test_market_panel_per_field(fetched):
+    panel = ss.get_market_panel('2024-01-01', '2024-01-04', fields=['LTP', 'Vol'])
+    assert set(panel) == {'LTP', 'Vol'}
+    assert len(fetched) == 4
+    ltp = panel['LTP']
+    assert list(ltp.columns) == ['NABIL', 'NEWCO', 'NICA', 'SCB']
+    assert ltp.shape == (4, 4)
+    assert ltp['NEWCO'].isna().tolist() == [True, True, False, False]
+    assert ltp['NICA'].isna().tolist() == [False, False, False, True]
+    assert panel['Vol'].loc['2024-01-01', 'SCB'] == 4000
+
+    close = ss.get_market_panel('2024-01-02', fields='Close', symbols=['SCB'])
+    assert isinstance(close, pd.DataFrame)
+    assert close.to_dict() == {'SCB': {pd.Timestamp('2024-01-02'): 610.0}}
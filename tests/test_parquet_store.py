@@ -0,0 +1,119 @@
+"""Offline tests for the partitioned Parquet store and transparent store reads."""
+
+import os
+
+import pandas as pd
+import pytest
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+import sharesansar as ss
+from sharesansar import store as store_module
+from sharesansar.store import ParquetStore, SnapshotStore, open_store
+from sharesansar.trading_calendar import trading_days
+
+
+def _session(date, n=300):
+    return pd.DataFrame({
+        'Symbol': [f'SYM{i:03d}' for i in range(n)],
+        'LTP': [100.0 + i for i in range(n)],
+        'Close': [100.0 + i for i in range(n)],
+        'Vol': [1000 * (i + 1) for i in range(n)],
+        'Date': date,
+    })
+
+
+@pytest.fixture
+def parquet_store(tmp_path):
+    store = ParquetStore(str(tmp_path))
+    for d in trading_days('2024-01-28', '2024-02-06'):
+        store.write(d, _session(d))
+    return store
+
+
+def test_layout_is_one_symbol_sorted_file_per_month(parquet_store, tmp_path):
+    month = os.path.join(str(tmp_path), 'year=2024', 'month=01')
+    # January was merged when writing moved into February; February is still staged
+    assert os.listdir(month) == ['data.parquet']
+    assert sorted(os.listdir(os.path.join(str(tmp_path), 'year=2024', 'month=02'))) == [
+        '2024-02-01.parquet', '2024-02-04.parquet', '2024-02-05.parquet', '2024-02-06.parquet']
+
+    path = os.path.join(month, 'data.parquet')
+    table = pq.read_table(path, columns=['Symbol', 'Date'])
+    assert sorted(set(table.column('Date').to_pylist())) == ['2024-01-28', '2024-01-29',
+                                                              '2024-01-30', '2024-01-31']
+    symbols = table.column('Symbol').to_pylist()
+    assert symbols == sorted(symbols)
+
+
+def test_symbol_filter_skips_row_groups(parquet_store, tmp_path):
+    ds = pytest.importorskip('pyarrow.dataset')
+    path = os.path.join(str(tmp_path), 'year=2024', 'month=01', 'data.parquet')
+    assert pq.ParquetFile(path).metadata.num_row_groups > 2
+
+    fragment = next(ds.dataset(path).get_fragments())
+    kept = list(fragment.split_by_row_group(ds.field('Symbol').isin(['SYM007'])))
+    assert len(kept) == 1
+
+
+def test_compact_merges_staged_sessions(parquet_store, tmp_path):
+    parquet_store.compact()
+    month = os.path.join(str(tmp_path), 'year=2024', 'month=02')
+    assert os.listdir(month) == ['data.parquet']
+
+    # Rewriting a merged session stages it and the staged copy wins
+    parquet_store.write('2024-01-29', _session('2024-01-29', n=5))
+    assert len(parquet_store.read('2024-01-29')) == 5
+    assert len(parquet_store.scan(start='2024-01-29', end='2024-01-29')) == 5
+    parquet_store.compact()
+    reopened = open_store(str(tmp_path))
+    assert reopened.dates() == parquet_store.dates()
+    assert len(reopened.read('2024-01-29')) == 5
+    assert len(reopened.read('2024-01-30')) == 300
+
+    reopened.delete('2024-01-30')
+    assert reopened.dates('2024-01-01', '2024-01-31') == ['2024-01-28', '2024-01-29', '2024-01-31']
+    assert '2024-01-30' not in set(reopened.scan(start='2024-01-01', end='2024-01-31')['Date'])
+
+
+def test_scan_pushes_down_filters(parquet_store):
+    df = parquet_store.scan(symbols=['sym007', 'SYM250'], start='2024-02-01',
+                            end='2024-02-05', columns=['LTP'])
+    assert list(df.columns) == ['Date', 'Symbol', 'LTP']
+    assert sorted(df['Date'].unique()) == ['2024-02-01', '2024-02-04', '2024-02-05']
+    assert set(df['Symbol']) == {'SYM007', 'SYM250'}
+    assert len(df) == 6
+
+
+def test_reopen_rewrite_and_delete(parquet_store, tmp_path):
+    reopened = open_store(str(tmp_path))
+    assert isinstance(reopened, ParquetStore)
+    assert reopened.dates() == parquet_store.dates()
+
+    reopened.write('2024-02-01', _session('2024-02-01', n=5))
+    assert len(reopened.read('2024-02-01')) == 5
+    reopened.delete('2024-02-01')
+    assert not reopened.has('2024-02-01')
+    assert len(reopened.read('2024-02-04')) == 300
+
+
+def test_open_store_respects_existing_csv_store(tmp_path):
+    SnapshotStore(str(tmp_path))
+    assert type(open_store(str(tmp_path))) is SnapshotStore
+
+
+def test_history_and_download_read_covered_ranges_from_store(parquet_store, monkeypatch):
+    def no_network(*args, **kwargs):
+        raise AssertionError('network used')
+
+    monkeypatch.setattr('sharesansar.scraper.ShareSansarScraper.get_today_data', no_network)
+    ss.set_store(parquet_store)
+    try:
+        hist = ss.history('SYM001', start='2024-01-28', end='2024-02-06')
+        assert list(hist['Date']) == trading_days('2024-01-28', '2024-02-06')
+
+        data = ss.download(['SYM002', 'SYM001'], start='2024-02-01', end='2024-02-04')
+        assert list(data['Symbol']) == ['SYM001'] * 2 + ['SYM002'] * 2
+    finally:
+        ss.set_store(None)
+        store_module._default_store = None
@@ -0,0 +1,104 @@
+"""Offline tests for live deltas and sparse portfolio valuation."""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sharesansar import live
+from sharesansar.portfolio import PortfolioBook
+from sharesansar.scraper import NoTradingDataError, ShareSansarScraper
+
+
+@pytest.fixture
+def snapshot(snapshot_html):
+    return ShareSansarScraper()._parse_response(snapshot_html, '2024-01-02')
+
+
+@pytest.fixture
+def holdings():
+    rng = np.random.default_rng(1)
+    n = 500
+    return pd.DataFrame({
+        'Portfolio': rng.integers(0, 120, n).astype(str),
+        'Symbol': rng.choice(['NABIL', 'SCB', 'nica', 'DELISTED'], n),
+        'Quantity': rng.integers(10, 1000, n).astype(float),
+        'Cost': rng.uniform(300, 900, n),
+    })
+
+
+def _naive(holdings, snapshot):
+    prices = snapshot.set_index('Symbol')
+    h = holdings.assign(Symbol=holdings['Symbol'].str.upper())
+    h['mv'] = h['Quantity'] * h['Symbol'].map(prices['LTP']).fillna(0)
+    h['pv'] = h['Quantity'] * h['Symbol'].map(prices['PrevClose']).fillna(0)
+    h['cost'] = h['Quantity'] * h['Cost']
+    return h.groupby('Portfolio', sort=False)[['mv', 'pv', 'cost']].sum()
+
+
+def test_mark_matches_naive_groupby(holdings, snapshot):
+    book = PortfolioBook(holdings)
+    valued = book.mark(snapshot)
+    expected = _naive(holdings, snapshot).reindex(valued.index)
+    np.testing.assert_allclose(valued['MarketValue'], expected['mv'])
+    np.testing.assert_allclose(valued['DayPnL'], expected['mv'] - expected['pv'])
+    np.testing.assert_allclose(valued['Unrealized'], expected['mv'] - expected['cost'])
+    assert book.nnz <= len(holdings)
+
+
+def test_duplicate_holdings_are_combined(snapshot):
+    book = PortfolioBook(pd.DataFrame({
+        'Portfolio': ['a', 'a', 'a', 'b', 'b'],
+        'Symbol': ['NABIL', 'nabil', 'SCB', 'SCB', 'SCB'],
+        'Quantity': [10.0, 30.0, 5.0, 1.0, 1.0],
+        'Cost': [400.0, 600.0, 500.0, 500.0, np.nan],
+    }))
+    assert book.nnz == 3
+    valued = book.mark(snapshot)
+    nabil = snapshot.set_index('Symbol')['LTP']['NABIL']
+    scb = snapshot.set_index('Symbol')['LTP']['SCB']
+    assert valued.loc['a', 'MarketValue'] == pytest.approx(40 * nabil + 5 * scb)
+    assert book.cost_basis[0] == pytest.approx(10 * 400 + 30 * 600 + 5 * 500)
+    assert np.isnan(book.cost_basis[1])
+
+
+def test_delta_update_matches_full_mark(holdings, snapshot):
+    book = PortfolioBook(holdings)
+    book.mark(snapshot)
+    moved = snapshot.copy()
+    moved.loc[moved['Symbol'] == 'SCB', 'LTP'] = 640.0
+    delta = live.snapshot_delta(snapshot, moved)
+    assert list(delta['Symbol']) == ['SCB']
+
+    touched = book.apply(delta)
+    scb_holders = set(holdings.loc[holdings['Symbol'] == 'SCB', 'Portfolio'])
+    assert set(touched.index) == scb_holders
+    full = PortfolioBook(holdings).mark(moved)
+    np.testing.assert_allclose(book.valuation()['MarketValue'], full['MarketValue'])
+    assert book.apply(delta).empty          # nothing moved the second time
+
+
+def test_unknown_cost_has_no_gain(snapshot):
+    book = PortfolioBook(pd.DataFrame({'Portfolio': ['a', 'a', 'b'],
+                                       'Symbol': ['NABIL', 'SCB', 'SCB'],
+                                       'Quantity': [10, 10, 10], 'Cost': [400, None, 500]}))
+    valued = book.mark(snapshot)
+    assert np.isnan(valued.loc['a', 'Unrealized'])
+    assert valued.loc['b', 'Unrealized'] == pytest.approx(10 * (610 - 500))
+
+
+def test_poll_yields_deltas(snapshot, monkeypatch):
+    frames = iter([snapshot, NoTradingDataError('closed'),
+                   snapshot.assign(LTP=snapshot['LTP'].where(snapshot['Symbol'] != 'NICA', 790.0))])
+
+    def fake(self, date=None, sector=None):
+        frame = next(frames)
+        if isinstance(frame, Exception):
+            raise frame
+        return frame
+
+    monkeypatch.setattr(ShareSansarScraper, 'get_today_data', fake)
+    polled = list(itertools.islice(live.poll(interval=0, date='2024-01-02'), 2))
+    assert len(polled[0][1]) == 3                  # first poll: everything is new
+    assert list(polled[1][1]['Symbol']) == ['NICA']
@@ -0,0 +1,100 @@
+"""Offline tests for precomputed top-K rankings."""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sharesansar as ss
+from sharesansar import store as store_module
+from sharesansar.rankings import compute_rankings, rankings_frame
+from sharesansar.scraper import ShareSansarScraper
+from sharesansar.store import SnapshotStore, open_store
+
+
+@pytest.fixture
+def snapshot(snapshot_html):
+    return ShareSansarScraper()._parse_response(snapshot_html, '2024-01-02')
+
+
+@pytest.fixture
+def default_store():
+    yield
+    ss.set_store(None)
+    store_module._default_store = None
+
+
+def test_heap_rankings_match_full_sort():
+    rng = np.random.default_rng(3)
+    n = 400
+    df = pd.DataFrame({
+        'Symbol': [f'S{i:03d}' for i in range(n)],
+        'LTP': rng.uniform(100, 1000, n),
+        'ChangePercent': rng.normal(0, 3, n).round(2),
+        'Vol': rng.integers(0, 100000, n),
+        'Turnover': rng.uniform(0, 1e7, n),
+    })
+    df.loc[::37, 'ChangePercent'] = np.nan
+    rankings = compute_rankings(df, k=15)
+
+    rising = df[df['ChangePercent'] > 0].sort_values('ChangePercent', ascending=False,
+                                                     kind='mergesort')
+    falling = df[df['ChangePercent'] < 0].sort_values('ChangePercent', kind='mergesort')
+    assert [r['Symbol'] for r in rankings['gainers']] == list(rising['Symbol'][:15])
+    assert [r['Symbol'] for r in rankings['losers']] == list(falling['Symbol'][:15])
+    assert ([r['Symbol'] for r in rankings['volume']]
+            == list(df.sort_values('Vol', ascending=False, kind='mergesort')['Symbol'][:15]))
+    json.dumps(rankings)  # stored as JSON
+
+
+def test_gainers_and_losers_exclude_the_other_side(snapshot):
+    rankings = compute_rankings(snapshot)
+    assert [r['Symbol'] for r in rankings['gainers']] == ['SCB', 'NABIL']
+    assert [r['Symbol'] for r in rankings['losers']] == ['NICA']
+    assert [r['Symbol'] for r in rankings['turnover']] == ['NABIL', 'SCB', 'NICA']
+    top = rankings_frame(rankings, 'turnover', 2)
+    assert list(top['Rank']) == [1, 2]
+    assert rankings_frame(rankings, 'turnover', 100) is None
+    with pytest.raises(ValueError):
+        rankings_frame(rankings, 'movers')
+
+
+@pytest.mark.parametrize('name', ['csv', 'nepse.db'])
+def test_store_answers_without_reading_the_session(tmp_path, snapshot, monkeypatch,
+                                                   default_store, name):
+    store = open_store(str(tmp_path / name)) if name.endswith('.db') else SnapshotStore(
+        str(tmp_path / name))
+    store.write('2024-01-02', snapshot)
+    ss.set_store(store)
+
+    def no_read(*args, **kwargs):
+        raise AssertionError('session read')
+
+    monkeypatch.setattr(type(store), 'read', no_read)
+    monkeypatch.setattr(ShareSansarScraper, 'get_today_data', no_read)
+    top = ss.get_top_movers('2024-01-02', by='losers', k=5)
+    assert list(top['Symbol']) == ['NICA']
+    assert top['ChangePercent'].iloc[0] == pytest.approx(-2.48)
+
+
+def test_older_sessions_are_ranked_once_and_recorded(tmp_path, snapshot, default_store):
+    store = SnapshotStore(str(tmp_path / 'csv'))
+    store.write('2024-01-02', snapshot)
+    os.remove(os.path.join(store.root, store_module.RANKINGS))
+    store = SnapshotStore(store.root)
+    ss.set_store(store)
+    assert store.rankings('2024-01-02') is None
+
+    top = ss.get_top_movers('2024-01-02', by='volume', k=2)
+    assert list(top['Symbol']) == ['NABIL', 'SCB']
+    assert SnapshotStore(store.root).rankings('2024-01-02') is not None
+
+
+def test_unstored_dates_are_fetched_and_ranked(monkeypatch, snapshot, default_store):
+    monkeypatch.setattr(ShareSansarScraper, 'get_today_data', lambda self, date=None, sector=None: snapshot)
+    top = ss.get_top_movers('2024-01-02', by='gainers', k=1)
+    assert list(top['Symbol']) == ['SCB']
+    with pytest.raises(ValueError):
+        ss.get_top_movers('2024-01-02', by='movers')
@@ -0,0 +1,147 @@
+"""Offline tests for the symbol registry."""
+
+import time
+
+import pandas as pd
+import pytest
+
+import sharesansar as ss
+from sharesansar import registry as registry_module
+from sharesansar import store as store_module
+from sharesansar.registry import SymbolRegistry, symbol_registry
+from sharesansar.scraper import FetchError, NetworkError, ShareSansarScraper
+from sharesansar.store import SnapshotStore
+
+
+@pytest.fixture
+def snapshot(snapshot_html):
+    return ShareSansarScraper()._parse_response(snapshot_html, '2024-03-01')
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    registry_module._registries.clear()
+    yield
+    registry_module._registries.clear()
+    ss.set_store(None)
+    store_module._default_store = None
+
+
+LISTING = pd.DataFrame({'Symbol': ['NABIL', 'SCB', 'NEWCO'],
+                        'Company': ['Nabil Bank Limited', 'Standard Chartered Bank Nepal', 'New Co'],
+                        'Sector': ['Commercial Banks', 'Commercial Banks', None]})
+
+
+def test_spans_status_and_listing(snapshot):
+    registry = SymbolRegistry()
+    old = snapshot.assign(Date='2024-01-02')
+    registry.observe(pd.concat([old, snapshot[snapshot['Symbol'] != 'NICA']]))
+    registry.add_listing(LISTING)
+    registry.add_sectors({'NICA': 'Commercial Banks', 'NABIL': 'Other'})
+
+    nabil = registry.get('nabil')
+    assert (nabil.first_seen, nabil.last_seen, nabil.status) == ('2024-01-02', '2024-03-01', 'active')
+    assert nabil.company == 'Nabil Bank Limited' and nabil.sector == 'Commercial Banks'
+    assert registry.get('NICA').status == 'inactive'         # not traded for 59 days
+    assert registry.get('NICA').sector == 'Commercial Banks'
+    assert registry.get('NEWCO').status == 'listed'
+    assert registry.symbols() == ['NABIL', 'SCB']
+    assert registry.symbols(None) == ['NABIL', 'NEWCO', 'NICA', 'SCB']
+    assert 'scb' in registry and 'XYZ' not in registry
+    with pytest.raises(ValueError):
+        registry.symbols('delisted')
+
+
+def test_build_from_store_and_persist(tmp_path, snapshot, monkeypatch):
+    store = SnapshotStore(str(tmp_path / 'store'))
+    store.write('2024-02-29', snapshot.assign(Date='2024-02-29'))
+    store.write('2024-03-01', snapshot)
+    ss.set_store(store)
+
+    def no_snapshot(self, *args, **kwargs):
+        raise AssertionError('snapshot fetched')
+
+    monkeypatch.setattr(ShareSansarScraper, 'get_today_data', no_snapshot)
+    monkeypatch.setattr(ShareSansarScraper, 'get_company_list', lambda self: LISTING)
+    monkeypatch.setattr(registry_module, 'sector_map',
+                        lambda scraper=None: {'NICA': 'Commercial Banks'})
+
+    registry = symbol_registry()
+    assert registry.symbols() == ['NABIL', 'NICA', 'SCB']
+    assert registry.get('SCB').first_seen == '2024-02-29'
+
+    # A new process loads it from disk without rebuilding
+    registry_module._registries.clear()
+    monkeypatch.setattr(SymbolRegistry, 'build', no_snapshot)
+    again = symbol_registry()
+    assert again is not registry
+    assert again.get('NABIL').company == 'Nabil Bank Limited'
+    assert again.get('NICA').sector == 'Commercial Banks'
+    assert ss.get_available_symbols() == ['NABIL', 'NICA', 'SCB']
+
+    rebuilds = []
+    monkeypatch.setattr(SymbolRegistry, 'build', lambda self: rebuilds.append(1))
+    again.built = time.time() - registry_module.REGISTRY_TTL - 1
+    symbol_registry()                                        # stale: rebuilds
+    assert rebuilds == [1]
+
+
+def test_ticker_info_uses_registry_and_current_columns(snapshot, monkeypatch):
+    registry = registry_module._registries[registry_module.registry_path()] = SymbolRegistry()
+    registry.observe(snapshot)
+    registry.add_listing(LISTING)
+    registry.built = time.time()
+    monkeypatch.setattr(ShareSansarScraper, 'get_today_data', lambda self, date=None, sector=None: snapshot)
+
+    info = ss.get_stock_info('NABIL')
+    assert info.company == 'Nabil Bank Limited'
+    assert info.change_percent == pytest.approx(1.41)
+    assert info.previous_close == 498
+    assert ss.Ticker('nica', validate=True).symbol == 'NICA'
+    with pytest.raises(ValueError):
+        ss.Ticker('NOPE', validate=True)
+
+
+def test_company_list_parsing(monkeypatch):
+    page = ('<table><thead><tr><th>S.No</th><th>Symbol</th><th>Company Name</th>'
+            '<th>Sector</th></tr></thead><tbody><tr><td>1</td><td> nabil </td>'
+            '<td>Nabil Bank Limited</td><td>Commercial Banks</td></tr></tbody></table>')
+
+    class Response:
+        status_code = 200
+        text = page
+        content = page.encode()
+
+    scraper = ShareSansarScraper()
+    monkeypatch.setattr(scraper.session, 'request', lambda method, url, **kw: Response())
+    listing = scraper.get_company_list()
+    assert listing.to_dict('records') == [{'Symbol': 'NABIL', 'Company': 'Nabil Bank Limited',
+                                           'Sector': 'Commercial Banks'}]
+
+
+def test_failed_build_backs_off_and_serves_stale(snapshot, monkeypatch):
+    builds = []
+
+    def offline(self, scraper=None):
+        builds.append(1)
+        raise NetworkError('offline')
+
+    monkeypatch.setattr(SymbolRegistry, 'build', offline)
+    with pytest.raises(FetchError):
+        symbol_registry()
+    with pytest.raises(FetchError):
+        symbol_registry()                                    # backing off: no second build
+    assert len(builds) == 1
+    monkeypatch.setattr(ShareSansarScraper, 'get_available_symbols',
+                        lambda self, date=None: ['NABIL'])
+    assert ss.get_available_symbols() == ['NABIL']           # one session, not []
+
+    registry = registry_module._registries[registry_module.registry_path()]
+    registry.observe(snapshot)
+    registry.built = time.time() - registry_module.REGISTRY_TTL - 1
+    registry.failed = time.time() - registry_module.REGISTRY_RETRY - 1
+    assert symbol_registry() is registry                     # stale, after one more try
+    assert len(builds) == 2
+    assert ss.get_available_symbols() == ['NABIL', 'NICA', 'SCB']
+    assert len(builds) == 2
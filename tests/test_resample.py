@@ -0,0 +1,106 @@
+"""Offline tests for weekly/monthly/quarterly bars."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sharesansar as ss
+from sharesansar import resample as rs
+from sharesansar import store as store_module
+from sharesansar.scraper import ShareSansarScraper
+from sharesansar.store import SnapshotStore
+from sharesansar.trading_calendar import is_trading_weekday, trading_days
+
+from conftest import NO_RECORD_HTML, make_snapshot_html
+
+
+def _daily():
+    rows = []
+    for i, date in enumerate(trading_days('2024-01-07', '2024-01-18')):
+        for symbol, base in (('NABIL', 500.0), ('SCB', 600.0)):
+            price = base + i
+            rows.append({'Symbol': symbol, 'Date': date, 'Open': price - 1, 'High': price + 2,
+                         'Low': price - 2, 'Close': price, 'LTP': price, 'Vol': 100.0 * (i + 1),
+                         'Turnover': price * 100.0 * (i + 1), 'VWAP': price})
+    return pd.DataFrame(rows)
+
+
+def test_bar_start_follows_nepse_weeks():
+    starts = rs.bar_start(['2024-01-07', '2024-01-11', '2024-01-06', '2024-02-29'], '1wk')
+    assert [d.strftime('%Y-%m-%d') for d in starts] == ['2024-01-07', '2024-01-07',
+                                                         '2023-12-31', '2024-02-25']
+    assert rs.bar_start(['2024-05-17'], '3mo')[0] == pd.Timestamp('2024-04-01')
+    with pytest.raises(ValueError):
+        rs.bar_start(['2024-01-01'], '2wk')
+
+
+def test_weekly_aggregation():
+    bars = rs.resample(_daily(), '1wk')
+    nabil = bars[bars['Symbol'] == 'NABIL'].set_index('Date')
+    assert list(nabil.index) == ['2024-01-07', '2024-01-14']
+    week = nabil.loc['2024-01-07']
+    assert (week['Open'], week['High'], week['Low'], week['Close']) == (499, 506, 498, 504)
+    assert week['Vol'] == 100 + 200 + 300 + 400 + 500
+    expected_vwap = sum(p * v for p, v in zip(range(500, 505), range(100, 600, 100))) / 1500
+    assert week['VWAP'] == pytest.approx(expected_vwap)
+    assert week['Sessions'] == 5
+
+
+def test_panel_resampler_matches_long():
+    daily = _daily()
+    panel = {f: daily.pivot(index='Date', columns='Symbol', values=f)
+             for f in ('Open', 'High', 'Close', 'Vol', 'Turnover')}
+    for frame in panel.values():
+        frame.index = pd.to_datetime(frame.index)
+    bars = rs.resample_panel(panel, '1mo')
+    long = rs.resample(daily, '1mo').set_index('Symbol')
+    assert bars['High'].loc['2024-01-01', 'SCB'] == long.loc['SCB', 'High']
+    assert bars['VWAP'].loc['2024-01-01', 'NABIL'] == pytest.approx(long.loc['NABIL', 'VWAP'])
+    assert bars['Open'].loc['2024-01-01'].tolist() == [499.0, 599.0]
+
+
+@pytest.fixture
+def fetch_log(monkeypatch):
+    calls = []
+
+    def fake(self, date=None, sector=None):
+        calls.append(date)
+        html = make_snapshot_html() if is_trading_weekday(date) else NO_RECORD_HTML
+        return self._parse_response(html, date)
+
+    monkeypatch.setattr(ShareSansarScraper, 'get_today_data', fake)
+    rs._caches.clear()
+    yield calls
+    rs._caches.clear()
+    ss.set_store(None)
+    store_module._default_store = None
+
+
+def test_completed_bars_are_cached(fetch_log, tmp_path):
+    ss.set_store(SnapshotStore(str(tmp_path)))
+    weekly = ss.history('NABIL', start='2024-01-09', end='2024-01-16', interval='1wk')
+    assert list(weekly['Date']) == ['2024-01-07', '2024-01-14']
+    assert weekly['Vol'].tolist() == [50000, 50000]
+    assert fetch_log                              # whole weeks were fetched
+    assert os.path.exists(str(tmp_path / '_bars_1wk.csv'))
+
+    fetch_log.clear()
+    rs._caches.clear()                            # fresh process: reload from disk
+    again = ss.Ticker('NABIL').history(start='2024-01-09', end='2024-01-16', interval='1wk')
+    assert fetch_log == []
+    np.testing.assert_allclose(again['Close'], weekly['Close'])
+
+
+def test_periods_without_trades_are_not_refetched(fetch_log, tmp_path):
+    ss.set_store(SnapshotStore(str(tmp_path)))
+    assert ss.history('NOPE', start='2024-01-09', end='2024-01-16', interval='1wk').empty
+    assert fetch_log
+
+    fetch_log.clear()
+    rs._caches.clear()
+    assert ss.history('NOPE', start='2024-01-09', end='2024-01-16', interval='1wk').empty
+    assert fetch_log == []                        # empty weeks were cached as markers
+    weekly = ss.history('NABIL', start='2024-01-09', end='2024-01-16', interval='1wk')
+    assert (weekly['Sessions'] > 0).all()
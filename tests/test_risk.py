@@ -0,0 +1,141 @@
+"""Offline tests for market returns and dependence estimators."""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sharesansar as ss
+from sharesansar import risk
+from sharesansar import store as store_module
+from sharesansar.scraper import ShareSansarScraper
+from sharesansar.store import SnapshotStore
+from sharesansar.trading_calendar import NEPAL_TZ
+
+from conftest import ROWS, make_snapshot_html
+
+
+@pytest.fixture
+def rets():
+    rng = np.random.default_rng(11)
+    base = rng.normal(0, 0.01, (250, 1))
+    values = base + rng.normal(0, 0.01, (250, 7))
+    values[:50, 0] = np.nan                 # late listing
+    values[100:120, 3] = np.nan             # suspension
+    values[rng.random(values.shape) < 0.05] = np.nan
+    return pd.DataFrame(values, columns=[f'S{i}' for i in range(7)])
+
+
+def test_returns_skip_gaps():
+    prices = pd.DataFrame({'A': [100.0, 110.0, np.nan, 121.0], 'B': [10.0, 10.0, 11.0, 11.0]})
+    simple = risk.returns(prices)
+    assert simple['A'].iloc[0] == pytest.approx(0.1)
+    assert simple['A'].iloc[1:].isna().all()          # no return across the missing session
+    assert risk.returns(prices, 'log')['B'].iloc[1] == pytest.approx(np.log(1.1))
+
+
+def test_pairwise_matches_pandas(rets):
+    cov = risk.covariance(rets, min_periods=30, block=3)
+    corr = risk.correlation(rets, min_periods=30, block=3)
+    np.testing.assert_allclose(cov, rets.cov(min_periods=30), rtol=1e-9)
+    np.testing.assert_allclose(corr, rets.corr(min_periods=30), rtol=1e-9)
+    assert np.isnan(risk.covariance(rets, min_periods=10_000)).all().all()
+
+
+def test_shrinkage_is_positive_definite(rets):
+    cov = risk.covariance(rets, method='shrinkage')
+    assert np.linalg.eigvalsh(cov.to_numpy()).min() > 0
+    _, _, shrink = risk._dependence(rets, 'shrinkage', 2, 128)
+    assert 0 < shrink < 1
+    corr = risk.correlation(rets, method='shrinkage')
+    np.testing.assert_allclose(np.diag(corr), 1.0)
+    with pytest.raises(ValueError):
+        risk.covariance(rets, method='robust')
+
+
+def test_ledoit_wolf_reference():
+    x = np.random.default_rng(5).normal(size=(40, 4))
+    t, n = x.shape
+    centred = x - x.mean(axis=0)
+    sample = centred.T @ centred / t
+    mu = np.trace(sample) / n
+    delta = np.sum((sample - mu * np.eye(n)) ** 2) / n
+    beta = sum(np.sum((np.outer(row, row) - sample) ** 2) for row in centred) / n / t ** 2
+    shrink = min(beta, delta) / delta
+    got, got_shrink = risk._ledoit_wolf(x)
+    assert got_shrink == pytest.approx(shrink)
+    np.testing.assert_allclose(got, shrink * mu * np.eye(n) + (1 - shrink) * sample)
+
+
+def test_market_risk_is_cached(monkeypatch):
+    calls = []
+
+    def fake(self, date=None, sector=None):
+        calls.append(date)
+        rows = [r[:6] + [str(float(r[6]) + len(calls))] + r[7:] for r in ROWS]
+        return self._parse_response(make_snapshot_html(rows), date)
+
+    monkeypatch.setattr(ShareSansarScraper, 'get_today_data', fake)
+    risk.clear_cache()
+    report = risk.market_risk('2024-01-01', '2024-01-10', min_periods=2, rate=None)
+    fetched = len(calls)
+    assert list(report.covariance.columns) == ['NABIL', 'NICA', 'SCB']
+    assert report.returns['NABIL'].iloc[0] == pytest.approx(np.log(507 / 506))
+    assert risk.market_risk('2024-01-01', '2024-01-10', min_periods=2) is report
+    assert len(calls) == fetched
+    risk.market_risk('2024-01-01', '2024-01-10', symbols=['nabil'], min_periods=2, rate=None)
+    assert len(calls) > fetched
+    risk.clear_cache()
+
+
+def test_market_risk_reaching_today_is_not_cached(monkeypatch):
+    monkeypatch.setattr(ShareSansarScraper, 'get_today_data',
+                        lambda self, date=None, sector=None: self._parse_response(
+                            make_snapshot_html(), date))
+    monkeypatch.setattr(risk, 'nepal_now', lambda: datetime(2024, 1, 10, 12, 0, tzinfo=NEPAL_TZ))
+    risk.clear_cache()
+    try:
+        first = risk.market_risk('2024-01-01', '2024-01-10', min_periods=2, rate=None)
+        assert risk.market_risk('2024-01-01', '2024-01-10', min_periods=2, rate=None) is not first
+        past = risk.market_risk('2024-01-01', '2024-01-09', min_periods=2, rate=None)
+        assert risk.market_risk('2024-01-01', '2024-01-09', min_periods=2, rate=None) is past
+    finally:
+        risk.clear_cache()
+
+
+def test_market_risk_cache_tracks_store_and_failures(monkeypatch, tmp_path):
+    calls = []
+
+    def fake(self, date=None, sector=None):
+        calls.append(date)
+        if date == '2024-01-03' and calls.count(date) == 1:
+            raise ConnectionError('reset by peer')
+        return self._parse_response(make_snapshot_html(), date)
+
+    monkeypatch.setattr(ShareSansarScraper, 'get_today_data', fake)
+    risk.clear_cache()
+    first = risk.market_risk('2024-01-01', '2024-01-10', min_periods=2, rate=None)
+    assert '2024-01-03' not in first.returns.index.strftime('%Y-%m-%d')
+    repaired = risk.market_risk('2024-01-01', '2024-01-10', min_periods=2, rate=None)
+    assert repaired is not first                           # failed report was not cached
+    assert risk.market_risk('2024-01-01', '2024-01-10', min_periods=2) is repaired
+
+    store = SnapshotStore(str(tmp_path))
+    ss.set_store(store)
+    try:
+        cached = risk.market_risk('2024-01-01', '2024-01-10', min_periods=2, rate=None)
+        session = ShareSansarScraper()._parse_response(make_snapshot_html(), '2024-01-02')
+        store.write('2024-01-02', session)
+        written = risk.market_risk('2024-01-01', '2024-01-10', min_periods=2, rate=None)
+        assert written is not cached
+        cached = written
+        assert risk.market_risk('2024-01-01', '2024-01-10', min_periods=2, rate=None) is cached
+
+        # Rewriting a stored session (e.g. a repair) does not change the count, only the data
+        store.write('2024-01-02', session)
+        assert risk.market_risk('2024-01-01', '2024-01-10', min_periods=2, rate=None) is not cached
+    finally:
+        ss.set_store(None)
+        store_module._default_store = None
+        risk.clear_cache()
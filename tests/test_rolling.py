@@ -0,0 +1,67 @@
+"""Offline tests for the incremental rolling-statistics engine."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sharesansar.rolling import DEFAULT_WINDOWS, RollingStats, Window
+from sharesansar.trading_calendar import trading_days
+
+
+@pytest.fixture
+def panel():
+    rng = np.random.default_rng(3)
+    dates = pd.DatetimeIndex(pd.to_datetime(trading_days('2023-01-01', '2024-06-30')), name='Date')
+    symbols = pd.Index(['NABIL', 'SCB', 'NEWCO'], name='Symbol')
+    close = pd.DataFrame(500 + rng.normal(0, 5, (len(dates), 3)).cumsum(axis=0),
+                         index=dates, columns=symbols)
+    close.iloc[100:110, 1] = np.nan        # SCB suspended
+    close.iloc[:300, 2] = np.nan           # NEWCO lists late
+    volume = pd.DataFrame(rng.integers(100, 10000, close.shape).astype(float),
+                          index=dates, columns=symbols).where(close.notna())
+    return {'Close': close, 'High': close + 3, 'Low': close - 3, 'Vol': volume}
+
+
+def _snapshot(panel, i):
+    frame = pd.DataFrame({f: panel[f].iloc[i] for f in panel})
+    return frame.dropna(how='all').rename_axis('Symbol').reset_index()
+
+
+def test_fit_matches_reference_windows(panel):
+    series = RollingStats().fit(panel)
+    close = panel['Close']
+    last = close.index[-1]
+    nabil_year = panel['High']['NABIL'][close.index > last - pd.Timedelta(days=365)]
+    assert series['high_52w'].loc[last, 'NABIL'] == nabil_year.max()
+    assert series['avg_volume_20'].iloc[-1]['SCB'] == panel['Vol']['SCB'].iloc[-20:].mean()
+    returns = close['NABIL'].pct_change().iloc[-20:]
+    assert series['volatility_20'].iloc[-1]['NABIL'] == pytest.approx(returns.std())
+    assert series['high_52w']['NEWCO'].iloc[:300].isna().all()
+
+
+def test_incremental_updates_match_batch(panel):
+    split = 320
+    head = {f: frame.iloc[:split] for f, frame in panel.items()}
+    engine = RollingStats()
+    engine.fit(head)
+    for i in range(split, len(panel['Close'])):
+        latest = engine.update(panel['Close'].index[i].strftime('%Y-%m-%d'), _snapshot(panel, i))
+
+    expected = RollingStats().fit(panel)
+    for w in DEFAULT_WINDOWS:
+        np.testing.assert_allclose(latest[w.name].reindex(['NABIL', 'SCB', 'NEWCO']),
+                                   expected[w.name].iloc[-1], rtol=1e-9, err_msg=w.name)
+
+
+def test_update_from_empty_and_validation():
+    engine = RollingStats([Window('max3', 'max', 'Close', 3), Window('sum2', 'sum', 'Vol', 2)])
+    for date, close, vol in [('2024-01-01', 5, 1), ('2024-01-02', 3, 2),
+                             ('2024-01-03', 4, 3), ('2024-01-04', 2, 4)]:
+        out = engine.update(date, pd.DataFrame({'Symbol': ['NABIL'], 'Close': [close],
+                                                'Vol': [vol]}))
+    assert out.loc['NABIL', 'max3'] == 4
+    assert out.loc['NABIL', 'sum2'] == 7
+    with pytest.raises(ValueError):
+        engine.update('2024-01-02', pd.DataFrame({'Symbol': ['NABIL']}))
+    with pytest.raises(ValueError):
+        RollingStats([Window('x', 'median', 'Close', 3)])
@@ -0,0 +1,87 @@
+"""Offline tests for compiled market screens."""
+
+import pandas as pd
+import pytest
+
+from sharesansar.rolling import RollingStats, Window
+from sharesansar.scraper import ShareSansarScraper
+from sharesansar.screener import Screen, compile_screen, screen
+
+from conftest import ROWS, make_snapshot_html
+
+
+@pytest.fixture
+def snapshot(snapshot_html):
+    return ShareSansarScraper()._parse_response(snapshot_html, '2024-01-02')
+
+
+def test_snapshot_mask(snapshot):
+    hits = screen('ChangePercent > 1 and Vol > 3000', snapshot)
+    assert list(hits['Symbol']) == ['NABIL', 'SCB']
+    assert list(Screen('500 <= LTP < 700').filter(snapshot)['Symbol']) == ['NABIL', 'SCB']
+    assert list(Screen('not (Diff > 0) or abs(ChangePercent) > 1.6').filter(snapshot)['Symbol']) \
+        == ['SCB', 'NICA']
+    assert compile_screen('LTP > 1') is compile_screen('LTP > 1')
+
+
+def test_derived_fields(snapshot):
+    derived = pd.DataFrame({'avg_volume_20': [2000.0, 5000.0]},
+                           index=pd.Index(['NABIL', 'SCB'], name='Symbol'))
+    mask = Screen('Vol > 2 * avg_volume_20').mask(snapshot, derived)
+    assert mask.tolist() == [True, False, False]   # NICA has no average: NaN never passes
+    with pytest.raises(KeyError):
+        Screen('Vol > avg_volume_50').mask(snapshot, derived)
+
+
+@pytest.mark.parametrize('expression', [
+    "__import__('os').system('true')",
+    'LTP.real > 1',
+    'Vol + 1',
+    'Vol and LTP > 1',
+    'LTP > [1]',
+    'LTP >',
+    'LTP > "abc"',
+    'LTP > True',
+    'not LTP',
+    'not (LTP + 1)',
+    '9 ** 9 ** 9 > LTP',
+    'LTP ** 10 > 1',
+    'min(LTP) > 1',
+    'abs(LTP, Close) > 1',
+])
+def test_rejects_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        Screen(expression)
+
+
+def test_small_constant_powers_are_allowed(snapshot):
+    assert list(screen('LTP ** 2 > 1000000', snapshot)['Symbol']) == list(
+        snapshot.loc[snapshot['LTP'] > 1000, 'Symbol'])
+
+
+def test_backtest_over_sessions(monkeypatch):
+    def rows_for(date):
+        volume = '30,000' if date == '2024-01-04' else '10,000'
+        return [[r[0], r[1]] + r[2:9] + [volume if r[1] == 'NABIL' else r[9]] + r[10:]
+                for r in ROWS]
+
+    monkeypatch.setattr(ShareSansarScraper, 'get_today_data',
+                        lambda self, date=None, sector=None: self._parse_response(
+                            make_snapshot_html(rows_for(date)), date))
+    s = Screen('Vol > 1.5 * avg_volume_3 and ChangePercent > 0')
+    fired = s.backtest('2024-01-02', '2024-01-04',
+                       windows=[Window('avg_volume_3', 'mean', 'Vol', 3)], rate=None)
+    assert list(fired.index) == list(pd.to_datetime(['2024-01-02', '2024-01-03', '2024-01-04']))
+    # 30,000 against a 3-session average of 16,667 that includes the spike itself
+    assert fired.stack()[lambda x: x].index.tolist() == [(pd.Timestamp('2024-01-04'), 'NABIL')]
+
+    fired = Screen('Vol > 1.5 * avg_volume_3').evaluate_panel({
+        'Vol': pd.DataFrame({'NABIL': [1.0, 1.0, 4.0]}),
+        'avg_volume_3': pd.DataFrame({'NABIL': [1.0, 1.0, 2.0]})})
+    assert fired['NABIL'].tolist() == [False, False, True]
+
+    stats = RollingStats([Window('vol_max', 'max', 'Vol', 2)])
+    snap = ShareSansarScraper()._parse_response(make_snapshot_html(rows_for('2024-01-04')),
+                                                '2024-01-04')
+    stats.update('2024-01-04', snap)
+    assert list(screen('Vol >= vol_max', snap, stats)['Symbol']) == ['NABIL', 'SCB', 'NICA']
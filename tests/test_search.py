@@ -0,0 +1,71 @@
+"""Offline tests for the symbol search index."""
+
+import time
+
+import pandas as pd
+import pytest
+
+import sharesansar as ss
+from sharesansar import registry as registry_module
+from sharesansar.registry import SymbolRegistry
+from sharesansar.search import SymbolIndex
+
+LISTING = pd.DataFrame({
+    'Symbol': ['NABIL', 'NIMB', 'NICA', 'SCB', 'NABBC', 'NIFRA'],
+    'Company': ['Nabil Bank Limited', 'Nepal Investment Mega Bank Ltd.', 'NIC Asia Bank Ltd.',
+                'Standard Chartered Bank Nepal', 'Narayani Development Bank',
+                'Nepal Infrastructure Bank'],
+})
+
+
+@pytest.fixture
+def registry():
+    registry = SymbolRegistry()
+    registry.observe(pd.DataFrame({'Symbol': LISTING['Symbol'], 'Date': '2024-03-01'}))
+    registry.add_listing(LISTING)
+    return registry
+
+
+def _symbols(results):
+    return [r.symbol for r in results]
+
+
+def test_prefix_matches_rank_symbols_before_names(registry):
+    index = SymbolIndex(registry)
+    assert _symbols(index.search('nab')) == ['NABBC', 'NABIL']       # equal length: by symbol
+    top = index.search('NABIL')[0]
+    assert (top.symbol, top.match, top.company) == ('NABIL', 'exact', 'Nabil Bank Limited')
+    results = index.search('nepal invest')
+    assert (results[0].symbol, results[0].match) == ('NIMB', 'name')
+    assert [r.match for r in results[1:]] == ['fuzzy'] * (len(results) - 1)
+    assert _symbols(index.search('chartered', limit=1)) == ['SCB']
+    assert _symbols(index.search('ni', limit=3)) == ['NICA', 'NIMB', 'NIFRA']
+    assert index.search('  ') == []
+
+
+def test_fuzzy_matches_typos(registry):
+    index = SymbolIndex(registry)
+    results = index.search('nabli')
+    assert results[0].symbol == 'NABIL' and results[0].match == 'fuzzy'
+    assert 'NIMB' in _symbols(index.search('nepal investmnt'))
+    assert index.search('zzzz') == []
+
+
+def test_index_follows_listings_and_delistings(registry):
+    index = SymbolIndex(registry)
+    keys = len(index._entries)
+    registry.observe(pd.DataFrame({'Symbol': ['NABIL', 'NIMB', 'NICA', 'SCB', 'NIFRA', 'HIDCL'],
+                                   'Date': '2024-05-01'}))
+    registry.add_listing(pd.DataFrame({'Symbol': ['HIDCL'],
+                                       'Company': ['Hydroelectricity Investment']}))
+    assert _symbols(index.search('nab')) == ['NABIL']          # NABBC went inactive
+    assert _symbols(index.search('hydro')) == ['HIDCL']
+    assert len(index._entries) == keys - 4 + 3
+    assert _symbols(SymbolIndex(registry, statuses=['inactive']).search('nar')) == ['NABBC']
+
+
+def test_search_symbols_uses_the_default_registry(registry, tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    registry.built = time.time()
+    monkeypatch.setitem(registry_module._registries, registry_module.registry_path(), registry)
+    assert _symbols(ss.search_symbols('standard')) == ['SCB']
@@ -0,0 +1,151 @@
+"""Offline tests for sector-filtered fetching, the sector map and sector aggregates."""
+
+import json
+
+import pandas as pd
+import pytest
+
+import sharesansar as ss
+from sharesansar import sectors
+from sharesansar.scraper import ALL_SECTORS, NoTradingDataError, ShareSansarScraper
+from sharesansar.sectors import build_sector_map, resolve_sector, sector_aggregates, sector_map
+
+from conftest import NO_RECORD_HTML, ROWS, make_snapshot_html
+
+MAIN_PAGE = ('<html><input name="_token" value="tok">'
+             '<select name="sector"><option value="all_sec">All Sector</option>'
+             '<option value="2">Commercial Banks</option>'
+             '<option value="7">Hydro Power</option></select></html>')
+
+MEMBERS = {'2': ['NABIL', 'SCB'], '7': ['NICA']}
+
+
+class FakeResponse:
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.content = text.encode()
+        self.status_code = status_code
+
+
+@pytest.fixture
+def site(monkeypatch):
+    """A scraper whose requests hit a fake site; records the sectors posted."""
+    scraper = ShareSansarScraper()
+    posted = []
+
+    def request(method, url, **kwargs):
+        if method == 'GET':
+            return FakeResponse(MAIN_PAGE)
+        data = kwargs['data']
+        posted.append(data['sector'])
+        if data['date'] == '2024-01-05':
+            return FakeResponse(NO_RECORD_HTML)
+        keep = MEMBERS.get(data['sector'])
+        rows = ROWS if keep is None else [r for r in ROWS if r[1] in keep]
+        return FakeResponse(make_snapshot_html(rows))
+
+    monkeypatch.setattr(scraper.session, 'request', request)
+    return scraper, posted
+
+
+@pytest.fixture(autouse=True)
+def clear_maps():
+    sectors._maps.clear()
+    yield
+    sectors._maps.clear()
+
+
+def test_sector_names_resolve_to_form_values(site):
+    scraper, posted = site
+    assert scraper.get_sectors() == {'Commercial Banks': '2', 'Hydro Power': '7'}
+    df = scraper.get_today_data('2024-01-02', sector='commercial banks')
+    assert list(df['Symbol']) == ['NABIL', 'SCB']
+    scraper.get_today_data('2024-01-02', sector='7')
+    scraper.get_today_data('2024-01-02')
+    assert posted == ['2', '7', ALL_SECTORS]
+    with pytest.raises(ValueError):
+        scraper.get_today_data('2024-01-02', sector='Insurance')
+
+
+def test_missing_sector_filter_is_looked_up_once(monkeypatch):
+    scraper = ShareSansarScraper()
+    gets = []
+
+    def request(method, url, **kwargs):
+        if method == 'GET':
+            gets.append(url)
+            return FakeResponse('<html><input name="_token" value="tok"></html>')
+        return FakeResponse(make_snapshot_html())
+
+    monkeypatch.setattr(scraper.session, 'request', request)
+    assert scraper.get_sectors() == {}
+    scraper.get_today_data('2024-01-02', sector='Hydro Power')
+    scraper.get_today_data('2024-01-03', sector='Hydro Power')
+    assert len(gets) == 1
+
+
+def test_history_fetches_only_the_sector(site):
+    scraper, posted = site
+    result = scraper.fetch_history('NICA', '2024-01-01', '2024-01-02', sector='Hydro Power',
+                                   rate=None)
+    assert list(result.data['Symbol']) == ['NICA', 'NICA']
+    assert posted == ['7', '7']
+
+
+def test_sector_map_is_built_once_and_persisted(site, tmp_path, monkeypatch):
+    scraper, posted = site
+    mapping = build_sector_map('2024-01-02', scraper)
+    assert mapping == {'NABIL': 'Commercial Banks', 'SCB': 'Commercial Banks',
+                       'NICA': 'Hydro Power'}
+    with pytest.raises(NoTradingDataError):
+        build_sector_map('2024-01-05', scraper)
+
+    builds = []
+    monkeypatch.setattr(sectors, 'build_sector_map',
+                        lambda scraper=None: builds.append(1) or dict(mapping))
+    path = str(tmp_path / 'sectors.json')
+    assert sector_map(path=path) == mapping
+    assert sector_map(path=path) == mapping
+    sectors._maps.clear()
+    assert sector_map(path=path) == mapping          # from disk
+    assert len(builds) == 1
+    with open(path) as f:
+        assert json.load(f)['sectors'] == mapping
+    sector_map(path=path, max_age=-1)
+    assert len(builds) == 2
+
+
+def test_auto_sector_uses_the_common_sector(monkeypatch):
+    mapping = {'NABIL': 'Commercial Banks', 'SCB': 'Commercial Banks', 'NICA': 'Hydro Power'}
+    monkeypatch.setattr(sectors, 'sector_map', lambda: mapping)
+    assert resolve_sector('auto', ['nabil', 'SCB']) == 'Commercial Banks'
+    assert resolve_sector('auto', ['NABIL', 'NICA']) is None
+    assert resolve_sector('auto', ['UNKNOWN']) is None
+    assert resolve_sector('Hydro Power', ['NABIL']) == 'Hydro Power'
+
+    seen = []
+
+    def fake(self, date=None, sector=None):
+        seen.append(sector)
+        return ShareSansarScraper()._parse_response(make_snapshot_html(), date)
+
+    monkeypatch.setattr(ShareSansarScraper, 'get_today_data', fake)
+    ss.history('NICA', start='2024-01-02', end='2024-01-02', sector='auto')
+    assert seen == ['Hydro Power']
+
+
+def test_sector_aggregates_in_one_groupby(snapshot_html):
+    snap = ShareSansarScraper()._parse_response(snapshot_html, '2024-01-02')
+    mapping = {'NABIL': 'Banks', 'SCB': 'Banks'}
+    out = sector_aggregates(snap, mapping)
+    assert list(out.index) == ['Banks', 'Unknown']
+    banks = out.loc['Banks']
+    assert banks['Symbols'] == 2 and banks['Advances'] == 2 and banks['Declines'] == 0
+    assert banks['Turnover'] == 5032000 + 2422000
+    assert banks['MedianChange'] == pytest.approx((1.41 + 1.67) / 2)
+    assert out.loc['Unknown', 'Declines'] == 1
+
+    two_days = pd.concat([snap, snap.assign(Date='2024-01-03')])
+    daily = sector_aggregates(two_days.assign(Sector=two_days['Symbol'].map(mapping)), by_date=True)
+    assert list(daily.index) == [('2024-01-02', 'Banks'), ('2024-01-02', 'Unknown'),
+                                 ('2024-01-03', 'Banks'), ('2024-01-03', 'Unknown')]
@@ -0,0 +1,73 @@
+"""Offline tests for the SQLite snapshot store."""
+
+import sqlite3
+
+import pytest
+
+import sharesansar as ss
+from sharesansar import store as store_module
+from sharesansar.backfill import Backfill
+from sharesansar.scraper import ShareSansarScraper
+from sharesansar.store import SQLiteStore, open_store
+
+
+@pytest.fixture
+def sqlite_store(tmp_path, monkeypatch, snapshot_html):
+    scraper = ShareSansarScraper()
+    monkeypatch.setattr(scraper, 'get_today_data',
+                        lambda date=None, sector=None: scraper._parse_response(snapshot_html, date))
+    store = open_store(str(tmp_path / 'nepse.db'))
+    Backfill(store, scraper, rate=None).run('2024-01-01', '2024-01-10')
+    return store
+
+
+def test_open_store_picks_sqlite_by_suffix(sqlite_store):
+    assert isinstance(sqlite_store, SQLiteStore)
+    assert sqlite_store._conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_typed_schema_and_round_trip(sqlite_store):
+    assert sqlite_store.dates()[0] == '2024-01-01'
+    df = sqlite_store.read('2024-01-01')
+    assert list(df['Symbol']) == ['NABIL', 'NICA', 'SCB']
+    nabil = df[df['Symbol'] == 'NABIL'].iloc[0]
+    assert nabil['Vol'] == 10000
+    assert nabil['ChangePercent'] == pytest.approx(1.41)
+    assert df['Date'].iloc[0] == '2024-01-01'
+    date_type = sqlite_store._conn.execute('SELECT typeof(date) FROM prices LIMIT 1').fetchone()[0]
+    assert date_type == 'integer'
+
+
+def test_symbol_range_uses_primary_key(sqlite_store):
+    plan = ' '.join(row[-1] for row in sqlite_store._conn.execute(
+        'EXPLAIN QUERY PLAN SELECT * FROM prices WHERE symbol_id = 1 AND date BETWEEN 20240101 AND 20240110'))
+    assert 'PRIMARY KEY' in plan or 'primary key' in plan.lower()
+
+
+def test_concurrent_reader_sees_committed_sessions(sqlite_store, snapshot_html):
+    reader = sqlite3.connect(sqlite_store.root)
+    before = reader.execute('SELECT COUNT(DISTINCT date) FROM prices').fetchone()[0]
+    extra = ShareSansarScraper()._parse_response(snapshot_html, '2024-01-11')
+    sqlite_store.write('2024-01-11', extra)
+    after = reader.execute('SELECT COUNT(DISTINCT date) FROM prices').fetchone()[0]
+    assert after == before + 1
+
+
+def test_history_is_a_single_local_query(sqlite_store, monkeypatch):
+    def no_network(*args, **kwargs):
+        raise AssertionError('network used')
+
+    monkeypatch.setattr('sharesansar.scraper.ShareSansarScraper.get_today_data', no_network)
+    ss.set_store(sqlite_store)
+    try:
+        hist = ss.Ticker('SCB').history(start='2024-01-01', end='2024-01-10')
+    finally:
+        ss.set_store(None)
+        store_module._default_store = None
+    assert list(hist['Date']) == ['2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04',
+                                  '2024-01-07', '2024-01-08', '2024-01-09', '2024-01-10']
+    assert set(hist['Symbol']) == {'SCB'}
+
+
+def test_checkpoint_sits_next_to_database(sqlite_store, tmp_path):
+    assert (tmp_path / 'nepse.db.backfill.json').exists()